@@ -6,9 +6,12 @@ using RAG (Retrieval-Augmented Generation) and prompt engineering techniques.
 
 Features:
 - Generate study guides, quizzes, explanations, summaries, and practice problems
+- Generate a lesson pack (several content types at once) from a single retrieval
 - Upload documents to build a knowledge base
 - Use RAG to enhance content with domain-specific information
 - Download generated content as text files
+- Keep a per-session history of results that survives reruns and downloads
+- Shares heavyweight components across sessions and evicts idle sessions
 """
 
 import os
@@ -56,10 +59,16 @@ if not os.getenv("DEBUG"):
 
 import streamlit as st
 import tempfile
+import hashlib
+import time
+import uuid
 
 from dotenv import load_dotenv
 from rag_system import RAGSystem
 from prompt_engineer import PromptEngineer
+from session_manager import SessionManager
+from reranker import CrossEncoderReranker
+from context_compressor import ContextCompressor
 
 load_dotenv()
 
@@ -70,21 +79,41 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+CONTENT_TYPES = {
+    "Study Guide": "study_guide",
+    "Quiz Questions": "quiz",
+    "Concept Explanation": "explanation",
+    "Summary": "summary",
+    "Practice Problems": "practice_problems"
+}
+CONTENT_TYPE_LABELS = {value: label for label, value in CONTENT_TYPES.items()}
+
 # Initialize session state
-if 'rag_system' not in st.session_state:
-    st.session_state.rag_system = None
-if 'prompt_engineer' not in st.session_state:
-    st.session_state.prompt_engineer = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 if 'knowledge_base_initialized' not in st.session_state:
     st.session_state.knowledge_base_initialized = False
+if 'current_result' not in st.session_state:
+    st.session_state.current_result = None
+if 'current_pack' not in st.session_state:
+    st.session_state.current_pack = []
 
-def initialize_systems():
+@st.cache_resource(show_spinner=False)
+def get_session_manager():
     """
-    Initialize RAG system and Prompt Engineer components.
+    Get the process-wide session manager (shared by all sessions).
     
-    Returns:
-        bool: True if initialization successful, False otherwise
+    Idle timeout and result limits can be set with SESSION_IDLE_TTL (seconds),
+    SESSION_MAX_RESULTS and SESSION_MAX_RESULT_MB.
     """
+    return SessionManager(
+        idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+        max_results=int(os.getenv("SESSION_MAX_RESULTS", "20")),
+        max_result_bytes=int(float(os.getenv("SESSION_MAX_RESULT_MB", "2")) * 1024 * 1024)
+    )
+
+@st.cache_resource(show_spinner=False)
+def _read_api_key():
     # Get API key from environment variable (for local) or Streamlit secrets (for cloud)
     api_key = os.getenv("OPENAI_API_KEY")
     # Only try Streamlit secrets if env var not found (avoids warning when running locally)
@@ -93,39 +122,243 @@ def initialize_systems():
             api_key = st.secrets.get("OPENAI_API_KEY", None)
         except (AttributeError, FileNotFoundError, KeyError, Exception):
             pass
+    return api_key
+
+def get_api_key():
+    """
+    Get the OpenAI API key, read once per process.
+    
+    Returns:
+        API key, or None if it isn't configured
+    """
+    api_key = _read_api_key()
+    if not api_key:
+        # Don't cache a missing key, so adding it later works without a restart
+        _read_api_key.clear()
+    return api_key
+
+def get_session():
+    """
+    Get this user's session from the session manager and mark it as active.
+    
+    If the session was evicted while idle, it's recreated and reattached to
+    the shared components.
+    """
+    session = get_session_manager().get_session(st.session_state.session_id)
+    if session.rag_system is None and st.session_state.knowledge_base_initialized:
+        initialize_systems(session)
+    return session
+
+def initialize_systems(session):
+    """
+    Initialize RAG system and Prompt Engineer components.
+    
+    The components are shared by all sessions using the same API key, so each
+    new session doesn't load its own copy of the vector store and clients.
+    
+    Args:
+        session: Session to attach the components to
+    
+    Returns:
+        bool: True if initialization successful, False otherwise
+    """
+    api_key = get_api_key()
     
     if not api_key:
         st.error("OpenAI API key not found. Please set OPENAI_API_KEY in your .env file or Streamlit secrets.")
         return False
     
     try:
-        if st.session_state.rag_system is None:
-            st.session_state.rag_system = RAGSystem(api_key=api_key)
-        
-        if st.session_state.prompt_engineer is None:
-            st.session_state.prompt_engineer = PromptEngineer(api_key=api_key)
-        
+        session.rag_system, session.prompt_engineer = get_session_manager().get_components(
+            api_key,
+            lambda: (
+                RAGSystem(
+                    api_key=api_key,
+                    reranker=CrossEncoderReranker.from_env(),
+                    compressor=ContextCompressor.from_env()
+                ),
+                PromptEngineer(api_key=api_key)
+            )
+        )
         st.session_state.knowledge_base_initialized = True
         return True
     except Exception as e:
         st.error(f"Something went wrong: {str(e)}")
         return False
 
+def request_key(content_type, topic, additional_requirements, use_rag, source=None):
+    """Key identifying a generation request in the session's result store."""
+    parts = [content_type, " ".join(topic.lower().split()), additional_requirements or "", str(use_rag)]
+    if source:
+        parts.append(source)
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def store_result(session, result, additional_requirements, use_rag):
+    """
+    Save a generated result in the session's history.
+    
+    Args:
+        session: Session to store the result in
+        result: Result dictionary with content, content_type, topic and context_used
+        additional_requirements: Requirements the result was generated with
+        use_rag: Whether the knowledge base was used
+    
+    Returns:
+        Request key of the stored result
+    """
+    key = request_key(result["content_type"], result["topic"], additional_requirements, use_rag, result.get("source"))
+    session.results.put(key, dict(
+        result,
+        additional_requirements=additional_requirements,
+        use_rag=use_rag,
+        created=time.time()
+    ))
+    return key
+
+def generate_result(session, content_type, topic, additional_requirements, use_rag):
+    """
+    Generate content for a request and save it in the session's history.
+    
+    Returns:
+        Request key of the stored result
+    """
+    if use_rag:
+        result = session.prompt_engineer.generate_with_rag(
+            content_type=content_type,
+            topic=topic,
+            rag_system=session.rag_system,
+            additional_requirements=additional_requirements if additional_requirements else None
+        )
+    else:
+        content = session.prompt_engineer.generate_content(
+            content_type=content_type,
+            topic=topic,
+            context=None,
+            additional_requirements=additional_requirements if additional_requirements else None
+        )
+        result = {
+            "content": content,
+            "context_used": None,
+            "content_type": content_type,
+            "topic": topic,
+            "compression": None
+        }
+    return store_result(session, result, additional_requirements, use_rag)
+
+def generate_document_result(session, source, content_type, additional_requirements):
+    """
+    Generate content from a whole document with a progress bar and save it in the session's history.
+    
+    Returns:
+        Request key of the stored result
+    """
+    bar = st.progress(0.0, text="Summarizing sections...")
+    
+    def progress(stage, done, total):
+        label = "Summarizing sections" if stage == "map" else "Merging summaries"
+        bar.progress(done / total, text=f"{label} ({done}/{total})...")
+    
+    result = session.prompt_engineer.generate_from_document(
+        source,
+        session.rag_system,
+        content_type=content_type,
+        additional_requirements=additional_requirements if additional_requirements else None,
+        progress=progress
+    )
+    bar.empty()
+    return store_result(session, result, additional_requirements, True)
+
+def open_result(key):
+    """Show a result from the history (history panel callback)."""
+    st.session_state.current_result = key
+    st.session_state.current_pack = []
+
+def render_result(session, key, show_context=False, title=None):
+    """
+    Show a stored result with download and regenerate buttons.
+    
+    Rendering from the store means reruns (e.g. clicking Download) don't lose
+    the result or trigger another LLM call.
+    
+    Args:
+        session: Session holding the result
+        key: Request key of the result
+        show_context: Whether to show the retrieved context
+        title: Expander title; shown as a section with a subheader if None
+    """
+    result = session.results.get(key)
+    if result is None:
+        return
+    
+    container = st.expander(title, expanded=True) if title else st.container()
+    with container:
+        if show_context and result.get("context_used"):
+            with st.expander("Retrieved Context from Knowledge Base"):
+                if result.get("compression"):
+                    stats = result["compression"]
+                    st.caption(
+                        f"Compressed {stats['compression_ratio']:.1f}x "
+                        f"({stats['original_tokens']} → {stats['context_tokens']} tokens)"
+                    )
+                st.text(result["context_used"])
+        
+        if not title:
+            st.subheader("Generated Content")
+        st.markdown(result["content"])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="Download Content",
+                data=result["content"],
+                file_name=f"{result['content_type']}_{result['topic'].replace(' ', '_')}.txt",
+                mime="text/plain",
+                key=f"download_{key}"
+            )
+        with col2:
+            if st.button("Regenerate", key=f"regenerate_{key}"):
+                if result.get("source"):
+                    generate_document_result(
+                        session,
+                        result["source"],
+                        result["content_type"],
+                        result["additional_requirements"]
+                    )
+                else:
+                    with st.spinner("Working on it..."):
+                        generate_result(
+                            session,
+                            result["content_type"],
+                            result["topic"],
+                            result["additional_requirements"],
+                            result["use_rag"]
+                        )
+                st.rerun()
+
+def prefetch_topic_context():
+    """
+    Start retrieving knowledge base context as soon as the topic is entered.
+    
+    Runs as the topic field's on_change callback, so retrieval happens while the
+    user fills in the rest of the form instead of after "Generate Content".
+    """
+    topic = st.session_state.get("topic", "")
+    session = get_session()
+    if not st.session_state.get("use_rag", True) or session.rag_system is None:
+        return
+    if session.prompt_engineer.handle_edge_cases(topic) is None:
+        session.rag_system.prefetch_context(topic, k=5, caller=session.session_id)
+
 def main():
     st.title("Educational Content Generator")
     st.markdown("Create study guides, quizzes, explanations, and more using AI")
     
+    session = get_session()
+    
     with st.sidebar:
         st.header("Configuration")
         
-        # Get API key from environment variable (for local) or Streamlit secrets (for cloud)
-        api_key = os.getenv("OPENAI_API_KEY")
-        # Only try Streamlit secrets if env var not found (avoids warning when running locally)
-        if not api_key:
-            try:
-                api_key = st.secrets.get("OPENAI_API_KEY", None)
-            except (AttributeError, FileNotFoundError, KeyError, Exception):
-                pass
+        api_key = get_api_key()
         
         if api_key:
             st.success("API Key configured")
@@ -134,7 +367,7 @@ def main():
         
         if st.button("Initialize Systems", type="primary"):
             with st.spinner("Initializing..."):
-                if initialize_systems():
+                if initialize_systems(session):
                     st.success("Ready!")
                     st.rerun()
         
@@ -159,20 +392,53 @@ def main():
                             tmp_path = tmp_file.name
                         
                         try:
-                            docs = st.session_state.rag_system.load_document(tmp_path)
-                            st.session_state.rag_system.add_documents(docs)
-                            st.success(f"Added {uploaded_file.name}")
+                            docs = session.rag_system.load_document(tmp_path)
+                            for doc in docs:
+                                # Record the uploaded name rather than the temporary path
+                                doc.metadata["source"] = uploaded_file.name
+                            stats = session.rag_system.add_documents(docs)
+                            if stats["duplicates"]:
+                                st.success(
+                                    f"Added {uploaded_file.name} ({stats['duplicates']} of {stats['chunks']} chunks "
+                                    f"already in the knowledge base, {stats['dedup_ratio']:.0%} deduplicated)"
+                                )
+                            else:
+                                st.success(f"Added {uploaded_file.name}")
                         except Exception as e:
                             st.error(f"Couldn't process {uploaded_file.name}: {str(e)}")
                         finally:
                             os.unlink(tmp_path)
             
             if st.button("Clear Knowledge Base", type="secondary"):
-                st.session_state.rag_system.clear_knowledge_base()
+                session.rag_system.clear_knowledge_base()
                 st.success("Cleared!")
                 st.rerun()
         else:
             st.info("Initialize systems first")
+        
+        st.divider()
+        
+        with st.expander("Server Status"):
+            stats = get_session_manager().stats()
+            st.metric("Process Memory (RSS)", f"{stats['rss_bytes'] / (1024 * 1024):.0f} MB")
+            st.metric("Live Sessions", stats["live_sessions"])
+            st.caption(
+                f"This session: {len(session.results)} stored results, "
+                f"{session.memory_bytes() / 1024:.0f} KB. "
+                f"Sessions evicted after {get_session_manager().idle_ttl / 60:.0f} idle minutes: {stats['evicted_sessions']}."
+            )
+        
+        if len(session.results):
+            st.divider()
+            st.header("History")
+            for key, result in session.results.items():
+                st.button(
+                    f"{CONTENT_TYPE_LABELS.get(result['content_type'], result['content_type'])}: {result['topic']}",
+                    key=f"history_{key}",
+                    on_click=open_result,
+                    args=(key,),
+                    use_container_width=True
+                )
     
     if not st.session_state.knowledge_base_initialized:
         st.info("Please initialize systems from the sidebar to begin")
@@ -180,24 +446,18 @@ def main():
     
     st.header("Generate Educational Content")
     
-    content_types = {
-        "Study Guide": "study_guide",
-        "Quiz Questions": "quiz",
-        "Concept Explanation": "explanation",
-        "Summary": "summary",
-        "Practice Problems": "practice_problems"
-    }
-    
     selected_type = st.selectbox(
         "Select Content Type",
-        options=list(content_types.keys())
+        options=list(CONTENT_TYPES.keys())
     )
     
-    content_type = content_types[selected_type]
+    content_type = CONTENT_TYPES[selected_type]
     
     topic = st.text_input(
         "Enter Topic or Subject",
-        placeholder="e.g., Photosynthesis, Python Functions, World War II"
+        placeholder="e.g., Photosynthesis, Python Functions, World War II",
+        key="topic",
+        on_change=prefetch_topic_context
     )
     
     additional_requirements = st.text_area(
@@ -207,7 +467,7 @@ def main():
     
     col1, col2 = st.columns(2)
     with col1:
-        use_rag = st.checkbox("Use Knowledge Base (RAG)", value=True)
+        use_rag = st.checkbox("Use Knowledge Base (RAG)", value=True, key="use_rag")
     with col2:
         show_context = st.checkbox("Show Retrieved Context", value=False)
     
@@ -216,50 +476,83 @@ def main():
             st.error("Please enter a topic")
             return
         
-        error_msg = st.session_state.prompt_engineer.handle_edge_cases(topic)
+        error_msg = session.prompt_engineer.handle_edge_cases(topic)
         if error_msg:
             st.warning(error_msg)
             return
         
+        key = request_key(content_type, topic, additional_requirements, use_rag)
+        open_result(key)
+        if session.results.get(key) is None:
+            with st.spinner("Working on it..."):
+                generate_result(session, content_type, topic, additional_requirements, use_rag)
+            # Rerun so the history panel includes the new result
+            st.rerun()
+        st.caption("Showing the saved result for this request. Click Regenerate for a new version.")
+    
+    if st.session_state.current_result:
+        render_result(session, st.session_state.current_result, show_context)
+    
+    st.subheader("Lesson Pack")
+    pack_types = st.multiselect(
+        "Generate several content types at once",
+        options=list(CONTENT_TYPES.keys()),
+        default=["Study Guide", "Quiz Questions", "Summary"]
+    )
+    
+    if st.button("Generate Lesson Pack", use_container_width=True):
+        if not topic:
+            st.error("Please enter a topic")
+            return
+        
+        error_msg = session.prompt_engineer.handle_edge_cases(topic)
+        if error_msg:
+            st.warning(error_msg)
+            return
+        
+        if not pack_types:
+            st.error("Please select at least one content type")
+            return
+        
+        st.session_state.current_result = None
+        st.session_state.current_pack = []
         with st.spinner("Working on it..."):
-            if use_rag:
-                result = st.session_state.prompt_engineer.generate_with_rag(
-                    content_type=content_type,
-                    topic=topic,
-                    rag_system=st.session_state.rag_system,
-                    additional_requirements=additional_requirements if additional_requirements else None
-                )
-                
-                if show_context and result.get("context_used"):
-                    with st.expander("Retrieved Context from Knowledge Base"):
-                        st.text(result["context_used"])
-                
-                st.subheader("Generated Content")
-                st.markdown(result["content"])
-                
-                st.download_button(
-                    label="Download Content",
-                    data=result["content"],
-                    file_name=f"{content_type}_{topic.replace(' ', '_')}.txt",
-                    mime="text/plain"
-                )
-            else:
-                content = st.session_state.prompt_engineer.generate_content(
-                    content_type=content_type,
-                    topic=topic,
-                    context=None,
-                    additional_requirements=additional_requirements if additional_requirements else None
-                )
-                
-                st.subheader("Generated Content")
-                st.markdown(content)
-                
-                st.download_button(
-                    label="Download Content",
-                    data=content,
-                    file_name=f"{content_type}_{topic.replace(' ', '_')}.txt",
-                    mime="text/plain"
-                )
+            results = session.prompt_engineer.generate_bundle(
+                topic=topic,
+                content_types=[CONTENT_TYPES[label] for label in pack_types],
+                rag_system=session.rag_system if use_rag else None,
+                additional_requirements=additional_requirements if additional_requirements else None
+            )
+            
+            # Show each content type as soon as it's done
+            for result in results:
+                key = store_result(session, result, additional_requirements, use_rag)
+                st.session_state.current_pack.append(key)
+                render_result(session, key, title=CONTENT_TYPE_LABELS[result["content_type"]])
+        st.rerun()
+    else:
+        for key in st.session_state.current_pack:
+            result = session.results.get(key)
+            if result is not None:
+                render_result(session, key, title=CONTENT_TYPE_LABELS[result["content_type"]])
+    
+    st.subheader("Whole Document")
+    sources = session.rag_system.list_sources()
+    if not sources:
+        st.caption("Upload documents to summarize them.")
+    else:
+        doc_col1, doc_col2 = st.columns(2)
+        with doc_col1:
+            source = st.selectbox("Document", options=sources, format_func=os.path.basename)
+        with doc_col2:
+            doc_type = st.selectbox("Generate", options=["Summary", "Study Guide"], key="document_content_type")
+        
+        if st.button("Generate from Document", use_container_width=True):
+            key = request_key(CONTENT_TYPES[doc_type], os.path.basename(source), additional_requirements, True, source)
+            if session.results.get(key) is None:
+                key = generate_document_result(session, source, CONTENT_TYPES[doc_type], additional_requirements)
+            open_result(key)
+            st.rerun()
     
     st.divider()
     st.markdown("**Educational Content Generator** - Uses RAG and prompt engineering to generate educational materials.")
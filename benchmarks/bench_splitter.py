@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming token splitter against the recursive character splitter.
+
+Builds a multi-megabyte corpus from the sample knowledge base files and reports
+chunks per second, peak memory and chunk size spread (in tokens) for each splitter.
+The recursive splitter is run twice: measuring characters (the old RAGSystem
+setting) and measuring tokens (what it takes to get token-sized chunks from it).
+
+Usage:
+    python benchmarks/bench_splitter.py --size-mb 5 --pages 50
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from text_splitter import StreamingTokenSplitter
+
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+def build_corpus(size_mb: float):
+    """Repeat the sample knowledge base files until the corpus reaches size_mb."""
+    base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge_base")
+    samples = []
+    for path in sorted(glob.glob(os.path.join(base_dir, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            samples.append(f.read())
+    sample = "\n\n".join(samples)
+    repeats = max(1, int(size_mb * 1024 * 1024 / len(sample)))
+    return "\n\n".join([sample] * repeats)
+
+
+def iter_pages(text: str, pages: int):
+    """Yield the corpus as a generator of page Documents."""
+    page_length = len(text) // pages + 1
+    for i in range(pages):
+        yield Document(
+            page_content=text[i * page_length:(i + 1) * page_length],
+            metadata={"source": "bench.txt", "page": i}
+        )
+
+
+def run(name, splitter, corpus, pages, count_tokens):
+    """Split the corpus once and print throughput, memory and size spread."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = splitter.split_documents(iter_pages(corpus, pages))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sizes = [count_tokens(chunk.page_content) for chunk in chunks[:2000]]
+    print(f"{name:<28} {len(chunks):>8} chunks  {len(chunks) / elapsed:>10.0f} chunks/s  "
+          f"{peak / 1024 / 1024:>8.1f} MiB peak  "
+          f"tokens/chunk mean={statistics.mean(sizes):.0f} stdev={statistics.pstdev(sizes):.0f} max={max(sizes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text splitters")
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Corpus size in MB")
+    parser.add_argument("--pages", type=int, default=50, help="Number of pages to split the corpus into")
+    parser.add_argument("--chunk-tokens", type=int, default=256, help="Chunk size for the token splitter")
+    parser.add_argument("--encoding", default="cl100k_base", help="tiktoken encoding (use 'none' for the approximate tokenizer)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size_mb)
+    print(f"Corpus: {len(corpus) / 1024 / 1024:.1f} MB in {args.pages} pages\n")
+
+    token_splitter = StreamingTokenSplitter(
+        chunk_size=args.chunk_tokens,
+        chunk_overlap=args.chunk_tokens // 5,
+        encoding_name=None if args.encoding == "none" else args.encoding
+    )
+    if token_splitter.encoding is None:
+        print("Note: tiktoken encoding not available, using approximate token counts\n")
+
+    recursive_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        length_function=len,
+        separators=SEPARATORS
+    )
+
+    recursive_token_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_tokens,
+        chunk_overlap=args.chunk_tokens // 5,
+        length_function=token_splitter.count_tokens,
+        separators=SEPARATORS
+    )
+
+    run("Recursive (1000 chars)", recursive_splitter, corpus, args.pages, token_splitter.count_tokens)
+    run("Recursive (tokens)", recursive_token_splitter, corpus, args.pages, token_splitter.count_tokens)
+    run("StreamingTokenSplitter", token_splitter, corpus, args.pages, token_splitter.count_tokens)
+
+
+if __name__ == "__main__":
+    main()
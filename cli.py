@@ -9,6 +9,8 @@ import sys
 from dotenv import load_dotenv
 from rag_system import RAGSystem
 from prompt_engineer import PromptEngineer
+from reranker import CrossEncoderReranker
+from context_compressor import ContextCompressor
 
 # Load environment variables
 load_dotenv()
@@ -35,7 +37,11 @@ def main():
     # Initialize systems
     print("\n📚 Initializing RAG System and Prompt Engineer...")
     try:
-        rag_system = RAGSystem(api_key=api_key)
+        rag_system = RAGSystem(
+            api_key=api_key,
+            reranker=CrossEncoderReranker.from_env(),
+            compressor=ContextCompressor.from_env()
+        )
         prompt_engineer = PromptEngineer(api_key=api_key)
         print("✅ Systems initialized successfully!\n")
     except Exception as e:
@@ -48,10 +54,12 @@ def main():
         print("What would you like to do?")
         print("1. Upload document to knowledge base")
         print("2. Generate content")
-        print("3. Exit")
+        print("3. Generate lesson pack (several content types at once)")
+        print("4. Summarize a whole document")
+        print("5. Exit")
         print("-"*60)
         
-        choice = input("\nEnter choice (1-3): ").strip()
+        choice = input("\nEnter choice (1-5): ").strip()
         
         if choice == "1":
             # Upload document
@@ -70,8 +78,11 @@ def main():
                 print(f"✅ Loaded {len(documents)} document(s)")
                 
                 print("📝 Adding to knowledge base...")
-                rag_system.add_documents(documents)
+                stats = rag_system.add_documents(documents)
                 print("✅ Document added to knowledge base!")
+                if stats["duplicates"]:
+                    print(f"♻️  Skipped {stats['duplicates']} of {stats['chunks']} chunks as near-duplicates "
+                          f"({stats['dedup_ratio']:.0%} deduplicated)")
             except FileNotFoundError:
                 print(f"❌ Error: File not found: {file_path}")
                 print("💡 Tip: Make sure the file path is correct. Try using sample files:")
@@ -135,6 +146,11 @@ def main():
                 print_header(f"Generated {content_type.replace('_', ' ').title()}")
                 print(result["content"])
                 
+                if result.get("compression"):
+                    stats = result["compression"]
+                    print(f"\n📉 Context compressed {stats['compression_ratio']:.1f}x "
+                          f"({stats['original_tokens']} → {stats['context_tokens']} tokens)")
+                
                 # Option to save
                 save = input("\n💾 Save to file? (y/n): ").strip().lower()
                 if save == 'y':
@@ -150,11 +166,128 @@ def main():
                 print(f"❌ Error generating content: {str(e)}")
         
         elif choice == "3":
+            # Generate lesson pack
+            print("\n📝 Content Types:")
+            print("1. Study Guide")
+            print("2. Quiz")
+            print("3. Explanation")
+            print("4. Summary")
+            print("5. Practice Problems")
+            
+            type_choices = input("\nSelect content types, comma separated (e.g. 1,2,4): ").strip()
+            content_types = {
+                "1": "study_guide",
+                "2": "quiz",
+                "3": "explanation",
+                "4": "summary",
+                "5": "practice_problems"
+            }
+            
+            selected = [c.strip() for c in type_choices.split(",") if c.strip()]
+            if not selected or any(c not in content_types for c in selected):
+                print("❌ Invalid choice")
+                continue
+            
+            topic = input("\nEnter topic: ").strip()
+            
+            if not topic:
+                print("❌ Topic cannot be empty")
+                continue
+            
+            additional_requirements = input("\nAdditional requirements (optional, press Enter to skip): ").strip()
+            if not additional_requirements:
+                additional_requirements = None
+            
+            try:
+                print(f"\n🤖 Generating {len(selected)} content types on '{topic}' in parallel...")
+                print("⏳ This may take 10-30 seconds...\n")
+                
+                results = prompt_engineer.generate_bundle(
+                    topic=topic,
+                    content_types=[content_types[c] for c in selected],
+                    rag_system=rag_system,
+                    additional_requirements=additional_requirements
+                )
+                
+                generated = []
+                for result in results:
+                    print_header(f"Generated {result['content_type'].replace('_', ' ').title()}")
+                    print(result["content"])
+                    generated.append(result)
+                
+                # Option to save
+                save = input("\n💾 Save to files? (y/n): ").strip().lower()
+                if save == 'y':
+                    for result in generated:
+                        content_type = result["content_type"]
+                        filename = f"{content_type}_{topic.replace(' ', '_')}.txt"
+                        with open(filename, 'w', encoding='utf-8') as f:
+                            f.write(f"Topic: {topic}\n")
+                            f.write(f"Type: {content_type.replace('_', ' ').title()}\n")
+                            f.write("="*60 + "\n\n")
+                            f.write(result["content"])
+                        print(f"✅ Saved to: {filename}")
+                
+            except Exception as e:
+                print(f"❌ Error generating content: {str(e)}")
+        
+        elif choice == "4":
+            # Map-reduce summary of one document
+            sources = rag_system.list_sources()
+            if not sources:
+                print("❌ No documents in the knowledge base. Upload one first.")
+                continue
+            
+            print("\n📚 Documents:")
+            for i, source in enumerate(sources, 1):
+                print(f"{i}. {os.path.basename(source)}")
+            
+            doc_choice = input(f"\nSelect document (1-{len(sources)}): ").strip()
+            if not doc_choice.isdigit() or not 1 <= int(doc_choice) <= len(sources):
+                print("❌ Invalid choice")
+                continue
+            source = sources[int(doc_choice) - 1]
+            
+            content_type = "study_guide" if input("\nStudy guide instead of summary? (y/n): ").strip().lower() == "y" else "summary"
+            
+            def show_progress(stage, done, total):
+                label = "Summarizing sections" if stage == "map" else "Merging summaries"
+                print(f"\r⏳ {label}: {done}/{total}   ", end="", flush=True)
+            
+            try:
+                print(f"\n🤖 Generating {content_type.replace('_', ' ')} of {os.path.basename(source)}...")
+                result = prompt_engineer.generate_from_document(
+                    source,
+                    rag_system,
+                    content_type=content_type,
+                    progress=show_progress
+                )
+                print()
+                print(f"📊 {result['chunks']} chunks in {result['sections']} sections, "
+                      f"{result['reduce_levels']} merge levels")
+                
+                print_header(f"Generated {content_type.replace('_', ' ').title()}")
+                print(result["content"])
+                
+                save = input("\n💾 Save to file? (y/n): ").strip().lower()
+                if save == 'y':
+                    filename = f"{content_type}_{result['topic'].replace(' ', '_')}.txt"
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        f.write(f"Document: {source}\n")
+                        f.write(f"Type: {content_type.replace('_', ' ').title()}\n")
+                        f.write("="*60 + "\n\n")
+                        f.write(result["content"])
+                    print(f"✅ Saved to: {filename}")
+                
+            except Exception as e:
+                print(f"\n❌ Error generating content: {str(e)}")
+        
+        elif choice == "5":
             print("\n👋 Goodbye!")
             break
         
         else:
-            print("❌ Invalid choice. Please enter 1, 2, or 3.")
+            print("❌ Invalid choice. Please enter 1, 2, 3, 4, or 5.")
 
 if __name__ == "__main__":
     try:
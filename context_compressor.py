@@ -0,0 +1,177 @@
+"""
+Extractive Context Compression
+
+This module shrinks retrieved context before it goes into a prompt by keeping
+only the sentences that matter for the query:
+- Retrieved chunks are split into sentences
+- Sentences are scored against the query (BM25-style lexical score, or
+  embedding similarity when an embedding model is given)
+- The best sentences are kept within a token budget, in their original order
+  and under their original source markers
+- Sentences repeated across overlapping chunks are kept once
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from text_splitter import StreamingTokenSplitter
+
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Words too common to say anything about relevance
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from how in into is it its of on or so such
+than that the their then there these this to was were what when where which who why will with
+""".split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences (and separate lines, e.g. list items)."""
+    return [sentence.strip() for sentence in _SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+class ContextCompressor:
+    """
+    Keeps the sentences of retrieved chunks most relevant to a query, within a token budget.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 400,
+        embeddings: Optional[Embeddings] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        k1: float = 1.2
+    ):
+        """
+        Args:
+            token_budget: Maximum tokens of context kept
+            embeddings: Embedding model for scoring sentences (default: lexical scoring,
+                which needs no API calls)
+            count_tokens: Token counting function (default: the streaming splitter's)
+            k1: BM25 term frequency saturation for lexical scoring
+        """
+        self.token_budget = token_budget
+        self.embeddings = embeddings
+        self.count_tokens = count_tokens or StreamingTokenSplitter().count_tokens
+        self.k1 = k1
+
+    @classmethod
+    def from_env(cls) -> Optional["ContextCompressor"]:
+        """
+        Create a lexical compressor from the CONTEXT_TOKEN_BUDGET environment variable.
+
+        Returns:
+            ContextCompressor, or None if CONTEXT_TOKEN_BUDGET isn't set
+        """
+        budget = os.getenv("CONTEXT_TOKEN_BUDGET")
+        if not budget:
+            return None
+        return cls(token_budget=int(budget))
+
+    def _lexical_scores(self, query: str, sentences: List[str]) -> List[float]:
+        """BM25 scores of sentences for the query terms, with IDF over the sentences."""
+        query_terms = set(_terms(query))
+        sentence_terms = [Counter(_terms(sentence)) for sentence in sentences]
+        lengths = [sum(terms.values()) for terms in sentence_terms]
+        average_length = (sum(lengths) / len(lengths)) or 1.0
+        n = len(sentences)
+
+        idf = {}
+        for term in query_terms:
+            frequency = sum(1 for terms in sentence_terms if term in terms)
+            idf[term] = math.log(1 + (n - frequency + 0.5) / (frequency + 0.5))
+
+        scores = []
+        for terms, length in zip(sentence_terms, lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term, 0)
+                if tf:
+                    score += idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * (0.25 + 0.75 * length / average_length))
+            scores.append(score)
+        return scores
+
+    def _embedding_scores(self, query: str, sentences: List[str]) -> List[float]:
+        """Cosine similarity of each sentence to the query."""
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        vectors = np.asarray(self.embeddings.embed_documents(sentences), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+        return (vectors @ query_vector / np.maximum(norms, 1e-12)).tolist()
+
+    def compress(self, query: str, documents: List[Document]) -> Tuple[str, Dict]:
+        """
+        Compress retrieved documents into a context string for the query.
+
+        Args:
+            query: Query the context is for
+            documents: Retrieved documents, most relevant first
+
+        Returns:
+            Tuple of (context string with "[Source i]" markers, statistics dictionary
+            with original_tokens, context_tokens and compression_ratio, the ratio of
+            original to kept tokens)
+        """
+        original_tokens = self.count_tokens("\n".join(
+            f"[Source {i}]\n{doc.page_content}\n" for i, doc in enumerate(documents, 1)
+        ))
+
+        # (source number, position, text), with sentences repeated by chunk overlap kept once
+        sentences: List[Tuple[int, int, str]] = []
+        seen = set()
+        for source, doc in enumerate(documents, 1):
+            for position, sentence in enumerate(split_sentences(doc.page_content)):
+                normalized = " ".join(sentence.lower().split())
+                if normalized not in seen:
+                    seen.add(normalized)
+                    sentences.append((source, position, sentence))
+
+        if not sentences:
+            return "", {"original_tokens": original_tokens, "context_tokens": 0, "compression_ratio": 1.0}
+
+        texts = [text for _, _, text in sentences]
+        scores = self._embedding_scores(query, texts) if self.embeddings else self._lexical_scores(query, texts)
+
+        # Best first; ties go to higher-ranked sources and earlier sentences
+        ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], sentences[i][0], sentences[i][1]))
+        if not self.embeddings and scores[ranked[0]] > 0:
+            # Sentences sharing no terms with the query are filler
+            ranked = [i for i in ranked if scores[i] > 0]
+
+        kept, used = [], 0
+        for i in ranked:
+            tokens = self.count_tokens(texts[i])
+            if used + tokens > self.token_budget:
+                continue
+            kept.append(i)
+            used += tokens
+        if not kept:
+            # Even the best sentence is over the budget; keep it rather than nothing
+            kept.append(ranked[0])
+
+        by_source: Dict[int, List[Tuple[int, str]]] = {}
+        for i in kept:
+            source, position, text = sentences[i]
+            by_source.setdefault(source, []).append((position, text))
+
+        context_parts = []
+        for source in sorted(by_source):
+            text = " ".join(text for _, text in sorted(by_source[source]))
+            context_parts.append(f"[Source {source}]\n{text}\n")
+        context = "\n".join(context_parts)
+
+        context_tokens = self.count_tokens(context) if context else 0
+        return context, {
+            "original_tokens": original_tokens,
+            "context_tokens": context_tokens,
+            "compression_ratio": original_tokens / context_tokens if context_tokens else 1.0
+        }
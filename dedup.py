@@ -0,0 +1,253 @@
+"""
+Near-Duplicate Detection
+
+This module finds chunks that are near-duplicates of chunks already in the
+knowledge base (the same definition in lecture notes, slides and handouts):
+- Each chunk gets a MinHash signature over its word shingles
+- Signatures are indexed with locality-sensitive hashing (LSH) bands, so a
+  lookup only compares against likely matches
+- Candidates are confirmed with the estimated Jaccard similarity
+- The index can be saved next to the vector store and loaded again; new
+  signatures are appended to a journal instead of rewriting the whole file
+"""
+
+import hashlib
+import os
+import re
+import struct
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+_WORD_PATTERN = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Estimated Jaccard similarity at which two chunks count as near-duplicates
+DEFAULT_THRESHOLD = 0.9
+
+# Journal records: id length, id (UTF-8), then the signature
+_ID_LENGTH = struct.Struct("<H")
+
+
+class MinHasher:
+    """Computes MinHash signatures of texts from their word shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            shingle_size: Words per shingle
+            seed: Seed for the permutations
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> List[str]:
+        """Overlapping runs of `shingle_size` lowercased words."""
+        words = _WORD_PATTERN.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)] if words else []
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        MinHash signature of a text.
+
+        Returns:
+            Array of num_perm uint64 values, or None if the text has no words
+        """
+        shingles = set(self.shingles(text))
+        if not shingles:
+            return None
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of MinHash signatures keyed by chunk id.
+
+    Two chunks are near-duplicates when their estimated Jaccard similarity
+    (share of equal signature values) is at least the threshold.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = 128, bands: int = 32, shingle_size: int = 3):
+        """
+        Args:
+            threshold: Minimum estimated Jaccard similarity of near-duplicates
+            num_perm: Signature length
+            bands: LSH bands (num_perm must be divisible by it); more bands find
+                more candidates at lower similarity
+            shingle_size: Words per shingle
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+        # Ids added since the index was last saved or loaded
+        self._unsaved: List[str] = []
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def find(self, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar indexed chunk at or above the threshold.
+
+        Args:
+            signature: MinHash signature to look up
+
+        Returns:
+            Tuple of (chunk id, estimated similarity), or None
+        """
+        with self._lock:
+            candidates = {chunk_id for key in self._band_keys(signature) for chunk_id in self._buckets.get(key, ())}
+            best = None
+            for chunk_id in candidates:
+                similarity = float(np.mean(self._signatures[chunk_id] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (chunk_id, similarity)
+            return best
+
+    def add(self, chunk_id: str, signature: np.ndarray):
+        """Index a chunk's signature."""
+        with self._lock:
+            if chunk_id not in self._signatures:
+                self._unsaved.append(chunk_id)
+            self._signatures[chunk_id] = signature
+            for key in self._band_keys(signature):
+                self._buckets[key].append(chunk_id)
+
+    def remove(self, chunk_ids: List[str]):
+        """Remove chunks from the index (ids that aren't indexed are ignored)."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                signature = self._signatures.pop(chunk_id, None)
+                if signature is None:
+                    continue
+                for key in self._band_keys(signature):
+                    bucket = self._buckets.get(key)
+                    if bucket and chunk_id in bucket:
+                        bucket.remove(chunk_id)
+
+    def ids(self) -> List[str]:
+        """Ids of the indexed chunks."""
+        with self._lock:
+            return list(self._signatures)
+
+    def clear(self):
+        with self._lock:
+            self._signatures.clear()
+            self._buckets.clear()
+            self._unsaved.clear()
+
+    @staticmethod
+    def _journal_path(path: str) -> str:
+        return path + ".journal"
+
+    def save(self, path: str):
+        """Save all indexed signatures to a .npz file (and empty its journal)."""
+        with self._lock:
+            ids = list(self._signatures)
+            matrix = np.stack([self._signatures[i] for i in ids]) if ids else np.zeros((0, self.hasher.num_perm), dtype=np.uint64)
+            self._unsaved.clear()
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, ids=np.asarray(ids, dtype=str), signatures=matrix)
+        os.replace(tmp_path, path)
+        if os.path.exists(self._journal_path(path)):
+            os.remove(self._journal_path(path))
+
+    def append(self, path: str):
+        """
+        Save the signatures added since the last save or load.
+
+        They are appended to a journal next to the .npz file, so the cost
+        depends on the new chunks rather than the whole index. The file is
+        rewritten with save() once the journal is larger than it.
+
+        Args:
+            path: .npz file written by save()
+        """
+        journal_path = self._journal_path(path)
+        if not os.path.exists(path):
+            self.save(path)
+            return
+        with self._lock:
+            records = [
+                (chunk_id, self._signatures[chunk_id]) for chunk_id in self._unsaved if chunk_id in self._signatures
+            ]
+            self._unsaved.clear()
+        if not records:
+            return
+
+        with open(journal_path, "ab") as f:
+            for chunk_id, signature in records:
+                encoded = chunk_id.encode("utf-8")
+                f.write(_ID_LENGTH.pack(len(encoded)) + encoded + signature.astype("<u8").tobytes())
+            journal_bytes = f.tell()
+        if journal_bytes > os.path.getsize(path):
+            self.save(path)
+
+    def _read_journal(self, path: str) -> List[Tuple[str, np.ndarray]]:
+        """Read journal records, ignoring a record cut off by a crash."""
+        journal_path = self._journal_path(path)
+        if not os.path.exists(journal_path):
+            return []
+        with open(journal_path, "rb") as f:
+            data = f.read()
+        signature_bytes = self.hasher.num_perm * 8
+        records, offset = [], 0
+        while offset + _ID_LENGTH.size <= len(data):
+            (length,) = _ID_LENGTH.unpack_from(data, offset)
+            end = offset + _ID_LENGTH.size + length + signature_bytes
+            if end > len(data):
+                break
+            chunk_id = data[offset + _ID_LENGTH.size:offset + _ID_LENGTH.size + length].decode("utf-8")
+            signature = np.frombuffer(data, dtype="<u8", count=self.hasher.num_perm, offset=end - signature_bytes)
+            records.append((chunk_id, signature.astype(np.uint64)))
+            offset = end
+        return records
+
+    def load(self, path: str) -> bool:
+        """
+        Load signatures saved with save() and append(), replacing the current contents.
+
+        Returns:
+            True if the file existed and matched this index's signature length
+        """
+        if not os.path.exists(path):
+            return False
+        with np.load(path, allow_pickle=False) as data:
+            ids, matrix = data["ids"].tolist(), data["signatures"]
+        if matrix.shape[1] != self.hasher.num_perm:
+            return False
+        self.clear()
+        for chunk_id, signature in zip(ids, matrix):
+            self.add(chunk_id, signature)
+        for chunk_id, signature in self._read_journal(path):
+            self.add(chunk_id, signature)
+        with self._lock:
+            self._unsaved.clear()
+        return True
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
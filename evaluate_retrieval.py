@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality vs. latency evaluation
+
+Sweeps splitter and retrieval settings (chunk size, chunk overlap, k) over a
+labelled query set and reports for each configuration:
+- recall@k: share of queries with a relevant chunk in the top k
+- MRR: mean reciprocal rank of the first relevant chunk (within the top k)
+- mean context tokens: size of the retrieved context that goes into the prompt
+- retrieval p95 latency
+
+Configurations on the Pareto front (not beaten on all three of recall, context
+tokens and latency by another one) are marked. Runs offline with a local
+embedding model.
+
+Query set format (JSONL), one object per line:
+    {"query": "What does mitochondria do?", "expected_source": "sample_biology.txt"}
+    {"query": "What is a stack?", "expected_text": "Last-In-First-Out"}
+A retrieved chunk is relevant if it matches every expected field given.
+
+Usage:
+    python evaluate_retrieval.py --queries examples/retrieval_eval_queries.jsonl
+    python evaluate_retrieval.py --queries q.jsonl --chunk-sizes 128,256 --ks 3,5 --format json
+    python evaluate_retrieval.py --queries q.jsonl --rerank-model cross-encoder/ms-marco-MiniLM-L-6-v2
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from rag_system import RAGSystem
+from local_embeddings import HashingEmbeddings, LocalEmbeddings
+from reranker import CrossEncoderReranker
+
+
+def load_queries(path: str) -> List[Dict]:
+    """Load a labelled query set from a JSONL file."""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if "query" not in item or not ("expected_source" in item or "expected_text" in item):
+                raise ValueError(f"{path}:{line_number}: need 'query' and 'expected_source' or 'expected_text'")
+            queries.append(item)
+    return queries
+
+
+def is_relevant(doc: Document, item: Dict) -> bool:
+    """Check whether a retrieved chunk matches a query's labels."""
+    if "expected_source" in item:
+        source = os.path.basename(str(doc.metadata.get("source", "")))
+        if source != os.path.basename(item["expected_source"]):
+            return False
+    if "expected_text" in item:
+        if item["expected_text"].lower() not in doc.page_content.lower():
+            return False
+    return True
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def evaluate_config(
+    documents: List[Document],
+    queries: List[Dict],
+    chunk_size: int,
+    chunk_overlap: int,
+    ks: List[int],
+    embeddings: Embeddings,
+    repeats: int = 3,
+    reranker: Optional[CrossEncoderReranker] = None
+) -> List[Dict]:
+    """
+    Build a knowledge base with one splitter setting and evaluate every k on it.
+
+    Args:
+        documents: Corpus documents
+        queries: Labelled queries
+        chunk_size: Chunk size in tokens
+        chunk_overlap: Chunk overlap in tokens
+        ks: Numbers of chunks to retrieve
+        embeddings: Embedding model
+        repeats: Times each query is timed
+        reranker: Cross-encoder re-ranker to evaluate (default: vector order only)
+
+    Returns:
+        One result dictionary per k
+    """
+    directory = tempfile.mkdtemp(prefix="rag_eval_")
+    try:
+        rag = RAGSystem(
+            persist_directory=directory,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            embeddings=embeddings,
+            reranker=reranker
+        )
+        rag.add_documents(documents)
+        chunk_count = rag.vector_store._collection.count()
+
+        results = []
+        for k in ks:
+            hits, reciprocal_ranks, context_tokens, latencies = 0, [], [], []
+            for item in queries:
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    docs = rag.retrieve_relevant_context(item["query"], k=k)
+                    latencies.append(time.perf_counter() - start)
+
+                rank = next((i for i, doc in enumerate(docs, 1) if is_relevant(doc, item)), None)
+                if rank is not None:
+                    hits += 1
+                reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+                context_tokens.append(sum(rag.text_splitter.count_tokens(doc.page_content) for doc in docs))
+
+            results.append({
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "k": k,
+                "chunks": chunk_count,
+                "recall_at_k": hits / len(queries),
+                "mrr": sum(reciprocal_ranks) / len(queries),
+                "mean_context_tokens": sum(context_tokens) / len(queries),
+                "p95_latency_ms": percentile(latencies, 0.95) * 1000
+            })
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def mark_pareto(results: List[Dict]):
+    """Flag results that no other result beats on recall, context tokens and latency."""
+    for result in results:
+        result["pareto"] = not any(
+            other is not result
+            and other["recall_at_k"] >= result["recall_at_k"]
+            and other["mean_context_tokens"] <= result["mean_context_tokens"]
+            and other["p95_latency_ms"] <= result["p95_latency_ms"]
+            and (
+                other["recall_at_k"] > result["recall_at_k"]
+                or other["mean_context_tokens"] < result["mean_context_tokens"]
+                or other["p95_latency_ms"] < result["p95_latency_ms"]
+            )
+            for other in results
+        )
+
+
+def format_table(results: List[Dict]) -> str:
+    """Format results as a text table."""
+    lines = [
+        f"{'chunk':>6} {'overlap':>8} {'k':>3} {'chunks':>7} {'recall@k':>9} {'MRR':>6} {'ctx tokens':>11} {'p95 ms':>8}  pareto",
+        "-" * 78
+    ]
+    for r in results:
+        lines.append(
+            f"{r['chunk_size']:>6} {r['chunk_overlap']:>8} {r['k']:>3} {r['chunks']:>7} "
+            f"{r['recall_at_k']:>9.2f} {r['mrr']:>6.2f} {r['mean_context_tokens']:>11.0f} "
+            f"{r['p95_latency_ms']:>8.2f}  {'*' if r['pareto'] else ''}"
+        )
+    return "\n".join(lines)
+
+
+def parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality vs. latency across settings")
+    parser.add_argument("--queries", required=True, help="Labelled query set (JSONL)")
+    parser.add_argument("--docs", nargs="+", default=sorted(glob.glob("knowledge_base/*.txt")), help="Corpus files (PDF or TXT)")
+    parser.add_argument("--chunk-sizes", type=parse_ints, default=[128, 256, 512], help="Chunk sizes in tokens, comma separated")
+    parser.add_argument("--overlaps", type=parse_ints, default=[0, 50], help="Chunk overlaps in tokens, comma separated")
+    parser.add_argument("--ks", type=parse_ints, default=[3, 5, 8], help="Values of k, comma separated")
+    parser.add_argument("--embeddings", choices=["local", "hashing"], default="local",
+                        help="local: sentence-transformers model, hashing: lexical, no download needed")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="sentence-transformers model for --embeddings local")
+    parser.add_argument("--rerank-model", help="Re-rank candidates with this sentence-transformers cross-encoder")
+    parser.add_argument("--rerank-candidates", type=int, default=20, help="Candidates fetched for re-ranking")
+    parser.add_argument("--repeats", type=int, default=3, help="Times each query is timed")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format")
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    args = parser.parse_args()
+
+    if not args.docs:
+        print("No corpus files found. Pass them with --docs.")
+        sys.exit(1)
+
+    queries = load_queries(args.queries)
+    embeddings = LocalEmbeddings(args.model) if args.embeddings == "local" else HashingEmbeddings()
+    reranker = None
+    if args.rerank_model:
+        # No time budget or score cache, so every timed query pays the full re-ranking cost
+        reranker = CrossEncoderReranker(
+            args.rerank_model,
+            candidates=args.rerank_candidates,
+            time_budget=float("inf"),
+            cache_size=0
+        )
+
+    documents = [doc for path in args.docs for doc in RAGSystem.load_document(path)]
+
+    results = []
+    for chunk_size in args.chunk_sizes:
+        for chunk_overlap in args.overlaps:
+            if chunk_overlap >= chunk_size:
+                continue
+            print(f"Evaluating chunk_size={chunk_size} overlap={chunk_overlap}...", file=sys.stderr)
+            results.extend(evaluate_config(
+                documents, queries, chunk_size, chunk_overlap, args.ks, embeddings, args.repeats, reranker
+            ))
+    mark_pareto(results)
+
+    output = json.dumps(results, indent=2) if args.format == "json" else format_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
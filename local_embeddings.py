@@ -0,0 +1,91 @@
+"""
+Local Embedding Models
+
+This module provides embedding models that run without any API calls, for
+offline evaluation and testing:
+- LocalEmbeddings: a sentence-transformers model running on the local CPU/GPU
+- HashingEmbeddings: a dependency-free lexical embedding (hashed bag of words)
+
+Both implement LangChain's Embeddings interface, so they can be passed to
+RAGSystem(embeddings=...).
+"""
+
+import hashlib
+import re
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Embeddings from a local sentence-transformers model.
+
+    The model is loaded on first use and cached by sentence-transformers, so
+    after the first download no network access is needed.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 64):
+        """
+        Args:
+            model_name: sentence-transformers model name or local path
+            batch_size: Texts encoded per batch
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError(
+                    "sentence-transformers is required for LocalEmbeddings. "
+                    "Install it with: pip install sentence-transformers"
+                )
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._get_model().encode(texts, batch_size=self.batch_size, normalize_embeddings=True)
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Lexical embeddings using the hashing trick.
+
+    Lowercased words are hashed into a fixed number of dimensions and the
+    counts are L2-normalized. Needs no model download, so it's useful for
+    quick offline runs; retrieval quality is close to keyword matching.
+    """
+
+    def __init__(self, dimension: int = 512):
+        """
+        Args:
+            dimension: Size of the embedding vectors
+        """
+        self.dimension = dimension
+        self.model_name = f"hashing-{dimension}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in _WORD_PATTERN.findall(text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,312 @@
+"""
+Model Router
+
+This module picks an OpenAI chat model for each generation request based on:
+- The content type (how capable the model has to be, how long the output is)
+- Estimated prompt and output tokens
+- A latency budget
+
+Observed latencies are recorded in per-model histograms and fed back into the
+predictions, and models that were rate limited are avoided for a cool-down period.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, float("inf")]
+# Upper bounds (milliseconds) of the per-output-token time buckets
+TOKEN_TIME_BUCKETS = [2, 4, 6, 8, 12, 16, 24, 32, 48, 64, 96, float("inf")]
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a text (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram that can estimate quantiles."""
+
+    def __init__(self, buckets: List[float]):
+        """
+        Args:
+            buckets: Sorted upper bounds of the buckets, the last one should be infinity
+        """
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by interpolating inside the bucket that contains it.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value, or None if nothing has been observed
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if self.buckets[i] != float("inf") else lower * 2
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-2]
+
+
+class ModelProfile:
+    """Static description of a model used before any latency has been observed."""
+
+    def __init__(
+        self,
+        name: str,
+        quality: int,
+        tokens_per_second: float,
+        base_latency: float,
+        context_window: int,
+        cost_per_1k_tokens: float
+    ):
+        """
+        Args:
+            name: OpenAI model name
+            quality: Capability tier (1 = basic, 3 = strongest)
+            tokens_per_second: Expected output speed
+            base_latency: Expected time to first token in seconds
+            context_window: Maximum prompt + output tokens
+            cost_per_1k_tokens: Blended price used to break ties
+        """
+        self.name = name
+        self.quality = quality
+        self.tokens_per_second = tokens_per_second
+        self.base_latency = base_latency
+        self.context_window = context_window
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+
+
+DEFAULT_MODELS = [
+    ModelProfile("gpt-3.5-turbo", quality=1, tokens_per_second=90, base_latency=0.4, context_window=16385, cost_per_1k_tokens=0.001),
+    ModelProfile("gpt-4o-mini", quality=2, tokens_per_second=80, base_latency=0.5, context_window=128000, cost_per_1k_tokens=0.0004),
+    ModelProfile("gpt-4o", quality=3, tokens_per_second=50, base_latency=0.8, context_window=128000, cost_per_1k_tokens=0.006),
+]
+
+# Content type -> (minimum quality tier, expected output tokens)
+CONTENT_TYPE_REQUIREMENTS = {
+    "summary": (1, 300),
+    "explanation": (1, 700),
+    "study_guide": (2, 900),
+    "quiz": (2, 900),
+    "practice_problems": (2, 1200),
+}
+
+
+class RouteDecision:
+    """Models to try for one request, in order, with the time allowed for each."""
+
+    def __init__(
+        self,
+        models: List[str],
+        predicted_latency: Dict[str, float],
+        timeouts: Dict[str, float],
+        output_tokens: int,
+        deadline: float
+    ):
+        self.models = models
+        self.predicted_latency = predicted_latency
+        self.timeouts = timeouts
+        self.output_tokens = output_tokens
+        self.deadline = deadline
+
+    @property
+    def primary(self) -> str:
+        return self.models[0]
+
+    def time_left(self, model: str) -> float:
+        """Seconds a model may take if called now: its timeout, cut off at the request's deadline."""
+        return min(self.timeouts[model], self.deadline - time.monotonic())
+
+
+class ModelRouter:
+    """
+    Choose a model per request and learn from observed latencies.
+
+    The primary model is the fastest one (by predicted latency) that meets the
+    content type's quality tier and fits the prompt. Faster models follow as
+    fallbacks, used when the primary is rate limited or runs past its timeout.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[ModelProfile]] = None,
+        requirements: Optional[Dict[str, tuple]] = None,
+        default_latency_budget: float = 30.0,
+        min_samples: int = 5,
+        cooldown_seconds: float = 30.0
+    ):
+        """
+        Args:
+            models: Available models (default: DEFAULT_MODELS)
+            requirements: Content type -> (minimum quality, expected output tokens)
+            default_latency_budget: Latency budget in seconds when a request doesn't set one
+            min_samples: Observations needed before histograms replace the static profile
+            cooldown_seconds: How long to avoid a model after it was rate limited
+        """
+        self.models = {profile.name: profile for profile in (models or DEFAULT_MODELS)}
+        self.requirements = requirements or CONTENT_TYPE_REQUIREMENTS
+        self.default_latency_budget = default_latency_budget
+        self.min_samples = min_samples
+        self.cooldown_seconds = cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._latency = {name: LatencyHistogram(LATENCY_BUCKETS) for name in self.models}
+        self._token_time = {name: LatencyHistogram(TOKEN_TIME_BUCKETS) for name in self.models}
+        self._failures = {name: 0 for name in self.models}
+        self._cooldown_until = {name: 0.0 for name in self.models}
+
+    @property
+    def default_model(self) -> str:
+        """Fastest model of the lowest quality tier (what short requests get)."""
+        return min(self.models.values(), key=lambda p: (p.quality, p.base_latency)).name
+
+    def predict_latency(self, model: str, output_tokens: int) -> float:
+        """
+        Predict how long a model takes to produce a number of output tokens.
+
+        Uses the profile until enough calls have been observed, then the p90
+        of the model's observed time per output token.
+
+        Args:
+            model: Model name
+            output_tokens: Expected output tokens
+
+        Returns:
+            Predicted latency in seconds
+        """
+        profile = self.models[model]
+        with self._lock:
+            histogram = self._token_time[model]
+            if histogram.count >= self.min_samples:
+                return histogram.quantile(0.9) / 1000 * output_tokens
+        return profile.base_latency + output_tokens / profile.tokens_per_second
+
+    def route(self, content_type: str, prompt_tokens: int, latency_budget: Optional[float] = None) -> RouteDecision:
+        """
+        Pick the models to try for a request.
+
+        Args:
+            content_type: Type of content being generated
+            prompt_tokens: Estimated prompt tokens
+            latency_budget: Seconds the caller is willing to wait (default: router default)
+
+        Returns:
+            RouteDecision with the primary model first, then fallbacks
+        """
+        min_quality, output_tokens = self.requirements.get(content_type, (1, 700))
+        now = time.monotonic()
+
+        fits = [p for p in self.models.values() if p.context_window >= prompt_tokens + output_tokens]
+        if not fits:
+            fits = [max(self.models.values(), key=lambda p: p.context_window)]
+        predicted = {p.name: self.predict_latency(p.name, output_tokens) for p in fits}
+        budget = latency_budget or self.default_latency_budget
+
+        def speed(profile):
+            return (predicted[profile.name], profile.cost_per_1k_tokens)
+
+        available = [p for p in fits if self._cooldown_until[p.name] <= now] or fits
+        good_enough = [p for p in available if p.quality >= min_quality]
+        within_budget = [p for p in good_enough if predicted[p.name] <= budget]
+
+        if within_budget:
+            primary = min(within_budget, key=speed)
+        elif good_enough:
+            primary = min(good_enough, key=speed)
+        else:
+            primary = max(available, key=lambda p: (p.quality, -predicted[p.name]))
+
+        # Fallbacks: models faster than the primary, fastest first
+        fallbacks = sorted(
+            (p for p in available if p.name != primary.name and predicted[p.name] < predicted[primary.name]),
+            key=speed
+        )
+        models = [primary.name] + [p.name for p in fallbacks]
+
+        # Without a caller's budget, give up once the primary is clearly slower than predicted
+        if latency_budget is None:
+            budget = max(budget, 2 * predicted[primary.name])
+
+        # One deadline for the whole request: the primary leaves time for the first
+        # fallback to run, and each fallback gets whatever is left when it starts
+        timeouts = {name: budget for name in models}
+        if fallbacks and predicted[fallbacks[0].name] < budget:
+            timeouts[primary.name] = budget - predicted[fallbacks[0].name]
+        return RouteDecision(models, predicted, timeouts, output_tokens, now + budget)
+
+    def record_success(self, model: str, latency: float, output_tokens: int):
+        """
+        Record a completed call.
+
+        Args:
+            model: Model name
+            latency: Wall-clock seconds the call took
+            output_tokens: Tokens in the response
+        """
+        with self._lock:
+            self._latency[model].observe(latency)
+            self._token_time[model].observe(1000 * latency / max(output_tokens, 1))
+
+    def record_slow(self, model: str, waited: float, output_tokens: int):
+        """
+        Record a call abandoned for being too slow.
+
+        The time waited is recorded as a lower bound of the real latency, so
+        predictions for the model get worse.
+
+        Args:
+            model: Model name
+            waited: Seconds waited before giving up
+            output_tokens: Expected output tokens of the request
+        """
+        self.record_success(model, waited, output_tokens)
+        with self._lock:
+            self._failures[model] += 1
+
+    def record_rate_limited(self, model: str):
+        """Record a rate-limit error and put the model in cool-down."""
+        with self._lock:
+            self._failures[model] += 1
+            self._cooldown_until[model] = time.monotonic() + self.cooldown_seconds
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Get per-model routing statistics.
+
+        Returns:
+            Dictionary mapping model name to call count, latency p50/p95,
+            failure count and whether it's cooling down
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "calls": self._latency[name].count,
+                    "latency_p50": self._latency[name].quantile(0.5),
+                    "latency_p95": self._latency[name].quantile(0.95),
+                    "failures": self._failures[name],
+                    "cooling_down": self._cooldown_until[name] > now
+                }
+                for name in self.models
+            }
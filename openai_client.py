@@ -0,0 +1,442 @@
+"""
+Shared OpenAI Client Layer
+
+This module provides one process-wide HTTP client layer used by every OpenAI
+call (embeddings in RAGSystem and chat completions in PromptEngineer):
+- Pooled keep-alive connections shared by all components
+- A single token bucket limiting requests and tokens per minute
+- Retries with jittered exponential backoff on 429 and 5xx responses
+- A per-request deadline covering all attempts (shortened by a per-call timeout)
+
+Settings are read from environment variables (see ClientSettings.from_env).
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import httpx
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Request header asking the transport not to retry (e.g. when the caller has a
+# fallback model); it's removed before the request is sent
+NO_RETRY_HEADER = "x-client-no-retry"
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Raised when a request (including retries) runs past its deadline."""
+
+
+class ClientSettings:
+    """
+    Settings for the shared client layer.
+
+    Defaults can be overridden with environment variables:
+    OPENAI_RPM, OPENAI_TPM, OPENAI_MAX_RETRIES, OPENAI_REQUEST_DEADLINE,
+    OPENAI_MAX_CONNECTIONS and OPENAI_KEEPALIVE_CONNECTIONS.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 3500,
+        tokens_per_minute: int = 90000,
+        max_retries: int = 4,
+        deadline: float = 60.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0
+    ):
+        """
+        Args:
+            requests_per_minute: Request budget shared by all OpenAI calls
+            tokens_per_minute: Token budget shared by all OpenAI calls
+            max_retries: Retries on 429/5xx or connection errors
+            deadline: Seconds a request may take across all attempts
+            max_connections: Size of the connection pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            backoff_base: First backoff ceiling in seconds (doubles each retry)
+            backoff_max: Largest backoff ceiling in seconds
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @classmethod
+    def from_env(cls) -> "ClientSettings":
+        """Build settings from environment variables, falling back to defaults."""
+        defaults = cls()
+        return cls(
+            requests_per_minute=int(os.getenv("OPENAI_RPM", defaults.requests_per_minute)),
+            tokens_per_minute=int(os.getenv("OPENAI_TPM", defaults.tokens_per_minute)),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", defaults.max_retries)),
+            deadline=float(os.getenv("OPENAI_REQUEST_DEADLINE", defaults.deadline)),
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", defaults.max_connections)),
+            max_keepalive_connections=int(os.getenv("OPENAI_KEEPALIVE_CONNECTIONS", defaults.max_keepalive_connections))
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Get the delay before a retry.
+
+        Uses "full jitter": a random delay up to an exponentially growing ceiling.
+        A Retry-After header from the server is used as the minimum delay.
+
+        Args:
+            attempt: Number of the attempt that just failed (0-based)
+            retry_after: Value of the Retry-After response header, if any
+
+        Returns:
+            Delay in seconds
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+
+class TokenBucket:
+    """
+    Rate limiter for requests per minute and tokens per minute.
+
+    Callers reserve capacity up front and are told how long to wait, so the
+    same bucket works for threads and asyncio tasks. Reservations may drive the
+    bucket negative; later callers then wait for it to refill, in arrival order.
+    A caller that won't wait as long as a reservation needs isn't charged for it.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Args:
+            requests_per_minute: Request capacity refilled each minute
+            tokens_per_minute: Token capacity refilled each minute
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int, max_wait: Optional[float] = None) -> float:
+        """
+        Reserve one request and a number of tokens.
+
+        Args:
+            tokens: Estimated tokens used by the request
+            max_wait: Longest wait the caller accepts; if the reservation would
+                need at least this long, nothing is reserved
+
+        Returns:
+            Seconds the caller must wait before sending the request (when this is
+            at least max_wait, the request must not be sent)
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+            requests = self._requests - 1
+            tokens_left = self._tokens - tokens
+            request_wait = -requests * 60 / self.requests_per_minute if requests < 0 else 0.0
+            token_wait = -tokens_left * 60 / self.tokens_per_minute if tokens_left < 0 else 0.0
+            wait = max(request_wait, token_wait)
+            if max_wait is None or wait < max_wait:
+                self._requests = requests
+                self._tokens = tokens_left
+            return wait
+
+
+def estimate_request_tokens(request: httpx.Request) -> int:
+    """
+    Estimate the tokens an OpenAI request will use.
+
+    Uses roughly four characters per token for the request body, plus
+    `max_tokens` for the completion if the request sets it.
+
+    Args:
+        request: Outgoing HTTP request
+
+    Returns:
+        Estimated token count
+    """
+    body = request.content or b""
+    tokens = len(body) // 4
+    try:
+        payload = json.loads(body) if body else {}
+        if isinstance(payload, dict):
+            tokens += int(payload.get("max_tokens") or payload.get("max_completion_tokens") or 0)
+    except (ValueError, TypeError):
+        pass
+    return max(tokens, 1)
+
+
+def _request_policy(request: httpx.Request, settings: ClientSettings) -> Tuple[float, int]:
+    """
+    Get the deadline and retry limit for a request.
+
+    A per-call timeout (e.g. `timeout=` on an OpenAI SDK call) shortens the
+    deadline, and NO_RETRY_HEADER turns retries off.
+
+    Returns:
+        Tuple of (seconds until the deadline, maximum retries)
+    """
+    timeout = (request.extensions.get("timeout") or {}).get("read")
+    seconds = min(settings.deadline, timeout) if timeout else settings.deadline
+    retries = 0 if request.headers.pop(NO_RETRY_HEADER, None) else settings.max_retries
+    return seconds, retries
+
+
+def _attempt_timeout(remaining: float) -> Dict[str, float]:
+    """Build httpx per-request timeouts so one attempt can't outlive the deadline."""
+    return {"connect": remaining, "read": remaining, "write": remaining, "pool": remaining}
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """httpx transport adding rate limiting, retries and a deadline to a pooled transport."""
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: TokenBucket, settings: ClientSettings):
+        self.transport = transport
+        self.limiter = limiter
+        self.settings = settings
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        seconds, max_retries = _request_policy(request, self.settings)
+        deadline = time.monotonic() + seconds
+        tokens = estimate_request_tokens(request)
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            wait = self.limiter.reserve(tokens, max_wait=remaining)
+            if wait >= remaining:
+                raise DeadlineExceeded("Rate limit wait exceeds request deadline", request=request)
+            if wait:
+                time.sleep(wait)
+
+            request.extensions["timeout"] = _attempt_timeout(deadline - time.monotonic())
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                if attempt >= max_retries:
+                    raise
+                delay = self.settings.backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                    return response
+                delay = self.settings.backoff(attempt, response.headers.get("retry-after"))
+                if time.monotonic() + delay >= deadline:
+                    return response
+                response.close()
+
+            if time.monotonic() + delay >= deadline:
+                raise DeadlineExceeded("Request deadline exceeded while retrying", request=request)
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncResilientTransport(httpx.AsyncBaseTransport):
+    """Async version of ResilientTransport sharing the same token bucket."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: TokenBucket, settings: ClientSettings):
+        self.transport = transport
+        self.limiter = limiter
+        self.settings = settings
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        seconds, max_retries = _request_policy(request, self.settings)
+        deadline = time.monotonic() + seconds
+        tokens = estimate_request_tokens(request)
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            wait = self.limiter.reserve(tokens, max_wait=remaining)
+            if wait >= remaining:
+                raise DeadlineExceeded("Rate limit wait exceeds request deadline", request=request)
+            if wait:
+                await asyncio.sleep(wait)
+
+            request.extensions["timeout"] = _attempt_timeout(deadline - time.monotonic())
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                if attempt >= max_retries:
+                    raise
+                delay = self.settings.backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                    return response
+                delay = self.settings.backoff(attempt, response.headers.get("retry-after"))
+                if time.monotonic() + delay >= deadline:
+                    return response
+                await response.aclose()
+
+            if time.monotonic() + delay >= deadline:
+                raise DeadlineExceeded("Request deadline exceeded while retrying", request=request)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def build_http_client(settings: ClientSettings, limiter: TokenBucket) -> httpx.Client:
+    """
+    Build a pooled HTTP client with rate limiting and retries.
+
+    Args:
+        settings: Client settings
+        limiter: Token bucket to draw from
+
+    Returns:
+        httpx.Client
+    """
+    limits = httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections
+    )
+    transport = ResilientTransport(httpx.HTTPTransport(limits=limits), limiter, settings)
+    return httpx.Client(transport=transport, timeout=settings.deadline)
+
+
+def build_async_http_client(settings: ClientSettings, limiter: TokenBucket) -> httpx.AsyncClient:
+    """
+    Build a pooled async HTTP client with rate limiting and retries.
+
+    Args:
+        settings: Client settings
+        limiter: Token bucket to draw from
+
+    Returns:
+        httpx.AsyncClient
+    """
+    limits = httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections
+    )
+    transport = AsyncResilientTransport(httpx.AsyncHTTPTransport(limits=limits), limiter, settings)
+    return httpx.AsyncClient(transport=transport, timeout=settings.deadline)
+
+
+_lock = threading.RLock()
+_settings: Optional[ClientSettings] = None
+_limiter: Optional[TokenBucket] = None
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+# Clients replaced by configure(); models created earlier still use them
+_retired_clients: List = []
+
+
+def configure(settings: Optional[ClientSettings] = None):
+    """
+    Set up the shared client layer, replacing any existing clients.
+
+    Called automatically with settings from the environment on first use.
+    Models created before a reconfiguration keep working on the clients they
+    were given; those are closed by close().
+
+    Args:
+        settings: Client settings (default: ClientSettings.from_env())
+    """
+    global _settings, _limiter, _http_client, _async_http_client
+    with _lock:
+        if _http_client is not None:
+            _retired_clients.extend([_http_client, _async_http_client])
+        _settings = settings or ClientSettings.from_env()
+        _limiter = TokenBucket(_settings.requests_per_minute, _settings.tokens_per_minute)
+        _http_client = build_http_client(_settings, _limiter)
+        _async_http_client = build_async_http_client(_settings, _limiter)
+
+
+def close():
+    """Close the shared clients, including ones replaced by configure(). Called at exit."""
+    global _http_client, _async_http_client
+    with _lock:
+        clients = _retired_clients + [_http_client, _async_http_client]
+        _retired_clients.clear()
+        _http_client = _async_http_client = None
+    for client in clients:
+        if isinstance(client, httpx.AsyncClient):
+            try:
+                asyncio.run(client.aclose())
+            except RuntimeError:
+                # Called from a running event loop; the loop owns the connections
+                pass
+        elif client is not None:
+            client.close()
+
+
+atexit.register(close)
+
+
+def _ensure_configured():
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                configure()
+
+
+def get_settings() -> ClientSettings:
+    """Get the settings of the shared client layer."""
+    _ensure_configured()
+    return _settings
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Get the process-wide token bucket."""
+    _ensure_configured()
+    return _limiter
+
+
+def get_http_client() -> httpx.Client:
+    """Get the process-wide pooled HTTP client."""
+    _ensure_configured()
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled async HTTP client."""
+    _ensure_configured()
+    return _async_http_client
+
+
+def langchain_client_kwargs() -> Dict:
+    """
+    Get keyword arguments that make a LangChain OpenAI model use the shared layer.
+
+    Retries are handled by the shared transport, so the OpenAI SDK's own
+    retries are turned off.
+
+    Returns:
+        Dictionary of keyword arguments for ChatOpenAI / OpenAIEmbeddings
+    """
+    _ensure_configured()
+    return {
+        "http_client": _http_client,
+        "http_async_client": _async_http_client,
+        "max_retries": 0,
+        "timeout": _settings.deadline
+    }
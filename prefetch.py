@@ -0,0 +1,201 @@
+"""
+Speculative Retrieval Prefetch
+
+This module runs knowledge base retrieval in the background while the user is
+still filling in the form, so that it is already done when they submit:
+- Prefetches start once the topic has settled (no change for a short delay)
+- A newer topic cancels the same caller's pending prefetch of the previous one
+  (callers, e.g. user sessions, sharing one prefetcher don't cancel each other's)
+- Results are kept per normalized topic for a limited time
+- Submitting before a prefetch has started simply runs it right away
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+
+
+class _Prefetch:
+    """One scheduled or finished retrieval."""
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.timer: Optional[threading.Timer] = None
+        self.created = time.monotonic()
+        self.started = False
+
+
+class RetrievalPrefetcher:
+    """
+    Background retrieval keyed by topic.
+
+    `schedule()` is called as the topic changes; `get()` is called when the
+    request is submitted and returns the prefetched documents (waiting for an
+    in-flight prefetch if needed), or None if there is nothing to reuse.
+    """
+
+    def __init__(
+        self,
+        retrieve: Callable[[str, int], List[Document]],
+        settle_seconds: float = 0.4,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 32
+    ):
+        """
+        Args:
+            retrieve: Function doing the retrieval, called as retrieve(query, k)
+            settle_seconds: How long the topic must stay unchanged before prefetching
+            ttl_seconds: How long a prefetched result can be reused
+            max_entries: Maximum number of topics kept
+        """
+        self.retrieve = retrieve
+        self.settle_seconds = settle_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], _Prefetch]" = OrderedDict()
+        # Caller -> key of its prefetch that may still be cancelled
+        self._pending: Dict[Optional[str], Tuple[str, int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+
+    @staticmethod
+    def _key(query: str, k: int) -> Tuple[str, int]:
+        return " ".join(query.lower().split()), k
+
+    def _expired(self, entry: _Prefetch) -> bool:
+        return time.monotonic() - entry.created > self.ttl_seconds
+
+    def _cancel(self, key: Tuple[str, int]):
+        """Cancel a prefetch that hasn't started yet, unless another caller still wants it (caller holds the lock)."""
+        entry = self._entries.get(key)
+        if entry is None or key in self._pending.values():
+            return
+        if entry.timer is not None:
+            entry.timer.cancel()
+        if entry.future.cancel():
+            del self._entries[key]
+            self.cancelled += 1
+
+    def _run(self, entry: _Prefetch, query: str, k: int):
+        """Run the retrieval for an entry unless it was cancelled or already started."""
+        with self._lock:
+            if entry.started:
+                return
+            entry.started = True
+        if not entry.future.set_running_or_notify_cancel():
+            return
+        try:
+            entry.future.set_result(self.retrieve(query, k))
+        except Exception as e:
+            entry.future.set_exception(e)
+
+    def schedule(self, query: str, k: int = 5, caller: Optional[str] = None):
+        """
+        Prefetch context for a topic once it has settled.
+
+        Args:
+            query: Topic as currently typed
+            k: Number of documents to retrieve
+            caller: Who is typing (e.g. a session id); a caller's newer topic
+                cancels only its own pending prefetch
+        """
+        key = self._key(query, k)
+        if not key[0]:
+            return
+
+        with self._lock:
+            previous = self._pending.pop(caller, None)
+            if previous is not None and previous != key:
+                self._cancel(previous)
+            self._pending[caller] = key
+            if len(self._pending) > self.max_entries:
+                # Forget callers whose prefetch has started or been dropped
+                self._pending = {
+                    c: pending for c, pending in self._pending.items()
+                    if pending in self._entries and not self._entries[pending].started
+                }
+
+            existing = self._entries.get(key)
+            if existing is not None and not self._expired(existing) and not existing.future.cancelled():
+                self._entries.move_to_end(key)
+                return
+
+            entry = _Prefetch()
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                _, oldest = self._entries.popitem(last=False)
+                if oldest.timer is not None:
+                    oldest.timer.cancel()
+                oldest.future.cancel()
+
+            entry.timer = threading.Timer(self.settle_seconds, self._run, args=(entry, query, k))
+            entry.timer.daemon = True
+            entry.timer.start()
+
+    def get(self, query: str, k: int = 5) -> Optional[List[Document]]:
+        """
+        Get prefetched documents for a topic.
+
+        If the prefetch is still waiting for the topic to settle it is started
+        immediately; if it's running, this waits for it.
+
+        Args:
+            query: Topic being submitted
+            k: Number of documents to retrieve
+
+        Returns:
+            List of Document objects, or None if there was no usable prefetch
+        """
+        key = self._key(query, k)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                self.misses += 1
+                return None
+            # Started prefetches can't be cancelled any more
+            self._pending = {c: pending for c, pending in self._pending.items() if pending != key}
+
+        if entry.timer is not None:
+            entry.timer.cancel()
+        self._run(entry, query, k)
+
+        try:
+            documents = entry.future.result()
+        except (CancelledError, Exception):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return documents
+
+    def invalidate(self):
+        """Drop all prefetched results (e.g. after the knowledge base changed)."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.timer is not None:
+                    entry.timer.cancel()
+                entry.future.cancel()
+            self._entries.clear()
+            self._pending.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get prefetch counters.
+
+        Returns:
+            Dictionary with hits, misses, cancelled prefetches and cached topics
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cancelled": self.cancelled,
+                "entries": len(self._entries)
+            }
@@ -2,17 +2,50 @@
 Prompt Engineering Module
 
 This module handles prompt creation and management for different content types.
-It integrates with OpenAI's API to generate educational content using:
+It integrates with OpenAI's API (through the shared client layer in
+openai_client.py) to generate educational content using:
 - Systematic prompting strategies
 - Context management from RAG system
 - Specialized prompts for different content types
 - Edge case handling and validation
+- Single-flight coalescing of identical in-flight requests
+- Per-request model routing by content type, size and latency budget
+- Lesson packs: several content types from one retrieval, generated in parallel
+- Map-reduce generation over a whole document for summaries and study guides
 """
 
-from typing import Dict, Optional
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+import openai
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 import os
+import openai_client
+from model_router import ModelRouter, RouteDecision, estimate_tokens
+from singleflight import SingleFlight
+
+# Shared by every PromptEngineer in the process so identical requests from
+# different sessions are coalesced too
+_default_single_flight = SingleFlight()
+
+GENERATION_ERROR_PREFIX = "Error generating content:"
+
+# Instructions for the map and reduce steps of document-scale generation
+MAP_REQUIREMENTS = (
+    "Summarize only this section of the document. Keep key terms, definitions, "
+    "formulas and examples; leave out anything that isn't in the context."
+)
+REDUCE_REQUIREMENTS = (
+    "The context contains summaries of consecutive sections of one document. "
+    "Merge them into a single summary in document order, keeping every key point "
+    "and removing repetition."
+)
 
 
 class PromptEngineer:
@@ -23,20 +56,52 @@ class PromptEngineer:
     using OpenAI's language models.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-3.5-turbo"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        single_flight: Optional[SingleFlight] = None,
+        router: Optional[ModelRouter] = None
+    ):
         """
         Initialize Prompt Engineer with OpenAI API.
         
         Args:
             api_key: OpenAI API key (optional, can use env var)
-            model: Model name to use (default: gpt-3.5-turbo)
+            model: Model name to use for every request. If not set, a model is
+                picked per request by the router.
+            single_flight: Coalescer for identical in-flight requests (default: process-wide)
+            router: Model router to use when no model is pinned (default: ModelRouter())
         """
-        self.llm = ChatOpenAI(
-            openai_api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        # Part of every request key, so engineers with different keys don't share results
+        self._api_key_hash = hashlib.sha256((self.api_key or "").encode("utf-8")).hexdigest()
+        self.router = None if model else (router or ModelRouter())
+        self.model = model or self.router.default_model
+        self.llm = self._create_llm(self.model)
+        self._llms: Dict[str, ChatOpenAI] = {}
+        self._llms_lock = threading.Lock()
+        self.single_flight = single_flight or _default_single_flight
+        self._map_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._map_cache_lock = threading.Lock()
+        self.map_cache_size = 1024
+    
+    def _create_llm(self, model: str) -> ChatOpenAI:
+        return ChatOpenAI(
+            openai_api_key=self.api_key,
             model=model,
-            temperature=0.7
+            temperature=0.7,
+            **openai_client.langchain_client_kwargs()
         )
-        self.model = model
+    
+    def _llm_for(self, model: str):
+        """Get the chat model client for a model name, creating it on first use."""
+        if model == self.model:
+            return self.llm
+        with self._llms_lock:
+            if model not in self._llms:
+                self._llms[model] = self._create_llm(model)
+            return self._llms[model]
     
     def _get_base_system_prompt(self) -> str:
         """
@@ -103,15 +168,36 @@ class PromptEngineer:
             Problems should be practical and help build understanding."""
         }
     
-    def generate_content(
+    def _fingerprint(self, *parts) -> str:
+        """
+        Build a key identifying a request, used to coalesce identical ones.
+        
+        The key covers the API key (hashed) and the models that may answer,
+        since the single-flight group is shared by every engineer in the process.
+        
+        Args:
+            *parts: JSON-serializable values that determine the request
+            
+        Returns:
+            Hex digest of the API key, model settings and the given parts
+        """
+        models = ["routed", *sorted(self.router.models)] if self.router else [self.model]
+        payload = json.dumps(
+            [self._api_key_hash, models, getattr(self.llm, "temperature", None), *parts],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _build_messages(
         self,
         content_type: str,
         topic: str,
         context: Optional[str] = None,
         additional_requirements: Optional[str] = None
-    ) -> str:
+    ) -> List[BaseMessage]:
         """
-        Generate educational content for a given topic.
+        Build the system and user messages for a content request.
         
         Args:
             content_type: Type of content (study_guide, quiz, explanation, etc.)
@@ -120,7 +206,7 @@ class PromptEngineer:
             additional_requirements: Optional additional requirements from user
             
         Returns:
-            Generated content as string, or error message if generation fails
+            List of messages to send to the model
         """
         system_prompt = self._get_base_system_prompt()
         
@@ -144,52 +230,564 @@ Topic: {topic}{context_section}{requirements_section}
 
 Generate the content now:"""
         
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=full_prompt)
+        ]
+    
+    def _messages_key(self, messages: List[BaseMessage], content_type: str, latency_budget: Optional[float] = None) -> str:
+        """Fingerprint the full prompt (and what the model is routed on)."""
+        return self._fingerprint("prompt", [(m.type, m.content) for m in messages], content_type, latency_budget)
+    
+    def _route(self, messages: List[BaseMessage], content_type: str, latency_budget: Optional[float]) -> RouteDecision:
+        prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+        return self.router.route(content_type, prompt_tokens, latency_budget)
+    
+    @staticmethod
+    def _output_tokens(response) -> int:
+        usage = getattr(response, "usage_metadata", None) or {}
+        return usage.get("output_tokens") or estimate_tokens(response.content)
+    
+    @staticmethod
+    def _call_options(decision: RouteDecision, index: int, timeout: float) -> Dict:
+        """
+        Per-call options for the index-th model of a routing decision.
+        
+        The timeout applies to the HTTP request itself, so a slow call is
+        aborted rather than left running. Models with a fallback aren't
+        retried when rate limited; the fallback is tried at once instead.
+        """
+        options = {"timeout": timeout}
+        if index < len(decision.models) - 1:
+            options["extra_headers"] = {openai_client.NO_RETRY_HEADER: "1"}
+        return options
+    
+    def _invoke_routed(self, messages: List[BaseMessage], content_type: str, latency_budget: Optional[float]):
+        """
+        Call the routed models in order until one answers.
+        
+        A model is skipped for the next one when it's rate limited or doesn't
+        answer within its timeout; the outcome is fed back to the router. No
+        model is started once the request's deadline has passed.
+        """
+        decision = self._route(messages, content_type, latency_budget)
+        last_error: Exception = None
+        for i, model in enumerate(decision.models):
+            timeout = decision.time_left(model)
+            if timeout <= 0:
+                break
+            llm = self._llm_for(model)
+            start = time.monotonic()
+            try:
+                response = llm.invoke(messages, **self._call_options(decision, i, timeout))
+            except openai.APITimeoutError as e:
+                self.router.record_slow(model, time.monotonic() - start, decision.output_tokens)
+                last_error = e
+                continue
+            except openai.RateLimitError as e:
+                self.router.record_rate_limited(model)
+                last_error = e
+                continue
+            self.router.record_success(model, time.monotonic() - start, self._output_tokens(response))
+            return response
+        raise last_error
+    
+    async def _ainvoke_routed(self, messages: List[BaseMessage], content_type: str, latency_budget: Optional[float]):
+        """Async version of _invoke_routed()."""
+        decision = self._route(messages, content_type, latency_budget)
+        last_error: Exception = None
+        for i, model in enumerate(decision.models):
+            timeout = decision.time_left(model)
+            if timeout <= 0:
+                break
+            llm = self._llm_for(model)
+            start = time.monotonic()
+            try:
+                response = await llm.ainvoke(messages, **self._call_options(decision, i, timeout))
+            except openai.APITimeoutError as e:
+                self.router.record_slow(model, time.monotonic() - start, decision.output_tokens)
+                last_error = e
+                continue
+            except openai.RateLimitError as e:
+                self.router.record_rate_limited(model)
+                last_error = e
+                continue
+            self.router.record_success(model, time.monotonic() - start, self._output_tokens(response))
+            return response
+        raise last_error
+    
+    def _invoke(self, messages: List[BaseMessage], content_type: str, latency_budget: Optional[float] = None) -> str:
         try:
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=full_prompt)
-            ]
-            
-            response = self.llm.invoke(messages)
+            if self.router is None:
+                response = self.llm.invoke(messages)
+            else:
+                response = self._invoke_routed(messages, content_type, latency_budget)
+            return response.content
+        except Exception as e:
+            return f"{GENERATION_ERROR_PREFIX} {str(e)}. Please check your API key and try again."
+    
+    async def _ainvoke(self, messages: List[BaseMessage], content_type: str, latency_budget: Optional[float] = None) -> str:
+        try:
+            if self.router is None:
+                response = await self.llm.ainvoke(messages)
+            else:
+                response = await self._ainvoke_routed(messages, content_type, latency_budget)
             return response.content
-            
         except Exception as e:
-            return f"Error generating content: {str(e)}. Please check your API key and try again."
+            return f"{GENERATION_ERROR_PREFIX} {str(e)}. Please check your API key and try again."
+    
+    def _stream_llm(self, messages: List[BaseMessage], content_type: str):
+        """Get the model to stream from (the routed primary; streams don't fall back)."""
+        if self.router is None:
+            return self.llm
+        return self._llm_for(self._route(messages, content_type, None).primary)
+    
+    def generate_content(
+        self,
+        content_type: str,
+        topic: str,
+        context: Optional[str] = None,
+        additional_requirements: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> str:
+        """
+        Generate educational content for a given topic.
+        
+        Identical requests already in flight are not sent again; they share
+        the running call's result.
+        
+        Args:
+            content_type: Type of content (study_guide, quiz, explanation, etc.)
+            topic: Topic or subject to generate content about
+            context: Optional RAG context to include
+            additional_requirements: Optional additional requirements from user
+            latency_budget: Seconds the caller is willing to wait, used for model routing
+            
+        Returns:
+            Generated content as string, or error message if generation fails
+            (after the shared client layer has retried rate limits and server errors)
+        """
+        messages = self._build_messages(content_type, topic, context, additional_requirements)
+        key = self._messages_key(messages, content_type, latency_budget)
+        return self.single_flight.do(key, lambda: self._invoke(messages, content_type, latency_budget))
+    
+    async def agenerate_content(
+        self,
+        content_type: str,
+        topic: str,
+        context: Optional[str] = None,
+        additional_requirements: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> str:
+        """
+        Async version of generate_content(). Coalesces with threaded callers too.
+        
+        Args:
+            content_type: Type of content (study_guide, quiz, explanation, etc.)
+            topic: Topic or subject to generate content about
+            context: Optional RAG context to include
+            additional_requirements: Optional additional requirements from user
+            latency_budget: Seconds the caller is willing to wait, used for model routing
+            
+        Returns:
+            Generated content as string, or error message if generation fails
+        """
+        messages = self._build_messages(content_type, topic, context, additional_requirements)
+        key = self._messages_key(messages, content_type, latency_budget)
+        return await self.single_flight.ado(key, lambda: self._ainvoke(messages, content_type, latency_budget))
+    
+    def stream_content(
+        self,
+        content_type: str,
+        topic: str,
+        context: Optional[str] = None,
+        additional_requirements: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Generate educational content as a stream of text chunks.
+        
+        Identical requests already streaming share the same token stream;
+        late joiners first receive the chunks produced so far.
+        
+        Args:
+            content_type: Type of content (study_guide, quiz, explanation, etc.)
+            topic: Topic or subject to generate content about
+            context: Optional RAG context to include
+            additional_requirements: Optional additional requirements from user
+            
+        Yields:
+            Chunks of generated text
+        """
+        messages = self._build_messages(content_type, topic, context, additional_requirements)
+        key = "stream:" + self._messages_key(messages, content_type)
+        llm = self._stream_llm(messages, content_type)
+        yield from self.single_flight.stream(key, lambda: (chunk.content for chunk in llm.stream(messages)))
+    
+    async def astream_content(
+        self,
+        content_type: str,
+        topic: str,
+        context: Optional[str] = None,
+        additional_requirements: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Async version of stream_content().
+        
+        Args:
+            content_type: Type of content (study_guide, quiz, explanation, etc.)
+            topic: Topic or subject to generate content about
+            context: Optional RAG context to include
+            additional_requirements: Optional additional requirements from user
+            
+        Yields:
+            Chunks of generated text
+        """
+        messages = self._build_messages(content_type, topic, context, additional_requirements)
+        key = "stream:" + self._messages_key(messages, content_type)
+        llm = self._stream_llm(messages, content_type)
+        async for chunk in self.single_flight.astream(key, lambda: (chunk.content for chunk in llm.stream(messages))):
+            yield chunk
+    
+    def _rag_key(
+        self,
+        content_type: str,
+        topic: str,
+        rag_system,
+        additional_requirements: Optional[str],
+        k: int,
+        latency_budget: Optional[float]
+    ) -> str:
+        """Fingerprint a RAG request, including which knowledge base it reads from."""
+        knowledge_base = getattr(rag_system, "persist_directory", None) or id(rag_system)
+        return self._fingerprint("rag", content_type, topic, additional_requirements, k, knowledge_base, latency_budget)
+    
+    @staticmethod
+    def _retrieve_context(rag_system, topic: str, k: int) -> Dict:
+        """
+        Get context for a topic from a RAG system.
+        
+        Returns:
+            Dictionary with the context string, plus compression statistics if
+            the RAG system compresses context
+        """
+        if hasattr(rag_system, "get_context"):
+            return rag_system.get_context(topic, k)
+        return {"context": rag_system.get_context_string(topic, k=k)}
+    
+    @staticmethod
+    def _compression_stats(retrieved: Dict) -> Optional[Dict]:
+        if "compression_ratio" not in retrieved:
+            return None
+        return {key: retrieved[key] for key in ("original_tokens", "context_tokens", "compression_ratio")}
     
     def generate_with_rag(
         self,
         content_type: str,
         topic: str,
         rag_system,
-        additional_requirements: Optional[str] = None
+        additional_requirements: Optional[str] = None,
+        latency_budget: Optional[float] = None
     ) -> Dict[str, str]:
         """
         Generate content using RAG system to retrieve relevant context.
         
+        Identical requests already in flight share one retrieval and one LLM call.
+        
         Args:
             content_type: Type of content to generate
             topic: Topic or subject
             rag_system: RAGSystem instance to retrieve context
             additional_requirements: Optional additional requirements
+            latency_budget: Seconds the caller is willing to wait, used for model routing
             
         Returns:
-            Dictionary with generated content, context used, content type, and topic
+            Dictionary with generated content, context used, content type, topic,
+            and context compression statistics (None if context isn't compressed)
         """
-        context = rag_system.get_context_string(topic, k=5)
+        def run():
+            retrieved = self._retrieve_context(rag_system, topic, 5)
+            context = retrieved["context"]
+            
+            content = self.generate_content(
+                content_type=content_type,
+                topic=topic,
+                context=context,
+                additional_requirements=additional_requirements,
+                latency_budget=latency_budget
+            )
+            
+            return {
+                "content": content,
+                "context_used": context,
+                "content_type": content_type,
+                "topic": topic,
+                "compression": self._compression_stats(retrieved)
+            }
         
-        content = self.generate_content(
-            content_type=content_type,
-            topic=topic,
-            context=context,
-            additional_requirements=additional_requirements
-        )
+        key = self._rag_key(content_type, topic, rag_system, additional_requirements, 5, latency_budget)
+        return dict(self.single_flight.do(key, run))
+    
+    async def agenerate_with_rag(
+        self,
+        content_type: str,
+        topic: str,
+        rag_system,
+        additional_requirements: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> Dict[str, str]:
+        """
+        Async version of generate_with_rag(). Retrieval runs in a worker thread.
         
-        return {
-            "content": content,
-            "context_used": context,
+        Args:
+            content_type: Type of content to generate
+            topic: Topic or subject
+            rag_system: RAGSystem instance to retrieve context
+            additional_requirements: Optional additional requirements
+            latency_budget: Seconds the caller is willing to wait, used for model routing
+            
+        Returns:
+            Dictionary with generated content, context used, content type, topic,
+            and context compression statistics (None if context isn't compressed)
+        """
+        async def run():
+            retrieved = await asyncio.to_thread(self._retrieve_context, rag_system, topic, 5)
+            context = retrieved["context"]
+            
+            content = await self.agenerate_content(
+                content_type=content_type,
+                topic=topic,
+                context=context,
+                additional_requirements=additional_requirements,
+                latency_budget=latency_budget
+            )
+            
+            return {
+                "content": content,
+                "context_used": context,
+                "content_type": content_type,
+                "topic": topic,
+                "compression": self._compression_stats(retrieved)
+            }
+        
+        key = self._rag_key(content_type, topic, rag_system, additional_requirements, 5, latency_budget)
+        return dict(await self.single_flight.ado(key, run))
+    
+    def generate_bundle(
+        self,
+        topic: str,
+        content_types: List[str],
+        rag_system=None,
+        additional_requirements: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Generate several content types for one topic (e.g. a lesson pack).
+        
+        Context is retrieved once and shared by all content types, then the
+        generations run concurrently, so the whole pack takes about as long as
+        the slowest single generation.
+        
+        Args:
+            topic: Topic or subject
+            content_types: Content types to generate (duplicates are ignored)
+            rag_system: RAGSystem instance to retrieve context (None to skip RAG)
+            additional_requirements: Optional additional requirements
+            latency_budget: Seconds the caller is willing to wait, used for model routing
+            
+        Yields:
+            One dictionary per content type, in the order they finish, with
+            generated content, context used, content type, topic, and context
+            compression statistics
+        """
+        content_types = list(dict.fromkeys(content_types))
+        if not content_types:
+            return
+        
+        retrieved = self._retrieve_context(rag_system, topic, 5) if rag_system is not None else {"context": None}
+        context = retrieved["context"]
+        compression = self._compression_stats(retrieved)
+        
+        def generate(content_type):
+            return self.generate_content(
+                content_type=content_type,
+                topic=topic,
+                context=context,
+                additional_requirements=additional_requirements,
+                latency_budget=latency_budget
+            )
+        
+        with ThreadPoolExecutor(max_workers=len(content_types), thread_name_prefix="bundle") as pool:
+            futures = {pool.submit(generate, content_type): content_type for content_type in content_types}
+            for future in as_completed(futures):
+                yield {
+                    "content": future.result(),
+                    "context_used": context,
+                    "content_type": futures[future],
+                    "topic": topic,
+                    "compression": compression
+                }
+    
+    @staticmethod
+    def _group_by_tokens(texts: List[str], max_tokens: int) -> List[List[str]]:
+        """Split texts into consecutive groups of at most max_tokens (estimated) each."""
+        groups, current, used = [], [], 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if current and used + tokens > max_tokens:
+                groups.append(current)
+                current, used = [], 0
+            current.append(text)
+            used += tokens
+        if current:
+            groups.append(current)
+        return groups
+    
+    def _summarize_group(self, title: str, texts: List[str], requirements: str, cache: bool) -> str:
+        """Summarize one group of texts (a map or intermediate reduce step)."""
+        context = "\n\n".join(texts)
+        key = self._fingerprint("map", title, requirements, hashlib.sha256(context.encode("utf-8")).hexdigest())
+        if cache:
+            with self._map_cache_lock:
+                if key in self._map_cache:
+                    self._map_cache.move_to_end(key)
+                    return self._map_cache[key]
+        
+        summary = self.generate_content("summary", title, context=context, additional_requirements=requirements)
+        if cache and not summary.startswith(GENERATION_ERROR_PREFIX):
+            with self._map_cache_lock:
+                self._map_cache[key] = summary
+                while len(self._map_cache) > self.map_cache_size:
+                    self._map_cache.popitem(last=False)
+        return summary
+    
+    def _run_level(
+        self,
+        title: str,
+        groups: List[List[str]],
+        requirements: str,
+        stage: str,
+        max_workers: int,
+        progress: Optional[Callable[[str, int, int], None]]
+    ) -> List[str]:
+        """Summarize groups concurrently, keeping their order. Raises on the first failed call."""
+        results: List[Optional[str]] = [None] * len(groups)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(groups)), thread_name_prefix=stage) as pool:
+            futures = {
+                pool.submit(self._summarize_group, title, group, requirements, stage == "map"): i
+                for i, group in enumerate(groups)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                summary = future.result()
+                if summary.startswith(GENERATION_ERROR_PREFIX):
+                    for pending in futures:
+                        pending.cancel()
+                    raise RuntimeError(summary)
+                results[futures[future]] = summary
+                if progress:
+                    progress(stage, done, len(groups))
+        return results
+    
+    def generate_from_document(
+        self,
+        source: str,
+        rag_system,
+        content_type: str = "summary",
+        topic: Optional[str] = None,
+        additional_requirements: Optional[str] = None,
+        group_tokens: int = 3000,
+        max_workers: int = 4,
+        progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> Dict:
+        """
+        Generate content from a whole document with map-reduce.
+        
+        The document's chunks are grouped into sections that fit in a prompt and
+        summarized concurrently (map); the section summaries are then merged
+        level by level until they fit in one prompt (reduce), which produces the
+        requested content type. Section summaries are cached by the hash of
+        their text, so regenerating from the same document skips the map calls.
+        
+        Args:
+            source: Source of the document in the knowledge base (see RAGSystem.list_sources())
+            rag_system: RAGSystem instance holding the document
+            content_type: Type of content to generate (e.g. summary, study_guide)
+            topic: Topic or title (default: the document's file name)
+            additional_requirements: Optional additional requirements for the final content
+            group_tokens: Maximum tokens of text summarized per call
+            max_workers: Maximum concurrent model calls
+            progress: Called as progress(stage, done, total) after each call, with
+                stage "map" or "reduce", from the calling thread
+            
+        Returns:
+            Dictionary with generated content, content type, topic, source, and the
+            numbers of chunks, sections and reduce levels
+        """
+        topic = topic or os.path.basename(source)
+        result = {
+            "content": "",
+            "context_used": None,
             "content_type": content_type,
-            "topic": topic
+            "topic": topic,
+            "compression": None,
+            "source": source,
+            "chunks": 0,
+            "sections": 0,
+            "reduce_levels": 0
         }
+        
+        chunks = rag_system.get_source_chunks(source)
+        if not chunks:
+            result["content"] = f"No content found in the knowledge base for {source}."
+            return result
+        result["chunks"] = len(chunks)
+        
+        try:
+            groups = self._group_by_tokens([chunk.page_content for chunk in chunks], group_tokens)
+            result["sections"] = len(groups)
+            summaries = self._run_level(topic, groups, MAP_REQUIREMENTS, "map", max_workers, progress)
+            
+            while len(summaries) > 1 and estimate_tokens("\n\n".join(summaries)) > group_tokens:
+                groups = self._group_by_tokens(summaries, group_tokens)
+                if len(groups) == len(summaries):
+                    # Summaries too long to combine further; merge pairs so the level shrinks
+                    groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+                summaries = self._run_level(topic, groups, REDUCE_REQUIREMENTS, "reduce", max_workers, progress)
+                result["reduce_levels"] += 1
+        except RuntimeError as e:
+            result["content"] = str(e)
+            return result
+        
+        requirements = REDUCE_REQUIREMENTS if len(summaries) > 1 else "The context summarizes the whole document."
+        if additional_requirements:
+            requirements = f"{requirements}\n{additional_requirements}"
+        result["content"] = self.generate_content(
+            content_type,
+            topic,
+            context="\n\n".join(summaries),
+            additional_requirements=requirements
+        )
+        result["reduce_levels"] += 1
+        if progress:
+            progress("reduce", 1, 1)
+        return result
+    
+    def get_routing_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-model routing statistics (empty when a model is pinned).
+        
+        Returns:
+            Dictionary mapping model name to call count, latency p50/p95 and failures
+        """
+        return self.router.stats() if self.router else {}
+    
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        """
+        Get single-flight counters.
+        
+        Returns:
+            Dictionary with executed, coalesced and in-flight request counts
+        """
+        return self.single_flight.stats()
     
     def handle_edge_cases(self, user_input: str) -> Optional[str]:
         """
@@ -3,24 +3,102 @@ RAG (Retrieval-Augmented Generation) System
 
 This module implements a RAG system for document storage and retrieval using:
 - ChromaDB for vector storage
-- OpenAI embeddings for text vectorization
-- LangChain for document processing and chunking
+- OpenAI embeddings for text vectorization (through the shared client layer)
+- LangChain for document processing
+- A streaming token-aware splitter for chunking
 
 The system allows users to:
 - Load documents (PDF and TXT files)
 - Split documents into chunks
 - Create embeddings and store in vector database
 - Retrieve relevant context based on queries
+- Optionally re-rank over-fetched candidates with a local cross-encoder
+- Optionally compress context to the sentences most relevant to the query
+- Skip near-duplicate chunks at ingest, linking their sources to the stored copy
+- Use a shared vector store server instead of a local store (client/server mode)
+- Prefetch context in the background before a request is submitted
+- Export/import snapshots with precomputed embeddings for fast cold start
+- Configure the vector index (distance metric and HNSW parameters)
 """
 
+import json
 import os
 import shutil
-from typing import List, Dict, Optional
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Dict, Optional, Tuple
+import numpy as np
+import chromadb
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from text_splitter import StreamingTokenSplitter
+from prefetch import RetrievalPrefetcher
+from reranker import CrossEncoderReranker
+from context_compressor import ContextCompressor
+from dedup import DEFAULT_THRESHOLD, NearDuplicateIndex
+import openai_client
+import vector_store_client
+
+try:
+    from chromadb.errors import NotFoundError as CollectionNotFoundError
+except ImportError:
+    # Older chromadb versions raise ValueError for a missing collection
+    CollectionNotFoundError = ValueError
+
+SNAPSHOT_FORMAT = "rag-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Vector index settings and the Chroma collection metadata keys they map to
+INDEX_SETTINGS = {
+    "space": "hnsw:space",
+    "M": "hnsw:M",
+    "construction_ef": "hnsw:construction_ef",
+    "search_ef": "hnsw:search_ef"
+}
+COLLECTION_NAME = "langchain"
+INDEX_CONFIG_FILE = "index_config.json"
+DEDUP_INDEX_FILE = "dedup_index.npz"
+
+# Client/server mode: how far back (in seconds) before the last sync a worker
+# looks for chunks other workers ingested, covering clock skew and slow writes
+SYNC_MARGIN_SECONDS = 60.0
+
+
+def read_index_config(persist_directory: str) -> Dict[str, Any]:
+    """
+    Read the index configuration saved in a vector store directory.
+    
+    Args:
+        persist_directory: Vector store directory
+        
+    Returns:
+        Configuration dictionary, or an empty dictionary if there is none
+    """
+    path = os.path.join(persist_directory, INDEX_CONFIG_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_index_config(persist_directory: str, config: Dict[str, Any]):
+    """
+    Save an index configuration in a vector store directory.
+    
+    RAGSystem uses it for collections created in that directory.
+    
+    Args:
+        persist_directory: Vector store directory
+        config: Index settings (see INDEX_SETTINGS), plus any extra information
+    """
+    os.makedirs(persist_directory, exist_ok=True)
+    with open(os.path.join(persist_directory, INDEX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
 
 
 class RAGSystem:
@@ -31,53 +109,359 @@ class RAGSystem:
     Uses ChromaDB for persistent vector storage.
     """
     
-    def __init__(self, persist_directory: str = "./vector_store", api_key: Optional[str] = None):
+    def __init__(
+        self,
+        persist_directory: str = "./vector_store",
+        api_key: Optional[str] = None,
+        chunk_size: int = 256,
+        chunk_overlap: int = 50,
+        embeddings: Optional[Embeddings] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        index_settings: Optional[Dict[str, Any]] = None,
+        compressor: Optional[ContextCompressor] = None,
+        dedup_threshold: Optional[float] = DEFAULT_THRESHOLD,
+        vector_store_url: Optional[str] = None
+    ):
         """
         Initialize RAG system with vector store and embeddings.
         
         Args:
             persist_directory: Directory to store vector database
             api_key: OpenAI API key for embeddings (optional, can use env var)
+            chunk_size: Maximum chunk size in tokens (default: 256, about 1000 characters)
+            chunk_overlap: Overlap between consecutive chunks in tokens (default: 50)
+            embeddings: Embedding model to use instead of OpenAI embeddings (e.g. a local model)
+            reranker: Cross-encoder re-ranker applied to retrieved candidates (default: none)
+            index_settings: Vector index settings: "space" ("l2", "cosine" or "ip"), "M",
+                "construction_ef" and "search_ef". Defaults to the settings saved in
+                persist_directory by tune_index.py, then Chroma's defaults. They apply
+                when the collection is created; use rebuild_index() to change them.
+                The index_settings attribute holds the settings of the open collection.
+            compressor: Context compressor applied in get_context() (default: none)
+            dedup_threshold: Estimated Jaccard similarity above which a new chunk is a
+                near-duplicate of a stored one and is not added (None to store every chunk)
+            vector_store_url: URL of a vector store server (see vector_store_server.py) to
+                use instead of a local store in persist_directory (default: VECTOR_STORE_URL
+                env var). persist_directory then only holds local settings.
+            
+        Raises:
+            ValueError: If index_settings has an unknown key
         """
         self.persist_directory = persist_directory
         os.makedirs(persist_directory, exist_ok=True)
+        self.vector_store_url = vector_store_url or os.getenv("VECTOR_STORE_URL") or None
         
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=api_key or os.getenv("OPENAI_API_KEY")
+        self.embeddings = embeddings or OpenAIEmbeddings(
+            openai_api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            **openai_client.langchain_client_kwargs()
         )
         
-        # Text chunking settings
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+        # Text chunking settings (sizes are in tokens)
+        self.text_splitter = StreamingTokenSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
         
+        self.reranker = reranker
+        self.compressor = compressor
+        
+        saved = read_index_config(persist_directory)
+        unknown = set(index_settings or {}) - set(INDEX_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown index settings: {', '.join(sorted(unknown))}")
+        # Settings for new collections; an existing collection keeps the ones it was created with
+        self._new_index_settings = {key: saved[key] for key in INDEX_SETTINGS if key in saved}
+        self._new_index_settings.update(index_settings or {})
+        self.index_settings: Dict[str, Any] = {}
+        
         self.vector_store = None
         self._initialize_vector_store()
+        
+        self.prefetcher = RetrievalPrefetcher(self.retrieve_relevant_context)
+        
+        # Source -> ids of its chunks, built on first use (see _source_index())
+        self._sources: Optional[Dict[str, List[str]]] = None
+        self._sources_count: Optional[int] = None
+        self._sources_lock = threading.Lock()
+        
+        self._ingest_lock = threading.Lock()
+        # Client/server mode: when the near-duplicate index was last synced, and
+        # the knowledge base generation (changed by clearing) it was synced with
+        self._synced_at = 0.0
+        self._synced_generation: Optional[str] = None
+        self.dedup_index = None
+        if dedup_threshold is not None:
+            self.dedup_index = NearDuplicateIndex(threshold=dedup_threshold)
+            if self.vector_store_url:
+                # Other workers write to the same server, so the index is built from it
+                self._sync_dedup_index()
+            elif not self.dedup_index.load(self._dedup_index_path()) and self.vector_store._collection.count():
+                # Knowledge base built without a saved index
+                self.rebuild_dedup_index()
+    
+    def _dedup_index_path(self) -> str:
+        return os.path.join(self.persist_directory, DEDUP_INDEX_FILE)
+    
+    def _save_dedup_index(self, full: bool = True):
+        # In client/server mode the index is rebuilt from the server instead of saved locally
+        if self.dedup_index is not None and not self.vector_store_url:
+            if full:
+                self.dedup_index.save(self._dedup_index_path())
+            else:
+                self.dedup_index.append(self._dedup_index_path())
+    
+    def _index_chunks(self, ids: List[str], batch_size: int = 1000):
+        """Add the signatures of stored chunks to the near-duplicate index."""
+        collection = self.vector_store._collection
+        for start in range(0, len(ids), batch_size):
+            batch = collection.get(ids=ids[start:start + batch_size], include=["documents"])
+            for chunk_id, text in zip(batch["ids"], batch["documents"]):
+                signature = self.dedup_index.hasher.signature(text or "")
+                if signature is not None:
+                    self.dedup_index.add(chunk_id, signature)
+    
+    def _state_collection(self):
+        """Client/server mode: collection holding shared knowledge base state."""
+        return self.vector_store._client.get_or_create_collection(
+            f"{self.vector_store._collection.name}-state",
+            embedding_function=None
+        )
+    
+    def _generation(self) -> Optional[str]:
+        """Client/server mode: id of the knowledge base's current contents, changed when it is cleared."""
+        state = self._state_collection().get(ids=["generation"], include=["metadatas"])
+        return state["metadatas"][0]["value"] if state["ids"] else None
+    
+    def _new_generation(self):
+        """Client/server mode: tell other workers the knowledge base was replaced."""
+        self._state_collection().upsert(ids=["generation"], embeddings=[[0.0]], metadatas=[{"value": uuid.uuid4().hex}])
+    
+    def _recent_chunks(self, include: List[str]) -> Dict[str, Any]:
+        """Client/server mode: chunks ingested since shortly before the last sync."""
+        return self.vector_store._collection.get(
+            where={"ingested_at": {"$gte": self._synced_at - SYNC_MARGIN_SECONDS}},
+            include=include
+        )
+    
+    def _sync_dedup_index(self):
+        """
+        Bring the near-duplicate index up to date with chunks written by other processes.
+        
+        Only chunks ingested since the last sync are fetched. The whole index is
+        read again on the first sync and after the knowledge base was cleared or
+        replaced (its generation changed).
+        """
+        started = time.time()
+        generation = self._generation()
+        if not self._synced_at or generation != self._synced_generation:
+            self.rebuild_dedup_index()
+        else:
+            recent = self._recent_chunks(["documents"])
+            for chunk_id, text in zip(recent["ids"], recent["documents"]):
+                if chunk_id not in self.dedup_index:
+                    signature = self.dedup_index.hasher.signature(text or "")
+                    if signature is not None:
+                        self.dedup_index.add(chunk_id, signature)
+        self._synced_at, self._synced_generation = started, generation
+    
+    def _resolve_concurrent_duplicates(self, chunks: List[Document], ids: List[str]) -> int:
+        """
+        Client/server mode: remove near-duplicates another worker stored at the same time.
+        
+        Two workers can both find a chunk new and store it. After writing, each
+        worker compares its chunks with the ones other workers stored since its
+        last sync, and of each near-duplicate pair keeps the one with the smaller
+        id. Workers that both see a pair therefore delete the same copy.
+        
+        Returns:
+            Number of this batch's chunks removed
+        """
+        own = set(ids)
+        recent = self._recent_chunks(["documents", "metadatas"])
+        others = NearDuplicateIndex(
+            threshold=self.dedup_index.threshold,
+            num_perm=self.dedup_index.hasher.num_perm,
+            bands=self.dedup_index.bands,
+            shingle_size=self.dedup_index.hasher.shingle_size
+        )
+        sources = {}
+        for chunk_id, text, metadata in zip(recent["ids"], recent["documents"], recent["metadatas"]):
+            signature = others.hasher.signature(text or "")
+            if chunk_id not in own and signature is not None:
+                others.add(chunk_id, signature)
+                sources[chunk_id] = (metadata or {}).get("source")
+        if not len(others):
+            return 0
+        
+        replaced: Dict[str, str] = {}
+        for chunk, chunk_id in zip(chunks, ids):
+            signature = others.hasher.signature(chunk.page_content)
+            match = others.find(signature) if signature is not None else None
+            if match is not None:
+                kept, removed = sorted([chunk_id, match[0]])
+                replaced[removed] = kept
+                sources[chunk_id] = chunk.metadata.get("source")
+        if not replaced:
+            return 0
+        
+        self.vector_store._collection.delete(ids=list(replaced))
+        self.dedup_index.remove(list(replaced))
+        links: Dict[str, List[str]] = {}
+        for removed, kept in replaced.items():
+            links.setdefault(kept, []).append(sources[removed])
+        self._link_stored_sources(links)
+        return sum(1 for chunk_id in replaced if chunk_id in own)
+    
+    def _retrying(self, operation: Callable[[], Any]) -> Any:
+        """
+        Run a vector store operation, reopening the collection once if it was replaced.
+        
+        In client/server mode another worker's rebuild_index() swaps in a new
+        collection under the same name, which leaves this process holding the
+        old one.
+        """
+        try:
+            return operation()
+        except CollectionNotFoundError:
+            if not self.vector_store_url:
+                raise
+            self._initialize_vector_store()
+            # The near-duplicate index may hold signatures of a failed write
+            self._synced_generation = None
+            return operation()
+    
+    def rebuild_dedup_index(self, batch_size: int = 1000) -> int:
+        """
+        Rebuild the near-duplicate index from the chunks in the vector store.
+        
+        Args:
+            batch_size: Number of chunks read at a time
+            
+        Returns:
+            Number of chunks indexed
+        """
+        if self.dedup_index is None:
+            return 0
+        
+        self.dedup_index.clear()
+        self._index_chunks(self.vector_store._collection.get(include=[])["ids"], batch_size)
+        self._save_dedup_index()
+        return len(self.dedup_index)
+    
+    @staticmethod
+    def _linked_sources(metadata: Dict) -> List[str]:
+        """Other sources a chunk appears in (its duplicate_sources metadata)."""
+        return [s for s in str(metadata.get("duplicate_sources", "")).split("; ") if s]
+    
+    @classmethod
+    def _link_source(cls, metadata: Dict, source: str):
+        """Record that a chunk also appears in another source."""
+        if not source or source == metadata.get("source"):
+            return
+        linked = cls._linked_sources(metadata)
+        if source not in linked:
+            metadata["duplicate_sources"] = "; ".join(linked + [source])
+    
+    def _deduplicate(self, chunks: List[Document]) -> Tuple[List[Document], List[str], Dict[str, List[str]], int]:
+        """
+        Drop chunks that are near-duplicates of stored chunks or of earlier chunks in the batch.
+        
+        The source of each dropped chunk is added to the duplicate_sources
+        metadata of the batch chunk it duplicates; links to stored chunks are
+        returned for _link_stored_sources() once the batch is written.
+        
+        Returns:
+            Tuple of (chunks to store, their ids, stored chunk id -> sources to
+            link, number of duplicates dropped)
+        """
+        unique, ids = [], []
+        pending: Dict[str, Document] = {}
+        stored_links: Dict[str, List[str]] = {}
+        duplicates = 0
+        
+        for chunk in chunks:
+            chunk_id = str(uuid.uuid4())
+            signature = self.dedup_index.hasher.signature(chunk.page_content)
+            match = self.dedup_index.find(signature) if signature is not None else None
+            if match is None:
+                if signature is not None:
+                    self.dedup_index.add(chunk_id, signature)
+                unique.append(chunk)
+                ids.append(chunk_id)
+                pending[chunk_id] = chunk
+                continue
+            
+            duplicates += 1
+            canonical_id = match[0]
+            source = chunk.metadata.get("source")
+            if canonical_id in pending:
+                self._link_source(pending[canonical_id].metadata, source)
+            else:
+                stored_links.setdefault(canonical_id, []).append(source)
+        
+        return unique, ids, stored_links, duplicates
+    
+    def _link_stored_sources(self, stored_links: Dict[str, List[str]]):
+        """Add sources to the duplicate_sources metadata of stored chunks."""
+        if not stored_links:
+            return
+        collection = self.vector_store._collection
+        stored = collection.get(ids=list(stored_links), include=["metadatas"])
+        updated = []
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = dict(metadata or {})
+            for source in stored_links[chunk_id]:
+                self._link_source(metadata, source)
+            updated.append(metadata)
+        if stored["ids"]:
+            collection.update(ids=stored["ids"], metadatas=updated)
+    
+    @staticmethod
+    def _collection_metadata(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Chroma collection metadata for index settings."""
+        metadata = {INDEX_SETTINGS[key]: value for key, value in settings.items()}
+        return metadata or None
+    
+    def _read_index_settings(self):
+        """Set index_settings to the settings the open collection was created with."""
+        metadata = self.vector_store._collection.metadata or {}
+        self.index_settings = {key: metadata[name] for key, name in INDEX_SETTINGS.items() if name in metadata}
     
     def _initialize_vector_store(self):
         """Initialize or load existing ChromaDB vector store."""
-        try:
-            self.vector_store = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings
-            )
-        except Exception as e:
-            # Create new vector store if it doesn't exist
+        self._open_vector_store()
+        self._read_index_settings()
+    
+    def _open_vector_store(self):
+        if self.vector_store_url:
+            # Client/server mode: connect through the process-wide pooled client
+            client = vector_store_client.get_client(self.vector_store_url)
+        else:
             try:
-                self.vector_store = Chroma(
-                    persist_directory=self.persist_directory,
-                    embedding_function=self.embeddings
-                )
+                client = chromadb.PersistentClient(path=self.persist_directory)
             except Exception:
-                # Fallback: create without persist_directory
-                self.vector_store = Chroma(
-                    embedding_function=self.embeddings
-                )
+                # Fallback: in-memory store
+                client = chromadb.EphemeralClient()
+        
+        # Index settings only go with a new collection: get_or_create on an existing
+        # one overwrites its metadata in some chromadb versions, relabelling an
+        # index that wasn't built with them
+        try:
+            client.get_collection(COLLECTION_NAME, embedding_function=None)
+            collection_metadata = None
+        except CollectionNotFoundError:
+            collection_metadata = self._collection_metadata(self._new_index_settings)
+        
+        self.vector_store = Chroma(
+            collection_name=COLLECTION_NAME,
+            client=client,
+            embedding_function=self.embeddings,
+            collection_metadata=collection_metadata
+        )
     
-    def load_document(self, file_path: str) -> List[Document]:
+    @staticmethod
+    def load_document(file_path: str) -> List[Document]:
         """
         Load a document from file path.
         
@@ -100,15 +484,20 @@ class RAGSystem:
         documents = loader.load()
         return documents
     
-    def add_documents(self, documents: List[Document], metadata: Optional[List[Dict]] = None):
+    def add_documents(self, documents: List[Document], metadata: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Add documents to the knowledge base.
         
         Documents are split into chunks, embedded, and stored in vector database.
+        Near-duplicates of stored chunks are skipped (see dedup_threshold).
         
         Args:
             documents: List of Document objects to add
             metadata: Optional list of metadata dictionaries for each document
+            
+        Returns:
+            Dictionary with chunks, added, duplicates and dedup_ratio (share of
+            chunks skipped as near-duplicates)
         """
         chunks = self.text_splitter.split_documents(documents)
         
@@ -117,17 +506,69 @@ class RAGSystem:
                 if i < len(metadata):
                     chunk.metadata.update(metadata[i])
         
-        self.vector_store.add_documents(chunks)
+        total = len(chunks)
+        with self._ingest_lock:
+            added, duplicates = self._retrying(lambda: self._ingest(chunks))
+        
+        self._knowledge_base_changed()
         # Persist is handled automatically in newer versions, but keep for compatibility
         try:
             self.vector_store.persist()
         except AttributeError:
             pass  # persist() not needed in newer versions
+        
+        return {
+            "chunks": total,
+            "added": added,
+            "duplicates": duplicates,
+            "dedup_ratio": duplicates / total if total else 0.0
+        }
+    
+    def _ingest(self, chunks: List[Document]) -> Tuple[int, int]:
+        """
+        Deduplicate and store chunks (the caller holds the ingest lock).
+        
+        Returns:
+            Tuple of (chunks added, near-duplicates skipped)
+        """
+        stored_links: Dict[str, List[str]] = {}
+        if self.dedup_index is None:
+            ids, duplicates = [str(uuid.uuid4()) for _ in chunks], 0
+        else:
+            if self.vector_store_url:
+                self._sync_dedup_index()
+            chunks, ids, stored_links, duplicates = self._deduplicate(chunks)
+        
+        if self.vector_store_url:
+            # Lets other workers sync just the chunks added since they last looked
+            ingested_at = time.time()
+            for chunk in chunks:
+                chunk.metadata["ingested_at"] = ingested_at
+        
+        try:
+            if chunks:
+                self.vector_store.add_documents(chunks, ids=ids)
+        except Exception:
+            # Forget the signatures of chunks that weren't stored
+            if self.dedup_index is not None:
+                self.rebuild_dedup_index()
+            raise
+        # Link sources only once the chunks that made them duplicates are stored
+        self._link_stored_sources(stored_links)
+        
+        removed = 0
+        if self.vector_store_url and self.dedup_index is not None and chunks:
+            removed = self._resolve_concurrent_duplicates(chunks, ids)
+        self._save_dedup_index(full=False)
+        return len(chunks) - removed, duplicates + removed
     
     def retrieve_relevant_context(self, query: str, k: int = 5) -> List[Document]:
         """
         Retrieve most relevant documents for a query.
         
+        With a re-ranker, more candidates are fetched (reranker.candidates) and
+        the best k by cross-encoder score are returned.
+        
         Args:
             query: Search query string
             k: Number of documents to retrieve (default: 5)
@@ -138,38 +579,396 @@ class RAGSystem:
         if self.vector_store is None:
             return []
         
-        docs = self.vector_store.similarity_search_with_score(query, k=k)
-        return [doc for doc, _ in docs[:k]]
+        fetch_k = max(k, self.reranker.candidates) if self.reranker else k
+        docs = [doc for doc, _ in self._retrying(lambda: self.vector_store.similarity_search_with_score(query, k=fetch_k))]
+        if self.reranker:
+            return self.reranker.rerank(query, docs, k)
+        return docs[:k]
     
-    def get_context_string(self, query: str, k: int = 5) -> str:
+    def _knowledge_base_changed(self):
+        """Drop results derived from the knowledge base's contents."""
+        self.prefetcher.invalidate()
+        with self._sources_lock:
+            self._sources = None
+    
+    def _source_index(self, batch_size: int = 1000) -> Dict[str, List[str]]:
         """
-        Get formatted context string from retrieved documents.
+        Map each source to the ids of its chunks, including chunks stored for
+        another source that it duplicates (see duplicate_sources).
+        
+        The map is built by scanning chunk metadata once and reused until this
+        process changes the knowledge base; in client/server mode it is also
+        rebuilt when the chunk count changes (another worker added or removed chunks).
+        """
+        collection = self.vector_store._collection
+        count = collection.count() if self.vector_store_url else None
+        with self._sources_lock:
+            if self._sources is not None and count == self._sources_count:
+                return self._sources
+        
+        sources: Dict[str, List[str]] = {}
+        for offset in range(0, collection.count() if count is None else count, batch_size):
+            batch = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            for chunk_id, metadata in zip(batch["ids"], batch["metadatas"]):
+                metadata = metadata or {}
+                for source in [metadata.get("source")] + self._linked_sources(metadata):
+                    if source:
+                        sources.setdefault(source, []).append(chunk_id)
+        
+        with self._sources_lock:
+            self._sources, self._sources_count = sources, count
+        return sources
+    
+    def list_sources(self) -> List[str]:
+        """
+        List the sources (file paths or names) of the documents in the knowledge base.
+        
+        Includes documents whose chunks were all stored as near-duplicates of
+        another document's. The list is cached until the knowledge base changes.
+        
+        Returns:
+            Sorted list of sources
+        """
+        return sorted(self._retrying(self._source_index))
+    
+    def get_source_chunks(self, source: str) -> List[Document]:
+        """
+        Get all chunks of one source in document order.
+        
+        Args:
+            source: Source as stored in chunk metadata (see list_sources())
+            
+        Returns:
+            List of Document objects sorted by their position in the source,
+            including chunks stored for another source that this one duplicates
+            (those are placed by their position in that source)
+        """
+        ids = self._retrying(self._source_index).get(source)
+        if not ids:
+            return []
+        batch = self._retrying(
+            lambda: self.vector_store._collection.get(ids=ids, include=["documents", "metadatas"])
+        )
+        chunks = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(batch["documents"], batch["metadatas"])
+        ]
+        chunks.sort(key=lambda chunk: (chunk.metadata.get("page", 0), chunk.metadata.get("start_index", 0)))
+        return chunks
+    
+    def prefetch_context(self, query: str, k: int = 5, caller: Optional[str] = None):
+        """
+        Start retrieving context for a query in the background.
+        
+        Call this while the user is still editing the form; a later
+        get_context_string() for the same query reuses the result.
+        The caller's prefetches for an older query that haven't started yet are cancelled.
+        
+        Args:
+            query: Search query string (e.g. the topic typed so far)
+            k: Number of documents to retrieve
+            caller: Who is typing (e.g. a session id), so users sharing this
+                RAGSystem don't cancel each other's prefetches
+        """
+        self.prefetcher.schedule(query, k, caller)
+    
+    def get_context(self, query: str, k: int = 5) -> Dict[str, Any]:
+        """
+        Get formatted context from retrieved documents, compressed if a compressor is set.
+        
+        Uses a prefetched result for the query when there is one.
         
         Args:
             query: Search query string
             k: Number of documents to retrieve
             
         Returns:
-            Formatted string with retrieved context, or message if no context found
+            Dictionary with the context string; with a compressor, also
+            original_tokens, context_tokens and compression_ratio
         """
-        docs = self.retrieve_relevant_context(query, k)
+        docs = self.prefetcher.get(query, k)
+        if docs is None:
+            docs = self.retrieve_relevant_context(query, k)
         
         if not docs:
-            return "No relevant context found in knowledge base."
+            return {"context": "No relevant context found in knowledge base."}
+        
+        if self.compressor is not None:
+            context, stats = self.compressor.compress(query, docs)
+            return {"context": context, **stats}
         
         context_parts = []
         for i, doc in enumerate(docs, 1):
             context_parts.append(f"[Source {i}]\n{doc.page_content}\n")
         
-        return "\n".join(context_parts)
+        return {"context": "\n".join(context_parts)}
+    
+    def get_context_string(self, query: str, k: int = 5) -> str:
+        """
+        Get formatted context string from retrieved documents.
+        
+        Args:
+            query: Search query string
+            k: Number of documents to retrieve
+            
+        Returns:
+            Formatted string with retrieved context, or message if no context found
+        """
+        return self.get_context(query, k)["context"]
+    
+    def _embedding_model_name(self) -> str:
+        """Name of the embedding model, recorded in snapshots."""
+        return getattr(self.embeddings, "model", None) or getattr(self.embeddings, "model_name", None) or type(self.embeddings).__name__
+    
+    def read_all(self, batch_size: int = 1000) -> Tuple[List[str], np.ndarray, List[str], List[Dict]]:
+        """
+        Read every chunk in the vector store with its embedding.
+        
+        Args:
+            batch_size: Number of chunks read at a time
+            
+        Returns:
+            Tuple of (ids, float32 embedding matrix, texts, metadatas)
+        """
+        collection = self.vector_store._collection
+        total = collection.count()
+        
+        ids, vectors, texts, metadatas = [], [], [], []
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=batch_size,
+                offset=offset
+            )
+            ids.extend(batch["ids"])
+            vectors.extend(batch["embeddings"])
+            texts.extend(batch["documents"])
+            metadatas.extend(metadata or {} for metadata in batch["metadatas"])
+        
+        return ids, np.asarray(vectors, dtype=np.float32), texts, metadatas
+    
+    def _write_chunks(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        texts: List[str],
+        metadatas: List[Dict],
+        batch_size: Optional[int] = None,
+        collection=None
+    ):
+        """Upsert chunks with precomputed embeddings in batches (into the open collection by default)."""
+        collection = collection or self.vector_store._collection
+        if batch_size is None:
+            try:
+                batch_size = self.vector_store._client.get_max_batch_size()
+            except AttributeError:
+                batch_size = 1000
+        
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                documents=texts[start:end],
+                metadatas=[metadata or None for metadata in metadatas[start:end]]
+            )
+    
+    def rebuild_index(self, index_settings: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Recreate the collection with new index settings, reusing the stored embeddings.
+        
+        The new collection is built under a temporary name and swapped in only
+        once it is complete, so a failure part way leaves the live index as it was.
+        In client/server mode other workers switch to the new collection on their
+        next call; chunks they add while the rebuild runs are not copied, so run
+        it while no one is uploading.
+        
+        Args:
+            index_settings: Settings to change (see __init__); others are kept
+            
+        Returns:
+            Number of chunks in the rebuilt index
+            
+        Raises:
+            ValueError: If index_settings has an unknown key
+        """
+        unknown = set(index_settings or {}) - set(INDEX_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown index settings: {', '.join(sorted(unknown))}")
+        
+        # Ingesting meanwhile would write to the old collection and be lost
+        with self._ingest_lock:
+            settings = dict(self.index_settings, **(index_settings or {}))
+            ids, embeddings, texts, metadatas = self.read_all()
+            
+            client = self.vector_store._client
+            live = self.vector_store._collection
+            rebuilt = client.create_collection(
+                name=f"{live.name}-rebuild-{uuid.uuid4().hex[:8]}",
+                embedding_function=None,
+                metadata=self._collection_metadata(settings)
+            )
+            try:
+                self._write_chunks(ids, embeddings, texts, metadatas, collection=rebuilt)
+            except BaseException:
+                client.delete_collection(rebuilt.name)
+                raise
+            
+            name, backup = live.name, f"{live.name}-old-{uuid.uuid4().hex[:8]}"
+            live.modify(name=backup)
+            try:
+                rebuilt.modify(name=name)
+            except BaseException:
+                live.modify(name=name)
+                client.delete_collection(rebuilt.name)
+                raise
+            client.delete_collection(backup)
+            
+            self._new_index_settings = settings
+            self._initialize_vector_store()
+        self._knowledge_base_changed()
+        return len(ids)
+    
+    def export_snapshot(self, path: str, batch_size: int = 1000) -> Dict:
+        """
+        Export the knowledge base to a snapshot file.
+        
+        The snapshot is a compressed .npz file holding a JSON header (embedding
+        model, dimension, chunk settings), the chunk ids, the precomputed
+        embeddings as a float32 matrix, and chunk text plus metadata as JSONL.
+        
+        Args:
+            path: Output file path (.npz is added if missing)
+            batch_size: Number of chunks read from the vector store at a time
+            
+        Returns:
+            Snapshot header dictionary
+        """
+        ids, embeddings, texts, metadatas = self.read_all(batch_size)
+        records = [
+            json.dumps({"text": text, "metadata": metadata}, ensure_ascii=False)
+            for text, metadata in zip(texts, metadatas)
+        ]
+        
+        header = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "embedding_model": self._embedding_model_name(),
+            "embedding_dimension": int(embeddings.shape[1]) if len(ids) else 0,
+            "count": len(ids),
+            "chunk_size": self.text_splitter.chunk_size,
+            "chunk_overlap": self.text_splitter.chunk_overlap,
+            "created": datetime.now(timezone.utc).isoformat()
+        }
+        
+        np.savez_compressed(
+            path,
+            header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+            ids=np.asarray(ids, dtype=str),
+            embeddings=embeddings,
+            records=np.frombuffer("\n".join(records).encode("utf-8"), dtype=np.uint8)
+        )
+        return header
+    
+    @staticmethod
+    def read_snapshot_header(path: str) -> Dict:
+        """
+        Read the header of a snapshot file without loading its contents.
+        
+        Args:
+            path: Snapshot file path
+            
+        Returns:
+            Snapshot header dictionary
+        """
+        with np.load(path, allow_pickle=False) as snapshot:
+            return json.loads(snapshot["header"].tobytes().decode("utf-8"))
+    
+    def import_snapshot(self, path: str, batch_size: Optional[int] = None) -> int:
+        """
+        Bulk-load a snapshot into the vector store without calling the embedding API.
+        
+        Chunks are upserted by id, so importing the same snapshot twice doesn't
+        create duplicates.
+        
+        Args:
+            path: Snapshot file written by export_snapshot()
+            batch_size: Chunks per write (default: the vector store's maximum batch size)
+            
+        Returns:
+            Number of chunks imported
+            
+        Raises:
+            ValueError: If the file isn't a snapshot or was made with a different embedding model
+        """
+        with np.load(path, allow_pickle=False) as snapshot:
+            header = json.loads(snapshot["header"].tobytes().decode("utf-8"))
+            if header.get("format") != SNAPSHOT_FORMAT or header.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Not a supported knowledge base snapshot: {path}")
+            if header["embedding_model"] != self._embedding_model_name():
+                raise ValueError(
+                    f"Snapshot was made with embedding model '{header['embedding_model']}', "
+                    f"but this knowledge base uses '{self._embedding_model_name()}'"
+                )
+            
+            ids = snapshot["ids"].tolist()
+            embeddings = snapshot["embeddings"]
+            records_blob = snapshot["records"].tobytes().decode("utf-8")
+        
+        records = [json.loads(line) for line in records_blob.split("\n")] if ids else []
+        
+        with self._ingest_lock:
+            self._write_chunks(
+                ids,
+                embeddings,
+                [record["text"] for record in records],
+                [record["metadata"] for record in records],
+                batch_size
+            )
+            self.rebuild_dedup_index()
+            if self.vector_store_url:
+                # Imported chunks have no ingest time, so other workers re-read everything
+                self._new_generation()
+                self._synced_generation = None
+        
+        self._knowledge_base_changed()
+        return len(ids)
+    
+    def _delete_all_chunks(self, batch_size: int = 1000):
+        collection = self.vector_store._collection
+        while True:
+            ids = collection.get(include=[], limit=batch_size)["ids"]
+            if not ids:
+                return
+            collection.delete(ids=ids)
     
     def clear_knowledge_base(self):
         """
         Clear all documents from the knowledge base.
         
         Removes the vector store directory and reinitializes an empty store.
+        The saved index configuration is kept. In client/server mode the
+        chunks on the server are deleted instead; the collection itself stays,
+        since other workers have it open.
         """
-        if os.path.exists(self.persist_directory):
-            shutil.rmtree(self.persist_directory)
-        os.makedirs(self.persist_directory, exist_ok=True)
-        self._initialize_vector_store()
+        if self.vector_store_url:
+            with self._ingest_lock:
+                self._retrying(self._delete_all_chunks)
+                self._new_generation()
+                if self.dedup_index is not None:
+                    self.dedup_index.clear()
+                self._synced_generation = None
+            self._knowledge_base_changed()
+            return
+        
+        with self._ingest_lock:
+            index_config = read_index_config(self.persist_directory)
+            if os.path.exists(self.persist_directory):
+                shutil.rmtree(self.persist_directory)
+            os.makedirs(self.persist_directory, exist_ok=True)
+            if index_config:
+                write_index_config(self.persist_directory, index_config)
+            self._initialize_vector_store()
+            if self.dedup_index is not None:
+                self.dedup_index.clear()
+        self._knowledge_base_changed()
@@ -0,0 +1,188 @@
+"""
+Cross-Encoder Re-ranking
+
+This module re-ranks retrieved chunks with a local cross-encoder model, which
+reads the query and chunk together and scores relevance more precisely than
+vector similarity:
+- Candidates are scored in batches on the local CPU/GPU
+- Scores are cached per (query, chunk) pair
+- Each query has a time budget; if scoring would exceed it, the original
+  vector-search order is kept instead
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+
+
+class CrossEncoderReranker:
+    """
+    Re-ranks documents for a query with a sentence-transformers CrossEncoder.
+
+    The model is loaded on first use. Loading time doesn't count against the
+    time budget.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        candidates: int = 20,
+        batch_size: int = 16,
+        time_budget: float = 0.5,
+        cache_size: int = 4096,
+        model=None
+    ):
+        """
+        Args:
+            model_name: sentence-transformers cross-encoder name or local path
+            candidates: Documents fetched from the vector store for re-ranking
+            batch_size: Query/chunk pairs scored per batch
+            time_budget: Maximum seconds spent scoring one query
+            cache_size: Maximum number of cached pair scores
+            model: Preloaded model with a predict(pairs, batch_size=...) method
+        """
+        self.model_name = model_name
+        self.candidates = candidates
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.cache_size = cache_size
+        self._model = model
+
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.reranked = 0
+        self.fallbacks = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["CrossEncoderReranker"]:
+        """
+        Create a re-ranker from environment variables.
+
+        RERANK_MODEL turns re-ranking on; RERANK_CANDIDATES and
+        RERANK_TIME_BUDGET (seconds) are optional.
+
+        Returns:
+            CrossEncoderReranker, or None if RERANK_MODEL isn't set
+        """
+        model_name = os.getenv("RERANK_MODEL")
+        if not model_name:
+            return None
+        return cls(
+            model_name=model_name,
+            candidates=int(os.getenv("RERANK_CANDIDATES", "20")),
+            time_budget=float(os.getenv("RERANK_TIME_BUDGET", "0.5"))
+        )
+
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError:
+                    raise ImportError(
+                        "sentence-transformers is required for CrossEncoderReranker. "
+                        "Install it with: pip install sentence-transformers"
+                    )
+                self._model = CrossEncoder(self.model_name)
+            return self._model
+
+    @staticmethod
+    def _pair_key(query: str, doc: Document) -> Tuple[str, str]:
+        query_key = " ".join(query.lower().split())
+        return query_key, hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+    def _cached_scores(self, keys: List[Tuple[str, str]]) -> List[Optional[float]]:
+        with self._lock:
+            scores = []
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+            hits = sum(score is not None for score in scores)
+            self.cache_hits += hits
+            self.cache_misses += len(keys) - hits
+            return scores
+
+    def _store_scores(self, items: List[Tuple[Tuple[str, str], float]]):
+        with self._lock:
+            for key, score in items:
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query: str, documents: List[Document], top_n: int) -> List[Document]:
+        """
+        Re-rank documents by cross-encoder relevance to the query.
+
+        Args:
+            query: Search query string
+            documents: Candidates in vector-search order
+            top_n: Number of documents to return
+
+        Returns:
+            The top_n most relevant documents, or the first top_n in their
+            original order if scoring didn't fit in the time budget
+        """
+        if len(documents) <= 1:
+            return documents[:top_n]
+
+        keys = [self._pair_key(query, doc) for doc in documents]
+        scores = self._cached_scores(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing:
+            model = self._get_model()
+            start = time.perf_counter()
+            batch_seconds = 0.0
+            for offset in range(0, len(missing), self.batch_size):
+                elapsed = time.perf_counter() - start
+                # Stop before a batch that would likely go over the budget
+                if elapsed + batch_seconds > self.time_budget:
+                    break
+                batch = missing[offset:offset + self.batch_size]
+                batch_start = time.perf_counter()
+                with self._model_lock:
+                    batch_scores = model.predict(
+                        [(query, documents[i].page_content) for i in batch],
+                        batch_size=self.batch_size
+                    )
+                batch_seconds = time.perf_counter() - batch_start
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = float(score)
+                self._store_scores([(keys[i], scores[i]) for i in batch])
+
+            if any(score is None for score in scores):
+                with self._lock:
+                    self.fallbacks += 1
+                return documents[:top_n]
+
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
+        with self._lock:
+            self.reranked += 1
+        return [documents[i] for i in order[:top_n]]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get re-ranking counters.
+
+        Returns:
+            Dictionary with re-ranked queries, budget fallbacks, cache hits,
+            cache misses and cached pairs
+        """
+        with self._lock:
+            return {
+                "reranked": self.reranked,
+                "fallbacks": self.fallbacks,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cached_pairs": len(self._cache)
+            }
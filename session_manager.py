@@ -0,0 +1,249 @@
+"""
+Session Manager
+
+This module keeps per-user state of the web app bounded on a long-running server:
+- Tracks live sessions and when each was last active
+- Evicts sessions that have been idle longer than a TTL
+- Stores generated results per session in a store bounded by count and size
+- Reports process memory (RSS) and live-session counts
+
+Heavyweight components (RAGSystem, PromptEngineer) are shared by all sessions
+using the same API key instead of being created per session.
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def process_rss_bytes() -> int:
+    """
+    Get the resident memory of this process in bytes.
+
+    Reads /proc on Linux; elsewhere falls back to the peak RSS reported by
+    the resource module. Returns 0 if neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+
+def estimate_bytes(value: Any) -> int:
+    """Estimate the memory used by a result (strings, numbers, dicts and lists)."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class BoundedResultStore:
+    """
+    Least-recently-used store of generated results, bounded by count and size.
+
+    When either bound is exceeded, the least recently used results are dropped.
+    The newest result is always kept, even if it alone is over the size bound.
+    """
+
+    def __init__(self, max_items: int = 20, max_bytes: int = 2 * 1024 * 1024):
+        """
+        Args:
+            max_items: Maximum number of results kept
+            max_bytes: Maximum estimated size of all results kept
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+
+    def put(self, key: str, value: Any):
+        """Store a result, replacing any result with the same key."""
+        size = estimate_bytes(value)
+        with self._lock:
+            if key in self._items:
+                self.size_bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.size_bytes += size
+            while len(self._items) > 1 and (len(self._items) > self.max_items or self.size_bytes > self.max_bytes):
+                _, (_, dropped_size) = self._items.popitem(last=False)
+                self.size_bytes -= dropped_size
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a result by key (marking it as recently used), or None."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Get (key, result) pairs, most recently used first."""
+        with self._lock:
+            return [(key, value) for key, (value, _) in reversed(self._items.items())]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class Session:
+    """State kept for one user session."""
+
+    def __init__(self, session_id: str, max_results: int, max_result_bytes: int):
+        self.session_id = session_id
+        self.created = time.monotonic()
+        self.last_seen = self.created
+        self.results = BoundedResultStore(max_results, max_result_bytes)
+        self.rag_system = None
+        self.prompt_engineer = None
+
+    def memory_bytes(self) -> int:
+        """Estimated memory held by this session (shared components not counted)."""
+        return self.results.size_bytes
+
+    def release(self):
+        self.results.clear()
+        self.rag_system = None
+        self.prompt_engineer = None
+
+
+class SessionManager:
+    """
+    Process-wide registry of user sessions.
+
+    Idle sessions are swept lazily: at most once per `sweep_interval`, on the
+    next session access, so no background thread is needed.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 30 * 60,
+        max_results: int = 20,
+        max_result_bytes: int = 2 * 1024 * 1024,
+        sweep_interval: float = 60.0
+    ):
+        """
+        Args:
+            idle_ttl: Seconds of inactivity after which a session is evicted
+            max_results: Results kept per session
+            max_result_bytes: Estimated bytes of results kept per session
+            sweep_interval: Minimum seconds between idle-session sweeps
+        """
+        self.idle_ttl = idle_ttl
+        self.max_results = max_results
+        self.max_result_bytes = max_result_bytes
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Session] = {}
+        self._components: Dict[str, Tuple[Any, Any]] = {}
+        self._last_sweep = time.monotonic()
+        self.evicted_count = 0
+
+    def get_session(self, session_id: str) -> Session:
+        """
+        Get a session, creating it if needed, and mark it as active.
+
+        Args:
+            session_id: Identifier of the user session
+
+        Returns:
+            Session object
+        """
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.evict_idle(now)
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, self.max_results, self.max_result_bytes)
+                self._sessions[session_id] = session
+            session.last_seen = now
+            return session
+
+    def get_components(self, api_key: str, factory: Callable[[], Tuple[Any, Any]]) -> Tuple[Any, Any]:
+        """
+        Get the shared (rag_system, prompt_engineer) pair for an API key.
+
+        Args:
+            api_key: OpenAI API key the components use
+            factory: Function creating the pair on first use
+
+        Returns:
+            Tuple of (rag_system, prompt_engineer)
+        """
+        with self._lock:
+            components = self._components.get(api_key)
+        if components is None:
+            components = factory()
+            with self._lock:
+                components = self._components.setdefault(api_key, components)
+        return components
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """
+        Evict sessions idle for longer than the TTL.
+
+        Args:
+            now: Current time.monotonic() value (default: now)
+
+        Returns:
+            Number of sessions evicted
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            idle = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.idle_ttl]
+            evicted = [self._sessions.pop(sid) for sid in idle]
+            self.evicted_count += len(evicted)
+
+        for session in evicted:
+            session.release()
+        if evicted:
+            gc.collect()
+        return len(evicted)
+
+    def remove(self, session_id: str):
+        """Drop a session immediately."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.release()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get memory and session counters.
+
+        Returns:
+            Dictionary with process RSS, live sessions, evicted sessions and
+            total bytes of stored results
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+            evicted = self.evicted_count
+        return {
+            "rss_bytes": process_rss_bytes(),
+            "live_sessions": len(sessions),
+            "evicted_sessions": evicted,
+            "result_bytes": sum(s.memory_bytes() for s in sessions)
+        }
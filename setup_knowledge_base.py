@@ -1,4 +1,6 @@
 import os
+import time
+import argparse
 from rag_system import RAGSystem
 from langchain_core.documents import Document
 from dotenv import load_dotenv
@@ -83,10 +85,39 @@ def setup_sample_knowledge_base():
         )
         documents.append(doc)
     
-    rag.add_documents(documents)
+    stats = rag.add_documents(documents)
     
     print("Knowledge base initialized with sample documents!")
     print(f"Added {len(documents)} documents to the knowledge base")
+    print(f"Stored {stats['added']} chunks, skipped {stats['duplicates']} near-duplicates ({stats['dedup_ratio']:.0%})")
+
+def import_snapshot(path):
+    print(f"Importing snapshot {path}...")
+    
+    header = RAGSystem.read_snapshot_header(path)
+    print(f"Snapshot has {header['count']} chunks embedded with {header['embedding_model']}")
+    
+    start = time.perf_counter()
+    rag = RAGSystem(api_key=os.getenv("OPENAI_API_KEY"))
+    count = rag.import_snapshot(path)
+    print(f"Imported {count} chunks in {time.perf_counter() - start:.1f}s (no embedding calls)")
+
+def export_snapshot(path):
+    print(f"Exporting knowledge base to {path}...")
+    
+    rag = RAGSystem(api_key=os.getenv("OPENAI_API_KEY"))
+    header = rag.export_snapshot(path)
+    print(f"Exported {header['count']} chunks ({header['embedding_model']}, dimension {header['embedding_dimension']})")
 
 if __name__ == "__main__":
-    setup_sample_knowledge_base()
+    parser = argparse.ArgumentParser(description="Set up the knowledge base")
+    parser.add_argument("--export-snapshot", metavar="PATH", help="write the current knowledge base to a snapshot file")
+    parser.add_argument("--import-snapshot", metavar="PATH", help="load a snapshot instead of embedding the sample documents")
+    args = parser.parse_args()
+    
+    if args.export_snapshot:
+        export_snapshot(args.export_snapshot)
+    elif args.import_snapshot:
+        import_snapshot(args.import_snapshot)
+    else:
+        setup_sample_knowledge_base()
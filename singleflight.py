@@ -0,0 +1,252 @@
+"""
+Single-Flight Request Coalescing
+
+This module lets concurrent identical calls share one execution:
+- The first caller for a key runs the work, later callers wait for its result
+- Works across threads and asyncio tasks (and mixes of both)
+- Token streams are buffered so every caller receives the full stream
+- Counts how many requests were coalesced
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+class _Call:
+    """One in-flight call and the callers waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def finish(self, result: Any = None, error: BaseException = None):
+        self.result = result
+        self.error = error
+        self.done.set()
+        for loop, future in list(self.async_waiters):
+            loop.call_soon_threadsafe(self._resolve, future)
+
+    def _resolve(self, future: asyncio.Future):
+        if future.done():
+            return
+        if self.error is not None:
+            future.set_exception(self.error)
+        else:
+            future.set_result(self.result)
+
+    def get(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class _Stream:
+    """Buffered output of an in-flight generator, replayable by any number of readers."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.finished = False
+        self.error: BaseException = None
+        self.condition = threading.Condition()
+
+    def produce(self, source_fn: Callable[[], Iterable[Any]]):
+        try:
+            for chunk in source_fn():
+                with self.condition:
+                    self.chunks.append(chunk)
+                    self.condition.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def wait_for(self, index: int) -> Tuple[bool, Any]:
+        """Block until chunk `index` exists or the stream ends. Returns (has_chunk, chunk)."""
+        with self.condition:
+            while index >= len(self.chunks) and not self.finished:
+                self.condition.wait()
+            if index < len(self.chunks):
+                return True, self.chunks[index]
+            if self.error is not None:
+                raise self.error
+            return False, None
+
+    def read(self) -> Iterator[Any]:
+        index = 0
+        while True:
+            has_chunk, chunk = self.wait_for(index)
+            if not has_chunk:
+                return
+            yield chunk
+            index += 1
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+
+    While a call for a key is running, further calls with the same key don't
+    run their own work; they wait for the running call and get its result (or
+    its exception). Once the call finishes the key is released, so later calls
+    run fresh.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Stream] = {}
+        self.coalesced_count = 0
+        self.executed_count = 0
+
+    def _join(self, key: str) -> Tuple[_Call, bool]:
+        """Get the in-flight call for a key, creating it if needed. Returns (call, is_leader)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced_count += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            self.executed_count += 1
+            return call, True
+
+    def _release(self, key: str, call: _Call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key (blocking).
+
+        Args:
+            key: Fingerprint identifying identical requests
+            fn: Function doing the work
+
+        Returns:
+            Result of fn, shared by all coalesced callers
+        """
+        call, is_leader = self._join(key)
+        if not is_leader:
+            call.done.wait()
+            return call.get()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._release(key, call)
+            call.finish(error=e)
+            raise
+        self._release(key, call)
+        call.finish(result=result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async version of do(). Coalesces with both async and threaded callers.
+
+        Args:
+            key: Fingerprint identifying identical requests
+            fn: Coroutine function doing the work
+
+        Returns:
+            Result of fn, shared by all coalesced callers
+        """
+        call, is_leader = self._join(key)
+        if not is_leader:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            with self._lock:
+                call.async_waiters.append((loop, future))
+            if call.done.is_set():
+                call._resolve(future)
+            return await future
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._release(key, call)
+            call.finish(error=e)
+            raise
+        self._release(key, call)
+        call.finish(result=result)
+        return result
+
+    def _join_stream(self, key: str, source_fn: Callable[[], Iterable[Any]]) -> _Stream:
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None:
+                self.coalesced_count += 1
+                return stream
+            stream = _Stream()
+            self._streams[key] = stream
+            self.executed_count += 1
+
+        def run():
+            try:
+                stream.produce(source_fn)
+            finally:
+                with self._lock:
+                    if self._streams.get(key) is stream:
+                        del self._streams[key]
+
+        # The producer runs on its own thread so one reader stopping early
+        # doesn't stall the others
+        threading.Thread(target=run, daemon=True).start()
+        return stream
+
+    def stream(self, key: str, source_fn: Callable[[], Iterable[Any]]) -> Iterator[Any]:
+        """
+        Share one generator between concurrent callers with the same key.
+
+        Every caller receives the full stream from the start, including chunks
+        produced before it joined.
+
+        Args:
+            key: Fingerprint identifying identical requests
+            source_fn: Function returning the iterable to share (e.g. an LLM token stream)
+
+        Yields:
+            Chunks of the shared stream
+        """
+        yield from self._join_stream(key, source_fn).read()
+
+    async def astream(self, key: str, source_fn: Callable[[], Iterable[Any]]) -> AsyncIterator[Any]:
+        """
+        Async version of stream(). Waiting happens off the event loop.
+
+        Args:
+            key: Fingerprint identifying identical requests
+            source_fn: Function returning the iterable to share
+
+        Yields:
+            Chunks of the shared stream
+        """
+        stream = self._join_stream(key, source_fn)
+        loop = asyncio.get_running_loop()
+        index = 0
+        while True:
+            has_chunk, chunk = await loop.run_in_executor(None, stream.wait_for, index)
+            if not has_chunk:
+                return
+            yield chunk
+            index += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary with executed, coalesced and in-flight request counts
+        """
+        with self._lock:
+            return {
+                "executed": self.executed_count,
+                "coalesced": self.coalesced_count,
+                "in_flight": len(self._calls) + len(self._streams)
+            }
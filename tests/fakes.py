@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+import httpx
+import openai
+from prompt_engineer import PromptEngineer
+from singleflight import SingleFlight
+
+
+class FakeLLM:
+    """Stand-in for ChatOpenAI that counts calls, including how many run at once."""
+
+    temperature = 0.7
+
+    def __init__(self, delay: float = 0.0, reply=None, error: Exception = None):
+        """
+        Args:
+            delay: Seconds each call takes
+            reply: Function of the messages giving the answer (default: "generated");
+                it may raise to fail a call
+            error: Exception raised by every call
+        """
+        self.delay = delay
+        self.reply = reply
+        self.error = error
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+        self.options = None
+        self._lock = threading.Lock()
+
+    def _start(self, options):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.options = options
+
+    def _finish(self):
+        with self._lock:
+            self.running -= 1
+
+    def _delay(self, options):
+        """Time the call takes: the model's delay, cut off at the call's timeout."""
+        timeout = options.get("timeout")
+        return self.delay if timeout is None else min(self.delay, timeout)
+
+    def _response(self, messages, options):
+        if options.get("timeout") is not None and self.delay > options["timeout"]:
+            raise openai.APITimeoutError(request=httpx.Request("POST", "http://localhost/v1/chat/completions"))
+        if self.error:
+            raise self.error
+        content = self.reply(messages) if self.reply else "generated"
+        return SimpleNamespace(content=content, usage_metadata={"output_tokens": 120})
+
+    def invoke(self, messages, **options):
+        self._start(options)
+        try:
+            time.sleep(self._delay(options))
+            return self._response(messages, options)
+        finally:
+            self._finish()
+
+    async def ainvoke(self, messages, **options):
+        self._start(options)
+        try:
+            await asyncio.sleep(self._delay(options))
+            return self._response(messages, options)
+        finally:
+            self._finish()
+
+    def stream(self, messages, **options):
+        self._start(options)
+        try:
+            for word in ["one ", "two ", "three"]:
+                time.sleep(self.delay / 3)
+                yield SimpleNamespace(content=word)
+        finally:
+            self._finish()
+
+
+class FakeRAG:
+    """Stand-in for RAGSystem that counts retrievals."""
+
+    persist_directory = "./fake_store"
+
+    def __init__(self, context: str = "context", chunks=None):
+        """
+        Args:
+            context: Context returned for every query
+            chunks: Source -> chunks returned by get_source_chunks()
+        """
+        self.context = context
+        self.chunks = chunks or {}
+        self.retrievals = 0
+
+    def get_context_string(self, query, k=5):
+        self.retrievals += 1
+        return self.context
+
+    def get_source_chunks(self, source):
+        return self.chunks.get(source, [])
+
+
+def make_engineer(llm=None, model="gpt-3.5-turbo"):
+    """PromptEngineer with its own single-flight group answering from a fake model (model=None routes)."""
+    pe = PromptEngineer(api_key="test-key", model=model, single_flight=SingleFlight())
+    pe.llm = llm or FakeLLM()
+    return pe
@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+from context_compressor import ContextCompressor, split_sentences
+from rag_system import RAGSystem
+from local_embeddings import HashingEmbeddings
+from langchain_core.documents import Document
+
+DOCUMENTS = [
+    Document(page_content=(
+        "The course meets twice a week. Photosynthesis converts light energy into chemical energy. "
+        "Office hours are on Fridays. Chlorophyll absorbs the light used in photosynthesis."
+    )),
+    Document(page_content=(
+        "Chlorophyll absorbs the light used in photosynthesis. Homework is due on Mondays. "
+        "The products of photosynthesis are glucose and oxygen."
+    )),
+]
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_keeps_relevant_sentences_in_order():
+    print("Testing extractive compression...")
+    compressor = ContextCompressor(token_budget=40, count_tokens=count_words)
+
+    context, stats = compressor.compress("What is photosynthesis and what does chlorophyll do?", DOCUMENTS)
+
+    assert "Office hours" not in context and "Homework" not in context
+    assert context.index("Photosynthesis converts") < context.index("Chlorophyll absorbs")
+    assert context.count("Chlorophyll absorbs") == 1
+    assert "[Source 1]" in context and "[Source 2]" in context
+    assert stats["context_tokens"] < stats["original_tokens"]
+    assert stats["compression_ratio"] > 1
+    print(f"Compressed {stats['original_tokens']} -> {stats['context_tokens']} tokens")
+
+
+def test_token_budget_respected():
+    print("Testing token budget...")
+    compressor = ContextCompressor(token_budget=12, count_tokens=count_words)
+
+    context, _ = compressor.compress("photosynthesis glucose oxygen", DOCUMENTS)
+    sentences = [s for s in split_sentences(context) if not s.startswith("[Source")]
+
+    assert sum(count_words(s) for s in sentences) <= 12
+    assert any("glucose" in s for s in sentences)
+    print(f"Kept: {sentences}")
+
+
+def test_rag_system_compresses_context():
+    print("Testing compression in RAGSystem...")
+    directory = tempfile.mkdtemp()
+    try:
+        rag = RAGSystem(
+            persist_directory=directory,
+            embeddings=HashingEmbeddings(),
+            compressor=ContextCompressor(token_budget=30, embeddings=HashingEmbeddings())
+        )
+        rag.add_documents(DOCUMENTS)
+
+        retrieved = rag.get_context("photosynthesis products glucose", k=2)
+
+        assert "glucose" in retrieved["context"]
+        assert retrieved["compression_ratio"] > 1
+        assert rag.get_context_string("photosynthesis products glucose", k=2) == retrieved["context"]
+        print(f"Compression ratio: {retrieved['compression_ratio']:.1f}x")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("Running context compression tests...\n")
+
+    try:
+        test_keeps_relevant_sentences_in_order()
+        test_token_budget_respected()
+        test_rag_system_compresses_context()
+        print("\nAll context compression tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
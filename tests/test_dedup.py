@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+from dedup import MinHasher, NearDuplicateIndex
+from rag_system import RAGSystem
+from local_embeddings import HashingEmbeddings
+from langchain_core.documents import Document
+
+DEFINITION = (
+    "A stack is an abstract data type that serves as a collection of elements with two main "
+    "operations: push, which adds an element to the collection, and pop, which removes the most "
+    "recently added element that was not yet removed."
+)
+UNRELATED = "Mitochondria are membrane-bound organelles that generate most of the chemical energy of the cell."
+
+
+def test_similar_texts_match():
+    print("Testing MinHash/LSH matching...")
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("stack", index.hasher.signature(DEFINITION))
+    index.add("cell", index.hasher.signature(UNRELATED))
+
+    near_copy = DEFINITION.replace("serves as", "acts as").upper()
+    match = index.find(index.hasher.signature(near_copy))
+    assert match is not None and match[0] == "stack"
+    assert index.find(index.hasher.signature("Queues are First-In-First-Out structures used for scheduling.")) is None
+    print(f"Near copy matched with similarity {match[1]:.2f}")
+
+
+def test_index_save_and_load():
+    print("Testing index persistence...")
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "dedup_index.npz")
+        index = NearDuplicateIndex()
+        index.add("stack", index.hasher.signature(DEFINITION))
+        for i in range(5):
+            index.add(f"note{i}", index.hasher.signature(f"Lecture {i} covers a different topic in depth."))
+        index.save(path)
+
+        loaded = NearDuplicateIndex()
+        assert loaded.load(path)
+        assert len(loaded) == 6
+        assert loaded.find(MinHasher().signature(DEFINITION))[0] == "stack"
+        print("Loaded index finds the saved chunk")
+
+        # New signatures go to the journal; the .npz file isn't rewritten
+        modified = os.path.getmtime(path)
+        size = os.path.getsize(path)
+        for i in range(3):
+            loaded.add(f"cell{i}", loaded.hasher.signature(f"{UNRELATED} Variant {i}."))
+        loaded.append(path)
+        assert os.path.getsize(path) == size and os.path.getmtime(path) == modified
+        assert os.path.exists(path + ".journal")
+
+        # A record cut off by a crash is ignored
+        with open(path + ".journal", "ab") as f:
+            f.write(b"\x24\x00partial")
+        reloaded = NearDuplicateIndex()
+        assert reloaded.load(path)
+        assert len(reloaded) == 9
+        assert {"cell0", "cell1", "cell2", "stack"} <= set(reloaded.ids())
+        print("Appended signatures reloaded from the journal")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_ingest_skips_and_links_duplicates():
+    print("Testing deduplication at ingest...")
+    directory = tempfile.mkdtemp()
+    try:
+        rag = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings())
+        stats = rag.add_documents([
+            Document(page_content=DEFINITION, metadata={"source": "lecture_notes.txt"}),
+            Document(page_content=UNRELATED, metadata={"source": "biology.txt"}),
+        ])
+        assert stats["duplicates"] == 0
+
+        stats = rag.add_documents([Document(page_content=DEFINITION + " ", metadata={"source": "slides.pdf"})])
+        assert stats == {"chunks": 1, "added": 0, "duplicates": 1, "dedup_ratio": 1.0}
+
+        stored = rag.vector_store._collection.get(include=["metadatas"])
+        assert len(stored["ids"]) == 2
+        linked = [m for m in stored["metadatas"] if m.get("source") == "lecture_notes.txt"][0]
+        assert linked["duplicate_sources"] == "slides.pdf"
+
+        # The index is persisted with the store
+        reopened = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings())
+        assert reopened.add_documents([Document(page_content=DEFINITION, metadata={"source": "handout.txt"})])["duplicates"] == 1
+        print(f"Stats: {stats}")
+
+        # A failed ingest doesn't link its source to stored chunks
+        def fail(*args, **kwargs):
+            raise RuntimeError("embedding service down")
+        reopened.vector_store.add_documents = fail
+        try:
+            reopened.add_documents([
+                Document(page_content=DEFINITION, metadata={"source": "quiz.txt"}),
+                Document(page_content="Queues are First-In-First-Out structures.", metadata={"source": "quiz.txt"})
+            ])
+            assert False, "expected the ingest to fail"
+        except RuntimeError:
+            pass
+        stored = reopened.vector_store._collection.get(where={"source": "lecture_notes.txt"}, include=["metadatas"])
+        assert "quiz.txt" not in stored["metadatas"][0]["duplicate_sources"]
+        print("Failed ingest left no source links")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("Running deduplication tests...\n")
+
+    try:
+        test_similar_texts_match()
+        test_index_save_and_load()
+        test_ingest_skips_and_links_duplicates()
+        print("\nAll deduplication tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,136 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import shutil
+import tempfile
+import time
+from langchain_core.documents import Document
+from prompt_engineer import GENERATION_ERROR_PREFIX
+from rag_system import RAGSystem
+from local_embeddings import HashingEmbeddings
+from fakes import FakeLLM, FakeRAG, make_engineer
+
+
+def hashed_reply(messages):
+    """Distinct short answer per prompt, so merged summaries differ."""
+    return "summary " + hashlib.sha256(messages[-1].content.encode()).hexdigest()[:8]
+
+
+def failing_reply(marker):
+    def reply(messages):
+        if marker in messages[-1].content:
+            raise RuntimeError("model unavailable")
+        return hashed_reply(messages)
+    return reply
+
+
+def make_document(sections, words_per_section=200):
+    chunks = [
+        Document(
+            page_content=" ".join(f"section{i}word{j}" for j in range(words_per_section)),
+            metadata={"source": "notes.pdf", "page": i}
+        )
+        for i in range(sections)
+    ]
+    return FakeRAG(chunks={"notes.pdf": chunks})
+
+
+def test_map_runs_concurrently_and_is_cached():
+    print("Testing concurrent, cached map step...")
+    llm = FakeLLM(delay=0.1, reply=hashed_reply)
+    pe = make_engineer(llm)
+    rag = make_document(sections=6)
+    events = []
+
+    start = time.time()
+    result = pe.generate_from_document(
+        "notes.pdf", rag, group_tokens=800, max_workers=3,
+        progress=lambda stage, done, total: events.append((stage, done, total))
+    )
+    elapsed = time.time() - start
+
+    assert result["chunks"] == 6
+    assert result["sections"] == 6
+    assert result["content"].startswith("summary ")
+    assert result["topic"] == "notes.pdf"
+    assert llm.peak == 3
+    assert elapsed < 0.6
+    assert [e for e in events if e[0] == "map"] == [("map", i, 6) for i in range(1, 7)]
+    print(f"{result['sections']} sections in {elapsed:.2f}s, at most {llm.peak} calls at once")
+
+    calls = llm.calls
+    again = pe.generate_from_document("notes.pdf", rag, group_tokens=800, max_workers=3)
+    assert again["content"] == result["content"]
+    assert llm.calls - calls == result["reduce_levels"]
+    print(f"Regeneration made {llm.calls - calls} calls instead of {calls}")
+
+
+def test_hierarchical_reduce():
+    print("Testing hierarchical reduce...")
+    pe = make_engineer(FakeLLM(reply=hashed_reply))
+    rag = make_document(sections=12, words_per_section=40)
+
+    # Each summary is about 5 tokens, so 12 of them don't fit in 20 tokens
+    result = pe.generate_from_document("notes.pdf", rag, group_tokens=20, max_workers=4)
+    assert result["sections"] == 12
+    assert result["reduce_levels"] >= 2
+    assert result["content"].startswith("summary ")
+    print(f"{result['sections']} sections merged in {result['reduce_levels']} levels")
+
+
+def test_failures_and_missing_source():
+    print("Testing failures...")
+    pe = make_engineer(FakeLLM(reply=failing_reply("section3word0")))
+    rag = make_document(sections=5)
+
+    result = pe.generate_from_document("notes.pdf", rag, group_tokens=800)
+    assert result["content"].startswith(GENERATION_ERROR_PREFIX)
+    assert len(pe._map_cache) < 5
+
+    missing = pe.generate_from_document("other.pdf", rag)
+    assert missing["chunks"] == 0
+    assert "No content found" in missing["content"]
+    print("Failed call aborted the run; missing source reported")
+
+
+def test_document_with_duplicate_chunks():
+    print("Testing a document stored mostly as near-duplicates...")
+    directory = tempfile.mkdtemp()
+    try:
+        rag = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings())
+        notes = "\n\n".join(
+            f"Lecture section {i}. " + " ".join(f"Topic{i} concept{j} explains idea{j} with example{j}." for j in range(25))
+            for i in range(6)
+        )
+        extra = "Revision note: the exam covers osmosis, diffusion and active transport across membranes."
+        rag.add_documents([Document(page_content=notes, metadata={"source": "lecture_notes.txt"})])
+        assert rag.list_sources() == ["lecture_notes.txt"]
+
+        stats = rag.add_documents([Document(page_content=notes + "\n\n" + extra, metadata={"source": "handout.txt"})])
+        assert stats["duplicates"] > 0
+        assert rag.list_sources() == ["handout.txt", "lecture_notes.txt"]
+
+        chunks = rag.get_source_chunks("handout.txt")
+        assert len(chunks) == stats["chunks"]
+        assert "osmosis" in chunks[-1].page_content
+        assert chunks[0].page_content.startswith("Lecture section 0.")
+        print(f"Handout has {len(chunks)} chunks, {stats['duplicates']} shared with the notes")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("Running document summary tests...\n")
+
+    try:
+        test_map_runs_concurrently_and_is_cached()
+        test_hierarchical_reduce()
+        test_failures_and_missing_source()
+        test_document_with_duplicate_chunks()
+        print("\nAll document summary tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluate_retrieval import evaluate_config, mark_pareto
+from local_embeddings import HashingEmbeddings
+from langchain_core.documents import Document
+
+DOCUMENTS = [
+    Document(page_content="Mitochondria are the powerhouse of the cell and produce ATP.", metadata={"source": "bio.txt"}),
+    Document(page_content="A stack is a Last-In-First-Out data structure.", metadata={"source": "cs.txt"}),
+    Document(page_content="Quicksort and mergesort are common sorting algorithms.", metadata={"source": "cs.txt"}),
+]
+
+QUERIES = [
+    {"query": "What produces ATP in the cell?", "expected_source": "bio.txt"},
+    {"query": "What is a stack?", "expected_text": "Last-In-First-Out"},
+]
+
+
+def test_evaluate_config_metrics():
+    print("Testing retrieval evaluation...")
+    results = evaluate_config(DOCUMENTS, QUERIES, chunk_size=64, chunk_overlap=0, ks=[1, 3], embeddings=HashingEmbeddings(), repeats=1)
+
+    assert [r["k"] for r in results] == [1, 3]
+    assert results[1]["recall_at_k"] == 1.0
+    assert 0 < results[0]["mrr"] <= 1.0
+    assert results[0]["mean_context_tokens"] < results[1]["mean_context_tokens"]
+    assert results[0]["p95_latency_ms"] > 0
+    print(f"recall@1={results[0]['recall_at_k']:.2f} recall@3={results[1]['recall_at_k']:.2f}")
+
+
+def test_pareto_front():
+    print("Testing Pareto front...")
+    results = [
+        {"recall_at_k": 0.9, "mean_context_tokens": 500, "p95_latency_ms": 2.0},
+        {"recall_at_k": 0.8, "mean_context_tokens": 600, "p95_latency_ms": 3.0},
+        {"recall_at_k": 0.7, "mean_context_tokens": 200, "p95_latency_ms": 2.5},
+    ]
+    mark_pareto(results)
+
+    assert [r["pareto"] for r in results] == [True, False, True]
+    print("Dominated configuration excluded from the front")
+
+
+if __name__ == "__main__":
+    print("Running retrieval evaluation tests...\n")
+
+    try:
+        test_evaluate_config_metrics()
+        test_pareto_front()
+        print("\nAll retrieval evaluation tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,135 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import httpx
+import openai
+import openai_client
+from model_router import ModelRouter, ModelProfile, LatencyHistogram, LATENCY_BUCKETS
+from prompt_engineer import GENERATION_ERROR_PREFIX
+from fakes import FakeLLM, make_engineer
+
+
+def test_short_requests_get_fast_model():
+    print("Testing routing by content type...")
+    router = ModelRouter()
+
+    assert router.route("summary", prompt_tokens=500).primary == "gpt-3.5-turbo"
+    assert router.route("quiz", prompt_tokens=500).primary == "gpt-4o-mini"
+    print("Summary -> gpt-3.5-turbo, quiz -> gpt-4o-mini")
+
+
+def test_large_prompt_skips_small_context_window():
+    print("Testing context window filter...")
+    router = ModelRouter()
+
+    decision = router.route("summary", prompt_tokens=50000)
+    assert "gpt-3.5-turbo" not in decision.models
+    print(f"50k token prompt routed to {decision.primary}")
+
+
+def test_observed_latency_feeds_back():
+    print("Testing latency feedback...")
+    router = ModelRouter(min_samples=3)
+
+    for _ in range(5):
+        router.record_success("gpt-3.5-turbo", latency=30.0, output_tokens=300)
+    decision = router.route("summary", prompt_tokens=500, latency_budget=10)
+
+    assert decision.primary == "gpt-4o-mini"
+    assert router.stats()["gpt-3.5-turbo"]["calls"] == 5
+    print("Slow observations moved summaries to another model")
+
+
+def test_rate_limited_model_cools_down():
+    print("Testing rate-limit cool-down...")
+    router = ModelRouter()
+
+    router.record_rate_limited("gpt-4o-mini")
+    decision = router.route("quiz", prompt_tokens=500)
+    assert decision.primary == "gpt-4o"
+    assert router.stats()["gpt-4o-mini"]["cooling_down"]
+    print("Rate-limited model avoided")
+
+
+def test_histogram_quantiles():
+    print("Testing latency histogram...")
+    histogram = LatencyHistogram(LATENCY_BUCKETS)
+    for value in [0.3] * 90 + [10.0] * 10:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) < 0.5
+    assert 8 <= histogram.quantile(0.95) <= 16
+    print(f"p50={histogram.quantile(0.5):.2f}s p95={histogram.quantile(0.95):.2f}s")
+
+
+def test_falls_back_when_rate_limited():
+    print("Testing fallback on rate limit...")
+    pe = make_engineer(model=None)
+    response = httpx.Response(429, request=httpx.Request("POST", "http://localhost/v1/chat/completions"))
+    pe._llms["gpt-4o-mini"] = FakeLLM(error=openai.RateLimitError("slow down", response=response, body=None))
+
+    content = pe.generate_content("practice_problems", "Fractions", latency_budget=60)
+    assert content == "generated"
+    stats = pe.get_routing_stats()
+    assert stats["gpt-4o-mini"]["failures"] == 1
+    assert stats["gpt-3.5-turbo"]["calls"] == 1
+    print("Fell back to a faster model after a rate limit")
+
+    # Only the model with a fallback skips retries; every call has a timeout
+    assert pe._llms["gpt-4o-mini"].options["extra_headers"] == {openai_client.NO_RETRY_HEADER: "1"}
+    assert "extra_headers" not in pe.llm.options
+    assert pe._llms["gpt-4o-mini"].options["timeout"] < 60
+    assert pe.llm.options["timeout"] <= 60
+    print("Calls carry their timeout and the primary isn't retried")
+
+
+def test_timeouts_fit_one_budget():
+    print("Testing the latency budget across fallbacks...")
+    router = ModelRouter()
+    for content_type, budget in [("practice_problems", 20), ("quiz", 5)]:
+        decision = router.route(content_type, prompt_tokens=500, latency_budget=budget)
+        assert all(timeout <= budget for timeout in decision.timeouts.values())
+        fallback = decision.models[1]
+        if decision.predicted_latency[fallback] < budget:
+            assert decision.timeouts[decision.primary] + decision.predicted_latency[fallback] <= budget
+    print("No model may run past the request's budget")
+
+    # Fast profiles so both models are predicted to fit a 1s budget
+    pe = make_engineer(model=None)
+    pe.router = ModelRouter(models=[
+        ModelProfile("gpt-3.5-turbo", quality=1, tokens_per_second=3000, base_latency=0.05, context_window=16385, cost_per_1k_tokens=0.001),
+        ModelProfile("gpt-4o-mini", quality=2, tokens_per_second=2000, base_latency=0.1, context_window=128000, cost_per_1k_tokens=0.0004),
+    ])
+    pe._llms["gpt-4o-mini"] = FakeLLM(delay=5)
+    pe.llm = FakeLLM(delay=5)
+
+    start = time.monotonic()
+    content = pe.generate_content("practice_problems", "Fractions", latency_budget=1.0)
+    elapsed = time.monotonic() - start
+
+    assert content.startswith(GENERATION_ERROR_PREFIX)
+    assert pe._llms["gpt-4o-mini"].calls == 1
+    assert pe.llm.calls == 1
+    assert pe._llms["gpt-4o-mini"].options["timeout"] + pe.llm.options["timeout"] <= 1.0
+    assert elapsed < 1.3
+    print(f"Slow primary and fallback gave up after {elapsed:.2f}s of a 1s budget")
+
+
+if __name__ == "__main__":
+    print("Running model router tests...\n")
+
+    try:
+        test_short_requests_get_fast_model()
+        test_large_prompt_skips_small_context_window()
+        test_observed_latency_feeds_back()
+        test_rate_limited_model_cools_down()
+        test_histogram_quantiles()
+        test_falls_back_when_rate_limited()
+        test_timeouts_fit_one_budget()
+        print("\nAll model router tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
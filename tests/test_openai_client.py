@@ -0,0 +1,185 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import openai
+import openai_client
+from openai_client import ClientSettings, TokenBucket, DeadlineExceeded, build_http_client
+
+CHAT_RESPONSE = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-3.5-turbo",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello from stub"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}
+}
+
+
+def start_stub_server(failures: int, status: int = 429, delay: float = 0.0):
+    """Start a local OpenAI stub that fails `failures` times before answering."""
+    state = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            state["requests"] += 1
+            if delay:
+                threading.Event().wait(delay)
+            if state["requests"] <= failures:
+                body = json.dumps({"error": {"message": "slow down"}}).encode()
+                self.send_response(status)
+            else:
+                body = json.dumps(CHAT_RESPONSE).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def make_client(**overrides):
+    settings = ClientSettings(backoff_base=0.01, backoff_max=0.05, **overrides)
+    return build_http_client(settings, TokenBucket(settings.requests_per_minute, settings.tokens_per_minute))
+
+
+def test_retries_rate_limited_requests():
+    print("Testing retry on 429...")
+    server, state = start_stub_server(failures=2)
+    try:
+        client = openai.OpenAI(
+            api_key="test-key",
+            base_url=f"http://127.0.0.1:{server.server_port}/v1",
+            http_client=make_client(),
+            max_retries=0
+        )
+        completion = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": "Hi"}]
+        )
+        assert completion.choices[0].message.content == "Hello from stub"
+        assert state["requests"] == 3
+        print("Request succeeded after 2 retries")
+    finally:
+        server.shutdown()
+
+
+def test_gives_up_after_max_retries():
+    print("Testing retry limit...")
+    server, state = start_stub_server(failures=10, status=503)
+    try:
+        response = make_client(max_retries=2).post(f"http://127.0.0.1:{server.server_port}/v1/chat/completions", json={})
+        assert response.status_code == 503
+        assert state["requests"] == 3
+        print("Returned the last error after 3 attempts")
+    finally:
+        server.shutdown()
+
+
+def test_deadline_exceeded():
+    print("Testing request deadline...")
+    server, _ = start_stub_server(failures=0, delay=1.0)
+    try:
+        client = make_client(deadline=0.2)
+        try:
+            client.post(f"http://127.0.0.1:{server.server_port}/v1/chat/completions", json={})
+            assert False, "expected a timeout"
+        except (DeadlineExceeded, httpx.TimeoutException):
+            print("Request stopped at its deadline")
+    finally:
+        server.shutdown()
+
+
+def test_per_call_timeout_and_no_retry():
+    print("Testing per-call timeout and retry opt-out...")
+    server, state = start_stub_server(failures=10)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+        response = make_client().post(url, json={}, headers={openai_client.NO_RETRY_HEADER: "1"})
+        assert response.status_code == 429
+        assert state["requests"] == 1
+        print("Request with the no-retry header was sent once")
+    finally:
+        server.shutdown()
+
+    server, _ = start_stub_server(failures=0, delay=1.0)
+    try:
+        try:
+            make_client().post(f"http://127.0.0.1:{server.server_port}/v1/chat/completions", json={}, timeout=0.2)
+            assert False, "expected a timeout"
+        except (DeadlineExceeded, httpx.TimeoutException):
+            print("Per-call timeout shortened the deadline")
+    finally:
+        server.shutdown()
+
+
+def test_token_bucket_waits_when_empty():
+    print("Testing token bucket...")
+    bucket = TokenBucket(requests_per_minute=60, tokens_per_minute=600)
+
+    assert bucket.reserve(300) == 0
+    assert bucket.reserve(300) == 0
+    wait = bucket.reserve(60)
+    assert 5.5 < wait <= 6.0
+    print(f"Third reservation waits {wait:.1f}s for tokens to refill")
+
+
+def test_rejected_reservations_are_not_charged():
+    print("Testing rejected reservations...")
+    bucket = TokenBucket(requests_per_minute=60, tokens_per_minute=10**6)
+
+    accepted = sum(1 for _ in range(200) if bucket.reserve(1, max_wait=5.0) < 5.0)
+    assert accepted <= 65, accepted
+    # Only the accepted callers are waiting, so the debt stays under the caller's limit
+    wait = bucket.reserve(1)
+    assert wait <= 6.0, wait
+    print(f"{accepted} of 200 callers admitted, next caller waits {wait:.1f}s")
+
+
+def test_configure_keeps_existing_clients_open():
+    print("Testing reconfiguration...")
+    server, state = start_stub_server(failures=0)
+    try:
+        openai_client.configure(ClientSettings())
+        old_client = openai_client.get_http_client()
+        openai_client.configure(ClientSettings())
+        assert openai_client.get_http_client() is not old_client
+
+        response = old_client.post(f"http://127.0.0.1:{server.server_port}/v1/chat/completions", json={})
+        assert response.status_code == 200
+        print("Clients handed out before configure() still work")
+
+        openai_client.close()
+        assert old_client.is_closed
+        print("close() closes replaced clients")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    print("Running OpenAI client tests...\n")
+
+    try:
+        test_retries_rate_limited_requests()
+        test_gives_up_after_max_retries()
+        test_deadline_exceeded()
+        test_per_call_timeout_and_no_retry()
+        test_token_bucket_waits_when_empty()
+        test_rejected_reservations_are_not_charged()
+        test_configure_keeps_existing_clients_open()
+        print("\nAll OpenAI client tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
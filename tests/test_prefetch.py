@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from prefetch import RetrievalPrefetcher
+from langchain_core.documents import Document
+
+
+class FakeRetriever:
+    """Stand-in for RAGSystem.retrieve_relevant_context that records queries."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.queries = []
+
+    def __call__(self, query, k):
+        self.queries.append(query)
+        time.sleep(self.delay)
+        return [Document(page_content=f"About {query}")]
+
+
+def test_prefetched_result_reused():
+    print("Testing prefetch reuse...")
+    retriever = FakeRetriever()
+    prefetcher = RetrievalPrefetcher(retriever, settle_seconds=0.01)
+
+    prefetcher.schedule("Photosynthesis")
+    time.sleep(0.2)
+    docs = prefetcher.get("  photosynthesis ")
+
+    assert docs[0].page_content == "About Photosynthesis"
+    assert retriever.queries == ["Photosynthesis"]
+    assert prefetcher.stats()["hits"] == 1
+    print("Submitted request reused the prefetched context")
+
+
+def test_stale_prefetch_cancelled():
+    print("Testing stale prefetch cancellation...")
+    retriever = FakeRetriever()
+    prefetcher = RetrievalPrefetcher(retriever, settle_seconds=0.1)
+
+    prefetcher.schedule("Photo")
+    prefetcher.schedule("Photosynthesis")
+    time.sleep(0.3)
+
+    assert retriever.queries == ["Photosynthesis"]
+    assert prefetcher.stats()["cancelled"] == 1
+    assert prefetcher.get("Photo") is None
+    print("Only the settled topic was retrieved")
+
+
+def test_callers_dont_cancel_each_other():
+    print("Testing prefetches from several callers...")
+    retriever = FakeRetriever()
+    prefetcher = RetrievalPrefetcher(retriever, settle_seconds=0.1)
+
+    prefetcher.schedule("Photosynthesis", caller="alice")
+    prefetcher.schedule("Cells", caller="bob")
+    prefetcher.schedule("Cell division", caller="bob")
+    time.sleep(0.3)
+
+    assert sorted(retriever.queries) == ["Cell division", "Photosynthesis"]
+    assert prefetcher.stats()["cancelled"] == 1
+    assert prefetcher.get("Photosynthesis") is not None
+    print("Each caller's newer topic only cancelled its own prefetch")
+
+
+def test_submit_before_settled_runs_immediately():
+    print("Testing submit before the topic settled...")
+    retriever = FakeRetriever()
+    prefetcher = RetrievalPrefetcher(retriever, settle_seconds=5.0)
+
+    prefetcher.schedule("Cells")
+    start = time.monotonic()
+    docs = prefetcher.get("Cells")
+
+    assert docs is not None
+    assert time.monotonic() - start < 1.0
+    assert retriever.queries == ["Cells"]
+    print("Pending prefetch ran right away instead of waiting to settle")
+
+
+def test_invalidate_drops_results():
+    print("Testing invalidation...")
+    retriever = FakeRetriever()
+    prefetcher = RetrievalPrefetcher(retriever, settle_seconds=0.01)
+
+    prefetcher.schedule("Cells")
+    time.sleep(0.2)
+    prefetcher.invalidate()
+
+    assert prefetcher.get("Cells") is None
+    print("Knowledge base change dropped prefetched context")
+
+
+if __name__ == "__main__":
+    print("Running prefetch tests...\n")
+
+    try:
+        test_prefetched_result_reused()
+        test_stale_prefetch_cancelled()
+        test_callers_dont_cancel_each_other()
+        test_submit_before_settled_runs_immediately()
+        test_invalidate_drops_results()
+        print("\nAll prefetch tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
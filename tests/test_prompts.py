@@ -2,7 +2,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import time
 from prompt_engineer import PromptEngineer
+from fakes import FakeLLM, FakeRAG, make_engineer
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -41,6 +43,20 @@ def test_content_type_prompts():
         assert ct in prompts
         print(f"Prompt for '{ct}' exists")
 
+def test_generate_bundle():
+    print("Testing lesson pack generation...")
+    pe = make_engineer(FakeLLM(delay=0.3, reply=lambda messages: messages[1].content.split("\n")[0]))
+    rag = FakeRAG(context="Relevant context")
+
+    start = time.monotonic()
+    results = list(pe.generate_bundle("Photosynthesis", ["study_guide", "quiz", "summary", "quiz"], rag_system=rag))
+    elapsed = time.monotonic() - start
+
+    assert sorted(r["content_type"] for r in results) == ["quiz", "study_guide", "summary"]
+    assert rag.retrievals == 1
+    assert elapsed < 0.8
+    print(f"Generated 3 content types from 1 retrieval in {elapsed:.1f}s")
+
 if __name__ == "__main__":
     print("Running prompt engineering tests...\n")
     
@@ -48,6 +64,7 @@ if __name__ == "__main__":
         test_prompt_initialization()
         test_edge_case_handling()
         test_content_type_prompts()
+        test_generate_bundle()
         print("\nAll prompt engineering tests passed!")
     except Exception as e:
         print(f"\nTest failed: {str(e)}")
@@ -2,8 +2,11 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import subprocess
+import tempfile
 from rag_system import RAGSystem
 from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -44,6 +47,55 @@ def test_context_string():
     print("Context string generated successfully")
     print(f"Context length: {len(context)} characters")
 
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Offline embedding model that counts how many texts it embedded."""
+
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def test_snapshot_round_trip():
+    print("Testing snapshot export and import...")
+    source = RAGSystem(persist_directory=tempfile.mkdtemp(), embeddings=CountingEmbedding(size=16))
+    source.add_documents([
+        Document(page_content="Photosynthesis converts light energy into chemical energy.", metadata={"source": "bio.txt"}),
+        Document(page_content="Python is a high-level programming language.", metadata={"source": "cs.txt"})
+    ])
+    snapshot_path = os.path.join(tempfile.mkdtemp(), "kb.npz")
+    header = source.export_snapshot(snapshot_path)
+    assert header["count"] == 2
+    assert header["embedding_dimension"] == 16
+
+    embeddings = CountingEmbedding(size=16)
+    replica = RAGSystem(persist_directory=tempfile.mkdtemp(), embeddings=embeddings)
+    assert replica.import_snapshot(snapshot_path) == 2
+    assert embeddings.embedded == 0
+
+    exported = source.vector_store._collection.get(include=["documents", "metadatas"])
+    imported = replica.vector_store._collection.get(include=["documents", "metadatas"])
+    assert sorted(exported["documents"]) == sorted(imported["documents"])
+    assert {m["source"] for m in imported["metadatas"]} == {"bio.txt", "cs.txt"}
+    print("Imported 2 chunks without calling the embedding model")
+
+def test_setup_script_snapshot_flags():
+    print("Testing setup script snapshot flags...")
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "setup_knowledge_base.py")
+    workdir = tempfile.mkdtemp()
+    # Exporting and importing an empty knowledge base makes no API calls
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY") or "test-key")
+
+    for flag in ["--export-snapshot", "--import-snapshot"]:
+        result = subprocess.run(
+            [sys.executable, script, flag, "kb.npz"],
+            cwd=workdir, env=env, capture_output=True, text=True, timeout=120
+        )
+        assert result.returncode == 0, result.stderr
+    assert "Imported 0 chunks" in result.stdout
+    print("Snapshot export and import ran from the command line")
+
 if __name__ == "__main__":
     print("Running RAG system tests...\n")
     
@@ -52,6 +104,8 @@ if __name__ == "__main__":
         test_document_loading()
         test_retrieval()
         test_context_string()
+        test_snapshot_round_trip()
+        test_setup_script_snapshot_flags()
         print("\nAll RAG tests passed!")
     except Exception as e:
         print(f"\nTest failed: {str(e)}")
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+import time
+from reranker import CrossEncoderReranker
+from rag_system import RAGSystem
+from local_embeddings import HashingEmbeddings
+from langchain_core.documents import Document
+
+
+class KeywordCrossEncoder:
+    """Fake cross-encoder: scores a pair by how often the query's words appear in the chunk."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.pairs_scored = 0
+        self.batches = 0
+
+    def predict(self, pairs, batch_size=32):
+        time.sleep(self.delay)
+        self.batches += 1
+        self.pairs_scored += len(pairs)
+        return [sum(text.lower().count(word) for word in query.lower().split()) for query, text in pairs]
+
+
+DOCUMENTS = [
+    Document(page_content="Cells divide by mitosis."),
+    Document(page_content="Photosynthesis happens in chloroplasts."),
+    Document(page_content="Photosynthesis converts light; photosynthesis makes glucose."),
+]
+
+
+def test_rerank_orders_and_caches():
+    print("Testing cross-encoder re-ranking...")
+    model = KeywordCrossEncoder()
+    reranker = CrossEncoderReranker(model=model, batch_size=2)
+
+    top = reranker.rerank("photosynthesis", DOCUMENTS, top_n=2)
+    assert top == [DOCUMENTS[2], DOCUMENTS[1]]
+    assert model.batches == 2
+
+    reranker.rerank("Photosynthesis", DOCUMENTS, top_n=2)
+    assert model.pairs_scored == 3
+    assert reranker.stats()["cache_hits"] == 3
+    print(f"Stats: {reranker.stats()}")
+
+
+def test_rerank_falls_back_when_over_budget():
+    print("Testing time budget fallback...")
+    model = KeywordCrossEncoder(delay=0.05)
+    reranker = CrossEncoderReranker(model=model, batch_size=1, time_budget=0.01)
+
+    top = reranker.rerank("photosynthesis", DOCUMENTS, top_n=2)
+
+    assert top == DOCUMENTS[:2]
+    assert model.batches == 1
+    assert reranker.stats()["fallbacks"] == 1
+    print("Kept vector order after the budget ran out")
+
+
+def test_rag_system_reranks_candidates():
+    print("Testing re-ranking in RAGSystem...")
+    directory = tempfile.mkdtemp()
+    try:
+        reranker = CrossEncoderReranker(model=KeywordCrossEncoder(), candidates=3)
+        rag = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings(), reranker=reranker)
+        rag.add_documents(DOCUMENTS)
+
+        docs = rag.retrieve_relevant_context("photosynthesis glucose", k=1)
+
+        assert len(docs) == 1
+        assert "glucose" in docs[0].page_content
+        assert reranker.stats()["reranked"] == 1
+        print(f"Top document: {docs[0].page_content}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("Running re-ranker tests...\n")
+
+    try:
+        test_rerank_orders_and_caches()
+        test_rerank_falls_back_when_over_budget()
+        test_rag_system_reranks_candidates()
+        print("\nAll re-ranker tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_manager import BoundedResultStore, SessionManager, estimate_bytes, process_rss_bytes
+
+
+def test_result_store_bounds():
+    print("Testing bounded result store...")
+    store = BoundedResultStore(max_items=2, max_bytes=10_000)
+    store.put("a", {"content": "first"})
+    store.put("b", {"content": "second"})
+    store.get("a")
+    store.put("c", {"content": "third"})
+
+    # "b" was least recently used
+    assert [key for key, _ in store.items()] == ["c", "a"]
+
+    # A result over the size bound alone replaces the others but is kept
+    store.put("big", {"content": "x" * 20_000})
+    assert [key for key, _ in store.items()] == ["big"]
+    assert store.size_bytes == estimate_bytes({"content": "x" * 20_000})
+    print(f"Kept {len(store)} results, {store.size_bytes} bytes")
+
+    store.put("d", {"content": "fourth"})
+    assert [key for key, _ in store.items()] == ["d"]
+    assert store.size_bytes <= 10_000
+
+
+def test_result_replaced_on_same_key():
+    print("Testing result replacement...")
+    store = BoundedResultStore()
+    store.put("request", {"content": "first version"})
+    store.put("request", {"content": "second version"})
+
+    assert len(store) == 1
+    assert store.get("request")["content"] == "second version"
+    assert store.size_bytes == estimate_bytes({"content": "second version"})
+    print("Regenerated result replaced the stored one")
+
+
+def test_idle_sessions_evicted():
+    print("Testing idle session eviction...")
+    manager = SessionManager(idle_ttl=60, sweep_interval=3600)
+    active = manager.get_session("active")
+    idle = manager.get_session("idle")
+    idle.results.put("k", {"content": "result"})
+    idle.last_seen -= 120
+
+    assert manager.evict_idle() == 1
+    assert len(idle.results) == 0
+
+    stats = manager.stats()
+    assert stats["live_sessions"] == 1
+    assert stats["evicted_sessions"] == 1
+    assert manager.get_session("active") is active
+    print(f"Stats: {stats}")
+
+
+def test_components_shared():
+    print("Testing shared components...")
+    manager = SessionManager()
+    created = []
+
+    def factory():
+        created.append(1)
+        return object(), object()
+
+    first = manager.get_components("key", factory)
+    second = manager.get_components("key", factory)
+
+    assert first is second
+    assert len(created) == 1
+    print("Components created once for all sessions")
+
+
+def test_process_rss():
+    print("Testing process RSS...")
+    rss = process_rss_bytes()
+    assert rss > 0
+    print(f"RSS: {rss / (1024 * 1024):.0f} MB")
+
+
+if __name__ == "__main__":
+    print("Running session manager tests...\n")
+
+    try:
+        test_result_store_bounds()
+        test_result_replaced_on_same_key()
+        test_idle_sessions_evicted()
+        test_components_shared()
+        test_process_rss()
+        print("\nAll session manager tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
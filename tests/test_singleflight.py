@@ -0,0 +1,126 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from prompt_engineer import PromptEngineer
+from model_router import ModelRouter, DEFAULT_MODELS
+from singleflight import SingleFlight
+from fakes import FakeLLM, FakeRAG, make_engineer
+
+
+def test_threads_share_one_call():
+    print("Testing coalescing across threads...")
+    pe = make_engineer(FakeLLM(delay=0.2))
+    rag = FakeRAG()
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(lambda _: pe.generate_with_rag("summary", "Photosynthesis", rag), range(10)))
+
+    assert all(r["content"] == "generated" for r in results)
+    assert pe.llm.calls == 1
+    assert rag.retrievals == 1
+    assert pe.get_coalescing_stats()["coalesced"] == 9
+    print("10 concurrent requests made 1 retrieval and 1 LLM call")
+
+
+def test_async_tasks_share_one_call():
+    print("Testing coalescing across asyncio tasks...")
+    pe = make_engineer(FakeLLM(delay=0.2))
+    rag = FakeRAG()
+
+    async def run():
+        return await asyncio.gather(*[
+            pe.agenerate_with_rag("summary", "Photosynthesis", rag) for _ in range(10)
+        ])
+
+    results = asyncio.run(run())
+    assert len(results) == 10
+    assert pe.llm.calls == 1
+    print("10 concurrent tasks made 1 LLM call")
+
+
+def test_different_requests_not_coalesced():
+    print("Testing distinct requests...")
+    pe = make_engineer(FakeLLM(delay=0.2))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda t: pe.generate_content("summary", t), ["Cells", "Atoms"]))
+
+    assert pe.llm.calls == 2
+    print("Different topics ran separately")
+
+
+def test_stream_shared_between_callers():
+    print("Testing shared token stream...")
+    pe = make_engineer(FakeLLM(delay=0.2))
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        streams = list(pool.map(lambda _: "".join(pe.stream_content("quiz", "Cells")), range(5)))
+
+    assert streams == ["one two three"] * 5
+    assert pe.llm.calls == 1
+    print("5 readers received the full stream from 1 LLM call")
+
+
+def test_engineers_with_different_keys_or_models_not_coalesced():
+    print("Testing engineers sharing one single-flight group...")
+    flight = SingleFlight()
+    engineers = [
+        PromptEngineer(api_key="key-a", model="gpt-3.5-turbo", single_flight=flight),
+        PromptEngineer(api_key="key-b", model="gpt-3.5-turbo", single_flight=flight),
+        PromptEngineer(api_key="key-a", single_flight=flight),
+        PromptEngineer(api_key="key-a", single_flight=flight, router=ModelRouter(models=DEFAULT_MODELS[:2])),
+        PromptEngineer(api_key="key-a", model="gpt-3.5-turbo", single_flight=flight),
+    ]
+    for pe in engineers:
+        pe.llm = FakeLLM(delay=0.2)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        list(pool.map(lambda pe: pe.generate_content("summary", "Cells"), engineers))
+
+    calls = [pe.llm.calls for pe in engineers]
+    assert calls[1:4] == [1, 1, 1]
+    assert calls[0] + calls[4] == 1
+    assert flight.stats()["coalesced"] == 1
+    print("Only the engineer with the same key and model shared a call")
+
+
+def test_errors_shared_and_key_released():
+    print("Testing error propagation...")
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            flight.do("key", fail)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        assert list(pool.map(lambda _: call(), range(3))) == ["boom"] * 3
+
+    assert flight.do("key", lambda: "fresh") == "fresh"
+    print("Error shared by all waiters and key released afterwards")
+
+
+if __name__ == "__main__":
+    print("Running single-flight tests...\n")
+
+    try:
+        test_threads_share_one_call()
+        test_async_tasks_share_one_call()
+        test_different_requests_not_coalesced()
+        test_stream_shared_between_callers()
+        test_engineers_with_different_keys_or_models_not_coalesced()
+        test_errors_shared_and_key_released()
+        print("\nAll single-flight tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_splitter import StreamingTokenSplitter
+from langchain_core.documents import Document
+
+SAMPLE_TEXT = """Photosynthesis Process
+
+Photosynthesis is the process by which plants convert light energy into chemical energy. The process occurs in two main stages.
+Light-dependent reactions capture light energy and convert it to ATP and NADPH. The Calvin Cycle uses ATP and NADPH to produce glucose.
+
+Factors affecting photosynthesis include light intensity, carbon dioxide concentration, temperature and water availability. """ * 20
+
+
+def test_chunks_respect_token_limit():
+    print("Testing chunk token limit...")
+    splitter = StreamingTokenSplitter(chunk_size=40, chunk_overlap=8, encoding_name=None)
+
+    chunks = splitter.split_text(SAMPLE_TEXT)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert splitter.count_tokens(chunk) <= 40
+    print(f"Split into {len(chunks)} chunks within the token limit")
+
+
+def test_offsets_match_page_text():
+    print("Testing chunk offsets...")
+    splitter = StreamingTokenSplitter(chunk_size=40, chunk_overlap=8, encoding_name=None)
+    page = Document(page_content=SAMPLE_TEXT, metadata={"source": "test.txt"})
+
+    chunks = splitter.split_documents([page])
+    for chunk in chunks:
+        start, end = chunk.metadata["start_index"], chunk.metadata["end_index"]
+        assert SAMPLE_TEXT[start:end] == chunk.page_content
+        assert chunk.metadata["source"] == "test.txt"
+    print("Offsets match the source text")
+
+
+def test_prefers_separators():
+    print("Testing separator hierarchy...")
+    splitter = StreamingTokenSplitter(chunk_size=40, chunk_overlap=0, encoding_name=None)
+
+    chunks = splitter.split_text(SAMPLE_TEXT)
+    for chunk in chunks[:-1]:
+        assert chunk.endswith((".", "Process"))
+    print("Chunks end at sentence or paragraph boundaries")
+
+
+def test_generator_input():
+    print("Testing generator of pages...")
+    splitter = StreamingTokenSplitter(chunk_size=40, chunk_overlap=8, encoding_name=None)
+    pages = (Document(page_content=SAMPLE_TEXT, metadata={"page": i}) for i in range(3))
+
+    chunks = list(splitter.iter_split_documents(pages))
+    assert {chunk.metadata["page"] for chunk in chunks} == {0, 1, 2}
+    print(f"Split 3 pages into {len(chunks)} chunks")
+
+
+if __name__ == "__main__":
+    print("Running text splitter tests...\n")
+
+    try:
+        test_chunks_respect_token_limit()
+        test_offsets_match_page_text()
+        test_prefers_separators()
+        test_generator_input()
+        print("\nAll text splitter tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
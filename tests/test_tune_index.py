@@ -0,0 +1,137 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+from tune_index import exact_neighbors, choose_setting, tune
+from rag_system import RAGSystem, write_index_config
+from local_embeddings import HashingEmbeddings
+from langchain_core.documents import Document
+
+
+def test_exact_neighbors():
+    print("Testing brute-force neighbours...")
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    queries = rng.normal(size=(5, 8)).astype(np.float32)
+
+    result = exact_neighbors(vectors, queries, 3, "l2")
+
+    for query, found in zip(queries, result):
+        expected = np.argsort(np.linalg.norm(vectors - query, axis=1))[:3]
+        assert found.tolist() == expected.tolist()
+    print("Brute-force search matches sorted distances")
+
+
+def test_tune_and_choose():
+    print("Testing index tuning...")
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(200, 16)).astype(np.float32)
+
+    results = tune(vectors, k=5, sample_queries=20, m_values=[8, 16], construction_efs=[100], search_efs=[10, 100])
+    assert len(results) == 4
+    assert all(0.0 <= r["recall_at_k"] <= 1.0 for r in results)
+
+    chosen = choose_setting(results, target_recall=0.0)
+    assert round(chosen["p95_latency_ms"], 2) == round(min(r["p95_latency_ms"] for r in results), 2)
+    assert choose_setting(results, target_recall=1.1) is max(results, key=lambda r: (r["recall_at_k"], -r["p95_latency_ms"]))
+    print(f"Chosen: M={chosen['M']} search_ef={chosen['search_ef']} recall={chosen['recall_at_k']:.2f}")
+
+
+def test_index_settings_applied():
+    print("Testing index settings in RAGSystem...")
+    directory = tempfile.mkdtemp()
+    try:
+        write_index_config(directory, {"space": "cosine", "M": 24, "tuning": {"k": 5}})
+        rag = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings(), index_settings={"search_ef": 40})
+        assert rag.index_settings == {"space": "cosine", "M": 24, "search_ef": 40}
+        assert rag.vector_store._collection.metadata["hnsw:M"] == 24
+
+        rag.add_documents([Document(page_content="Mitochondria produce ATP."), Document(page_content="A stack is LIFO.")])
+        assert rag.rebuild_index({"search_ef": 80}) == 2
+        assert rag.vector_store._collection.metadata["hnsw:search_ef"] == 80
+        assert "ATP" in rag.retrieve_relevant_context("What produces ATP?", k=1)[0].page_content
+
+        rag.clear_knowledge_base()
+        assert os.path.exists(os.path.join(directory, "index_config.json"))
+        print("Settings loaded, overridden and kept through rebuild and clear")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_failed_rebuild_keeps_live_index():
+    print("Testing interrupted index rebuild...")
+    directory = tempfile.mkdtemp()
+    try:
+        rag = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings(), index_settings={"space": "l2"})
+        rag.add_documents([Document(page_content="Mitochondria produce ATP."), Document(page_content="A stack is LIFO.")])
+
+        def fail(*args, **kwargs):
+            raise KeyboardInterrupt()
+        rag._write_chunks = fail
+        try:
+            rag.rebuild_index({"space": "cosine"})
+            assert False, "expected the rebuild to fail"
+        except KeyboardInterrupt:
+            pass
+
+        assert rag.vector_store._collection.count() == 2
+        assert rag.index_settings == {"space": "l2"}
+        assert [c.name for c in rag.vector_store._client.list_collections()] == ["langchain"]
+        print("Live index untouched and the partial rebuild removed")
+
+        # Settings saved later (tuning without --apply) don't change the open collection's
+        write_index_config(directory, {"space": "cosine"})
+        reopened = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings())
+        assert reopened.index_settings == {"space": "l2"}
+        assert reopened.vector_store._client.get_collection("langchain").metadata["hnsw:space"] == "l2"
+        print("Reopened store reports the collection's own settings")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_ingest_during_rebuild_kept():
+    print("Testing ingest while the index is rebuilt...")
+    directory = tempfile.mkdtemp()
+    try:
+        rag = RAGSystem(persist_directory=directory, embeddings=HashingEmbeddings())
+        rag.add_documents([Document(page_content="Mitochondria produce ATP.")])
+
+        write_chunks = rag._write_chunks
+        def slow_write(*args, **kwargs):
+            time.sleep(0.3)
+            return write_chunks(*args, **kwargs)
+        rag._write_chunks = slow_write
+
+        rebuild = threading.Thread(target=rag.rebuild_index, args=({"search_ef": 80},))
+        rebuild.start()
+        time.sleep(0.1)
+        rag.add_documents([Document(page_content="A stack is LIFO.")])
+        rebuild.join()
+
+        assert rag.vector_store._collection.count() == 2
+        assert rag.index_settings["search_ef"] == 80
+        assert "LIFO" in rag.retrieve_relevant_context("What is a LIFO stack?", k=1)[0].page_content
+        print("Chunks added during the rebuild are in the new index")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("Running index tuning tests...\n")
+
+    try:
+        test_exact_neighbors()
+        test_tune_and_choose()
+        test_index_settings_applied()
+        test_failed_rebuild_keeps_live_index()
+        test_ingest_during_rebuild_kept()
+        print("\nAll index tuning tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
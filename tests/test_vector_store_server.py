@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import socket
+import tempfile
+import vector_store_client
+from vector_store_server import VectorStoreServer
+from rag_system import RAGSystem
+from local_embeddings import HashingEmbeddings
+from langchain_core.documents import Document
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def test_parse_url():
+    print("Testing server URL parsing...")
+    assert vector_store_client.parse_url("http://localhost:8000") == ("localhost", 8000, False)
+    assert vector_store_client.parse_url("https://vectors.example.com") == ("vectors.example.com", 443, True)
+    assert vector_store_client.parse_url("db-host:9000") == ("db-host", 9000, False)
+    print("URLs parsed")
+
+
+def test_workers_share_server():
+    print("Testing client/server mode...")
+    if shutil.which("chroma") is None:
+        print("chroma command not installed, skipping")
+        return
+
+    data_directory = tempfile.mkdtemp()
+    worker_directories = [tempfile.mkdtemp(), tempfile.mkdtemp()]
+    try:
+        with VectorStoreServer(path=data_directory, port=free_port()) as server:
+            writer = RAGSystem(persist_directory=worker_directories[0], embeddings=HashingEmbeddings(), vector_store_url=server.url)
+            reader = RAGSystem(persist_directory=worker_directories[1], embeddings=HashingEmbeddings(), vector_store_url=server.url)
+
+            # Both workers use the same pooled connection
+            assert writer.vector_store._client is reader.vector_store._client
+
+            writer.add_documents([Document(page_content="Mitochondria produce ATP for the cell.", metadata={"source": "bio.txt"})])
+            docs = reader.retrieve_relevant_context("What produces ATP?", k=1)
+            assert "ATP" in docs[0].page_content
+
+            # The reader's dedup index picks up chunks the writer stored
+            stats = reader.add_documents([Document(page_content="Mitochondria produce ATP for the cell.", metadata={"source": "slides.txt"})])
+            assert stats["duplicates"] == 1
+
+            reader.clear_knowledge_base()
+            assert writer.vector_store._client.get_collection("langchain").count() == 0
+            print(f"Workers shared the index at {server.url}")
+
+            # The writer keeps working after another worker cleared the knowledge base,
+            # and doesn't treat the cleared chunks as duplicates
+            stats = writer.add_documents([Document(page_content="Mitochondria produce ATP for the cell.", metadata={"source": "bio.txt"})])
+            assert stats["added"] == 1
+            assert "ATP" in writer.retrieve_relevant_context("What produces ATP?", k=1)[0].page_content
+
+            # ...and after another worker swapped in a rebuilt collection
+            reader.rebuild_index({"search_ef": 50})
+            assert "ATP" in writer.retrieve_relevant_context("What produces ATP?", k=1)[0].page_content
+            writer.add_documents([Document(page_content="A stack is a last-in, first-out collection.", metadata={"source": "cs.txt"})])
+            print("Workers recovered from a clear and a rebuild by another worker")
+
+            # Two workers storing the same new chunk at once keep one copy
+            text = "Photosynthesis turns light, water and carbon dioxide into glucose and oxygen."
+            reader._sync_dedup_index = lambda: None
+            writer.add_documents([Document(page_content=text, metadata={"source": "notes.txt"})])
+            reader.add_documents([Document(page_content=text, metadata={"source": "handout.txt"})])
+            stored = writer.vector_store._collection.get(where_document={"$contains": "Photosynthesis"}, include=["metadatas"])
+            assert len(stored["ids"]) == 1
+            assert {stored["metadatas"][0]["source"], stored["metadatas"][0].get("duplicate_sources")} == {"notes.txt", "handout.txt"}
+            print("Concurrent near-duplicates resolved to one chunk")
+    finally:
+        vector_store_client.reset()
+        for directory in [data_directory] + worker_directories:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print("Running vector store server tests...\n")
+
+    try:
+        test_parse_url()
+        test_workers_share_server()
+        print("\nAll vector store server tests passed!")
+    except Exception as e:
+        print(f"\nTest failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
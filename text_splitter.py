@@ -0,0 +1,207 @@
+"""
+Token-Aware Text Splitter
+
+This module implements a single-pass streaming splitter that sizes chunks in
+model tokens instead of characters. It:
+- Tokenizes each page once and walks it with a fixed token window
+- Breaks chunks at the same separator hierarchy as the recursive splitter
+- Accepts any iterable (including generators) of pages
+- Records character offsets of every chunk in its metadata
+"""
+
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+# Rough stand-in for the BPE pre-tokenizer when no tiktoken encoding is available
+_APPROX_TOKEN_PATTERN = re.compile(r" ?[^\W\d_]{1,6}| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+")
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(encoding_name: Optional[str]):
+    """Load a tiktoken encoding, or return None if it can't be loaded (e.g. offline)."""
+    if not encoding_name:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        return None
+
+
+class StreamingTokenSplitter:
+    """
+    Split documents into chunks measured in tokens.
+
+    Each page is tokenized once. A window of `chunk_size` tokens is moved over
+    the page and each chunk is cut at the strongest separator found in the second
+    half of the window, so no chunk is built, measured and merged more than once.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 50,
+        separators: Optional[List[str]] = None,
+        encoding_name: Optional[str] = "cl100k_base"
+    ):
+        """
+        Initialize the splitter.
+
+        Args:
+            chunk_size: Maximum number of tokens per chunk
+            chunk_overlap: Number of tokens shared by consecutive chunks
+            separators: Break points in order of preference (default: paragraph, line, sentence, word)
+            encoding_name: tiktoken encoding used to count tokens. If None or not
+                available, an approximate regex tokenizer is used instead.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if chunk_overlap < 0 or chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or DEFAULT_SEPARATORS
+        self.encoding = _load_encoding(encoding_name)
+
+    def _token_offsets(self, text: str) -> List[int]:
+        """
+        Get the character offset at which each token of the text starts.
+
+        Args:
+            text: Text to tokenize
+
+        Returns:
+            List of character offsets, one per token
+        """
+        if self.encoding is not None:
+            tokens = self.encoding.encode_ordinary(text)
+            _, offsets = self.encoding.decode_with_offsets(tokens)
+            return offsets
+        return [match.start() for match in _APPROX_TOKEN_PATTERN.finditer(text)]
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in a piece of text with the splitter's tokenizer."""
+        if self.encoding is not None:
+            return len(self.encoding.encode_ordinary(text))
+        return sum(1 for _ in _APPROX_TOKEN_PATTERN.finditer(text))
+
+    def _find_break(self, text: str, lo: int, hi: int) -> Optional[int]:
+        """
+        Find the best character position to end a chunk within text[lo:hi].
+
+        Separators are tried in order of preference and the last occurrence wins.
+        Whitespace is left for the next chunk; sentence punctuation stays with this one.
+
+        Returns:
+            Character position to cut at, or None if only a hard cut is possible
+        """
+        for separator in self.separators:
+            if not separator:
+                return None
+            idx = text.rfind(separator, lo, hi)
+            if idx != -1:
+                return idx + len(separator.rstrip())
+        return None
+
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        Walk a text once and yield the chunks it splits into.
+
+        Args:
+            text: Text to split
+
+        Yields:
+            Tuples of (start character, end character, token count)
+        """
+        offsets = self._token_offsets(text)
+        n_tokens = len(offsets)
+        text_length = len(text)
+
+        def char_pos(token_index: int) -> int:
+            return offsets[token_index] if token_index < n_tokens else text_length
+
+        start = 0
+        while start < n_tokens:
+            end = min(start + self.chunk_size, n_tokens)
+
+            if end < n_tokens:
+                # Only look for a break in the second half so chunks don't get too small
+                cut = self._find_break(text, char_pos(start + self.chunk_size // 2), char_pos(end))
+                if cut is not None:
+                    end = bisect_left(offsets, cut, start + 1, end)
+
+            chunk_start, chunk_end = char_pos(start), char_pos(end)
+            while chunk_start < chunk_end and text[chunk_start].isspace():
+                chunk_start += 1
+            while chunk_end > chunk_start and text[chunk_end - 1].isspace():
+                chunk_end -= 1
+            if chunk_start < chunk_end:
+                yield chunk_start, chunk_end, end - start
+
+            if end >= n_tokens:
+                break
+
+            next_start = end - self.chunk_overlap
+            if next_start <= start:
+                next_start = end
+            # Start the overlap on a word boundary when there is one
+            for i in range(next_start, end):
+                if text[offsets[i]].isspace():
+                    next_start = i
+                    break
+            start = next_start
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Split a text into chunks.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of chunk strings
+        """
+        return [text[start:end] for start, end, _ in self.iter_spans(text)]
+
+    def iter_split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Lazily split documents into chunks.
+
+        Pages are consumed one at a time, so a generator over a large file never
+        has to be fully loaded. Chunk metadata gets `start_index` and `end_index`
+        (character offsets in the page) and `token_count`.
+
+        Args:
+            documents: Iterable of Document objects (e.g. pages)
+
+        Yields:
+            Chunk Document objects
+        """
+        for document in documents:
+            text = document.page_content
+            for start, end, token_count in self.iter_spans(text):
+                metadata = dict(document.metadata)
+                metadata.update({
+                    "start_index": start,
+                    "end_index": end,
+                    "token_count": token_count
+                })
+                yield Document(page_content=text[start:end], metadata=metadata)
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """
+        Split documents into chunks.
+
+        Args:
+            documents: Iterable of Document objects
+
+        Returns:
+            List of chunk Document objects
+        """
+        return list(self.iter_split_documents(documents))
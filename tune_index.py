@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Vector index tuning
+
+Finds HNSW settings (M, construction_ef, search_ef) for the knowledge base that
+reach a target recall at the lowest query latency:
+- Samples chunks from the knowledge base and uses their stored embeddings as
+  queries (held out of the index, so no embedding API calls are needed)
+- Computes the exact top-k neighbours of each query by brute-force search
+- Builds a test index for each setting in the grid and measures recall@k
+  against the exact results, query latency and build time
+- Saves the fastest setting that meets the target recall to index_config.json
+  in the vector store directory, where RAGSystem picks it up
+
+Usage:
+    python tune_index.py
+    python tune_index.py --target-recall 0.98 --k 8 --apply
+    python tune_index.py --m-values 16,32 --search-ef 20,50,100 --format json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import chromadb
+import numpy as np
+from dotenv import load_dotenv
+
+from evaluate_retrieval import parse_ints, percentile
+from rag_system import RAGSystem, read_index_config, write_index_config
+
+
+def exact_neighbors(index_vectors: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """
+    Find the exact k nearest neighbours of each query by brute force.
+
+    Args:
+        index_vectors: Indexed vectors (n x d)
+        queries: Query vectors (q x d)
+        k: Number of neighbours
+        space: Distance metric: "l2", "cosine" or "ip"
+
+    Returns:
+        Row indices of the neighbours (q x k), nearest first
+    """
+    if space == "cosine":
+        index_vectors = index_vectors / np.maximum(np.linalg.norm(index_vectors, axis=1, keepdims=True), 1e-12)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    if space == "l2":
+        distances = (
+            np.sum(queries ** 2, axis=1, keepdims=True)
+            - 2 * queries @ index_vectors.T
+            + np.sum(index_vectors ** 2, axis=1)
+        )
+    else:
+        distances = -(queries @ index_vectors.T)
+
+    k = min(k, index_vectors.shape[0])
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+    return np.take_along_axis(nearest, order, axis=1)
+
+
+def evaluate_setting(
+    client,
+    index_vectors: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    space: str,
+    m: int,
+    construction_ef: int,
+    search_ef: int,
+    batch_size: int = 1000
+) -> Dict:
+    """
+    Build a test index with one setting and measure recall@k and query latency.
+
+    Args:
+        client: Chroma client used for the test collections
+        index_vectors: Vectors to index
+        queries: Held-out query vectors
+        truth: Exact neighbour indices from exact_neighbors()
+        k: Number of neighbours
+        space: Distance metric
+        m: HNSW M (links per node)
+        construction_ef: HNSW construction_ef
+        search_ef: HNSW search_ef
+        batch_size: Vectors added per write
+
+    Returns:
+        Result dictionary
+    """
+    collection = client.create_collection(
+        name=f"tune-{uuid.uuid4().hex}",
+        metadata={
+            "hnsw:space": space,
+            "hnsw:M": m,
+            "hnsw:construction_ef": construction_ef,
+            "hnsw:search_ef": search_ef
+        }
+    )
+    try:
+        ids = [str(i) for i in range(len(index_vectors))]
+        start = time.perf_counter()
+        for offset in range(0, len(ids), batch_size):
+            collection.add(
+                ids=ids[offset:offset + batch_size],
+                embeddings=index_vectors[offset:offset + batch_size]
+            )
+        build_seconds = time.perf_counter() - start
+
+        recalls, latencies = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = collection.query(query_embeddings=[query.tolist()], n_results=len(expected), include=[])
+            latencies.append(time.perf_counter() - start)
+            found_ids = {int(i) for i in found["ids"][0]}
+            recalls.append(len(found_ids & set(expected.tolist())) / len(expected))
+    finally:
+        client.delete_collection(collection.name)
+
+    return {
+        "space": space,
+        "M": m,
+        "construction_ef": construction_ef,
+        "search_ef": search_ef,
+        "recall_at_k": float(np.mean(recalls)),
+        "p50_latency_ms": percentile(latencies, 0.50) * 1000,
+        "p95_latency_ms": percentile(latencies, 0.95) * 1000,
+        "build_seconds": build_seconds
+    }
+
+
+def choose_setting(results: List[Dict], target_recall: float) -> Optional[Dict]:
+    """
+    Pick the setting with the lowest p95 latency among those reaching the target recall.
+
+    Ties go to the cheaper index (smaller M, then smaller construction_ef).
+    If no setting reaches the target, the one with the highest recall is chosen.
+    """
+    if not results:
+        return None
+    passing = [r for r in results if r["recall_at_k"] >= target_recall]
+    if not passing:
+        return max(results, key=lambda r: (r["recall_at_k"], -r["p95_latency_ms"]))
+    return min(passing, key=lambda r: (round(r["p95_latency_ms"], 2), r["M"], r["construction_ef"], r["search_ef"]))
+
+
+def tune(
+    vectors: np.ndarray,
+    k: int = 5,
+    sample_queries: int = 100,
+    space: str = "l2",
+    m_values: List[int] = (8, 16, 32),
+    construction_efs: List[int] = (100, 200),
+    search_efs: List[int] = (10, 20, 50, 100),
+    seed: int = 0
+) -> List[Dict]:
+    """
+    Evaluate every setting in the grid on a set of embeddings.
+
+    Args:
+        vectors: Embeddings of the knowledge base chunks
+        k: Number of neighbours recall is measured on
+        sample_queries: Number of chunks held out as queries
+        space: Distance metric
+        m_values: HNSW M values to try
+        construction_efs: HNSW construction_ef values to try
+        search_efs: HNSW search_ef values to try
+        seed: Random seed for the query sample
+
+    Returns:
+        One result dictionary per setting
+
+    Raises:
+        ValueError: If there are too few chunks to hold out queries
+    """
+    if len(vectors) < 2 * k:
+        raise ValueError(f"Need at least {2 * k} chunks to tune the index, found {len(vectors)}")
+
+    rng = np.random.default_rng(seed)
+    sample = min(sample_queries, len(vectors) // 2)
+    held_out = rng.choice(len(vectors), size=sample, replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[held_out] = False
+    index_vectors, queries = vectors[mask], vectors[held_out]
+
+    truth = exact_neighbors(index_vectors, queries, k, space)
+    client = chromadb.EphemeralClient()
+
+    results = []
+    for m in m_values:
+        for construction_ef in construction_efs:
+            for search_ef in search_efs:
+                print(f"Evaluating M={m} construction_ef={construction_ef} search_ef={search_ef}...", file=sys.stderr)
+                results.append(evaluate_setting(
+                    client, index_vectors, queries, truth, k, space, m, construction_ef, search_ef
+                ))
+    return results
+
+
+def format_table(results: List[Dict], chosen: Optional[Dict]) -> str:
+    """Format results as a text table, marking the chosen setting."""
+    lines = [
+        f"{'M':>4} {'constr_ef':>10} {'search_ef':>10} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8}  chosen",
+        "-" * 72
+    ]
+    for r in results:
+        lines.append(
+            f"{r['M']:>4} {r['construction_ef']:>10} {r['search_ef']:>10} {r['recall_at_k']:>9.3f} "
+            f"{r['p50_latency_ms']:>8.2f} {r['p95_latency_ms']:>8.2f} {r['build_seconds']:>8.2f}  "
+            f"{'*' if r is chosen else ''}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the vector index for a target recall at minimum latency")
+    parser.add_argument("--persist-directory", default="./vector_store", help="Vector store directory")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Required recall@k against exact search")
+    parser.add_argument("--k", type=int, default=5, help="Number of neighbours recall is measured on")
+    parser.add_argument("--sample-queries", type=int, default=100, help="Chunks held out as queries")
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"],
+                        help="Distance metric (default: the current setting, or l2)")
+    parser.add_argument("--m-values", type=parse_ints, default=[8, 16, 32], help="HNSW M values, comma separated")
+    parser.add_argument("--construction-ef", type=parse_ints, default=[100, 200], help="HNSW construction_ef values, comma separated")
+    parser.add_argument("--search-ef", type=parse_ints, default=[10, 20, 50, 100], help="HNSW search_ef values, comma separated")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the query sample")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format")
+    parser.add_argument("--dry-run", action="store_true", help="Don't save the chosen settings")
+    parser.add_argument("--apply", action="store_true", help="Also rebuild the existing index with the chosen settings")
+    args = parser.parse_args()
+
+    load_dotenv()
+    rag = RAGSystem(persist_directory=args.persist_directory, api_key=os.getenv("OPENAI_API_KEY"))
+    space = args.space or rag.index_settings.get("space", "l2")
+
+    _, vectors, _, _ = rag.read_all()
+    try:
+        results = tune(
+            vectors,
+            k=args.k,
+            sample_queries=args.sample_queries,
+            space=space,
+            m_values=args.m_values,
+            construction_efs=args.construction_ef,
+            search_efs=args.search_ef,
+            seed=args.seed
+        )
+    except ValueError as e:
+        print(str(e))
+        sys.exit(1)
+
+    chosen = choose_setting(results, args.target_recall)
+    if args.format == "json":
+        print(json.dumps({"results": results, "chosen": chosen}, indent=2))
+    else:
+        print(format_table(results, chosen))
+
+    if chosen["recall_at_k"] < args.target_recall:
+        print(f"\nNo setting reached recall {args.target_recall}; chose the most accurate one. "
+              f"Try larger --m-values or --search-ef.", file=sys.stderr)
+
+    if args.dry_run:
+        return
+
+    settings = {key: chosen[key] for key in ("space", "M", "construction_ef", "search_ef")}
+    config = dict(read_index_config(args.persist_directory), **settings)
+    config["tuning"] = {
+        "k": args.k,
+        "target_recall": args.target_recall,
+        "recall_at_k": chosen["recall_at_k"],
+        "p95_latency_ms": chosen["p95_latency_ms"],
+        "chunks": len(vectors),
+        "created": datetime.now(timezone.utc).isoformat()
+    }
+    write_index_config(args.persist_directory, config)
+    print(f"\nSaved index settings to {os.path.join(args.persist_directory, 'index_config.json')}", file=sys.stderr)
+
+    if args.apply:
+        count = rag.rebuild_index(settings)
+        print(f"Rebuilt the index with {count} chunks", file=sys.stderr)
+    else:
+        print("They apply to new collections; run with --apply to rebuild the existing index.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
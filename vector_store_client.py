@@ -0,0 +1,83 @@
+"""
+Shared Vector Store Client
+
+This module provides the connection to a vector store server for
+client/server mode (see vector_store_server.py):
+- One HTTP client per server, shared by every RAGSystem in the process
+- Connection pooling with keep-alive, sized by environment variables
+- Server URLs like http://localhost:8000 (https for TLS)
+
+Environment variables:
+- VECTOR_STORE_URL: server to use instead of a local embedded store
+- VECTOR_STORE_MAX_CONNECTIONS: connection pool size per server (default: 20)
+- VECTOR_STORE_KEEPALIVE: seconds idle connections are kept open (default: 40)
+"""
+
+import os
+import threading
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import chromadb
+from chromadb.config import Settings
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, int, bool], "chromadb.api.ClientAPI"] = {}
+
+
+def parse_url(url: str) -> Tuple[str, int, bool]:
+    """
+    Split a vector store server URL into host, port and whether TLS is used.
+
+    Args:
+        url: Server URL, e.g. http://localhost:8000
+
+    Returns:
+        Tuple of (host, port, ssl)
+
+    Raises:
+        ValueError: If the URL isn't an http(s) URL with a host
+    """
+    parsed = urlparse(url if "://" in url else f"http://{url}")
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"Not a vector store server URL: {url}")
+    ssl = parsed.scheme == "https"
+    return parsed.hostname, parsed.port or (443 if ssl else 8000), ssl
+
+
+def _client_settings() -> Settings:
+    """Client settings, limited to the options this chromadb version supports."""
+    options = {
+        "anonymized_telemetry": False,
+        "chroma_http_max_connections": int(os.getenv("VECTOR_STORE_MAX_CONNECTIONS", "20")),
+        "chroma_http_max_keepalive_connections": int(os.getenv("VECTOR_STORE_MAX_CONNECTIONS", "20")),
+        "chroma_http_keepalive_secs": float(os.getenv("VECTOR_STORE_KEEPALIVE", "40"))
+    }
+    fields = getattr(Settings, "model_fields", None) or Settings.__fields__
+    return Settings(**{key: value for key, value in options.items() if key in fields})
+
+
+def get_client(url: str):
+    """
+    Get the shared client for a vector store server, creating it on first use.
+
+    Args:
+        url: Server URL, e.g. http://localhost:8000
+
+    Returns:
+        chromadb client connected to the server
+    """
+    key = parse_url(url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            host, port, ssl = key
+            client = chromadb.HttpClient(host=host, port=port, ssl=ssl, settings=_client_settings())
+            _clients[key] = client
+        return client
+
+
+def reset():
+    """Drop all shared clients (e.g. after a server restart)."""
+    with _lock:
+        _clients.clear()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Local vector store server
+
+Runs one Chroma server over a vector store directory so several app or CLI
+worker processes can share a single index instead of each opening its own copy.
+The server serializes writes and serves reads concurrently.
+
+Usage:
+    python vector_store_server.py --path ./vector_store --port 8000
+
+Then start the workers with:
+    VECTOR_STORE_URL=http://localhost:8000 streamlit run app.py
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import chromadb
+from chromadb.config import Settings
+
+
+class VectorStoreServer:
+    """
+    A Chroma server subprocess.
+
+    Can be used as a context manager, which starts the server and stops it on exit.
+    """
+
+    def __init__(self, path: str = "./vector_store", host: str = "localhost", port: int = 8000):
+        """
+        Args:
+            path: Directory the server stores the index in
+            host: Interface to listen on
+            port: Port to listen on
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def command(self) -> List[str]:
+        """Command line that starts the server."""
+        executable = shutil.which("chroma")
+        if executable is None:
+            raise RuntimeError("The chroma command wasn't found. Install it with: pip install chromadb")
+        return [executable, "run", "--path", self.path, "--host", self.host, "--port", str(self.port)]
+
+    def is_ready(self) -> bool:
+        """Check whether the server answers heartbeats."""
+        try:
+            client = chromadb.HttpClient(
+                host=self.host,
+                port=self.port,
+                settings=Settings(anonymized_telemetry=False)
+            )
+            client.heartbeat()
+            return True
+        except Exception:
+            return False
+
+    def start(self, timeout: float = 30.0, quiet: bool = True):
+        """
+        Start the server and wait until it accepts requests.
+
+        Args:
+            timeout: Seconds to wait for the server to come up
+            quiet: Hide the server's own output
+
+        Raises:
+            RuntimeError: If the server exits or doesn't come up in time
+        """
+        output = subprocess.DEVNULL if quiet else None
+        self.process = subprocess.Popen(self.command(), stdout=output, stderr=output)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Vector store server exited with code {self.process.returncode}")
+            if self.is_ready():
+                return
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Vector store server didn't start within {timeout:.0f}s")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the server."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def __enter__(self) -> "VectorStoreServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a shared vector store server")
+    parser.add_argument("--path", default="./vector_store", help="Vector store directory")
+    parser.add_argument("--host", default="localhost", help="Interface to listen on (0.0.0.0 for all)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    args = parser.parse_args()
+
+    server = VectorStoreServer(args.path, args.host, args.port)
+    try:
+        server.start(quiet=False)
+    except RuntimeError as e:
+        print(f"Couldn't start the server: {e}")
+        sys.exit(1)
+
+    print(f"\nVector store server running at {server.url} (data in {args.path})")
+    print(f"Start workers with VECTOR_STORE_URL={server.url}. Press Ctrl+C to stop.")
+    try:
+        server.process.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()